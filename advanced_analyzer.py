@@ -1,22 +1,27 @@
-import os
-from openai import OpenAI
+import time
 from dotenv import load_dotenv
 import re
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from news_filter import NewsFilter
+from llm_cache import LLMCache
+from price_store import PriceStore, recent_window
+from news_dedup import NearDuplicateDetector
+from sentiment_aggregator import SentimentAggregator
+from local_scorer import LexiconScorer, load_local_scorer
+from clients import get_openai_client
+from resilient_llm import ResilientLLM, CircuitOpenError, is_transient
+from pipeline_metrics import metrics, stage, increment, current_ticker
 
 load_dotenv()
 
-class AdvancedAnalyzer:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        print("✅ Advanced Analyzer ready")
-    
-    def analyze_article(self, article):
-        """Get enhanced sentiment analysis with confidence scoring"""
-        try:
-            article_text = f"{article['title']}. {article.get('description', '')}"
-            
-            prompt = f"""
+MODEL = "gpt-4o-mini"
+TEMPERATURE = 0.1
+PRICE_LOOKBACK_DAYS = 30
+# Share of its quality weight a fallback (local stand-in for a failed LLM call) keeps in aggregate sentiment
+FALLBACK_WEIGHT = 0.5
+
+ANALYSIS_PROMPT = """
             You are a financial analyst. Analyze this news for stock impact.
             
             News: {article_text}
@@ -33,75 +38,413 @@ class AdvancedAnalyzer:
             REASON: [one sentence explanation]
             RELEVANCE: [HIGH/MEDIUM/LOW]
             """
+
+BATCH_PROMPT = """
+            You are a financial analyst. Analyze each numbered news item below for stock impact.
             
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=120,
-                temperature=0.1
-            )
+            {numbered_articles}
+            
+            Consider:
+            - How specific and factual is this news?
+            - How directly does it relate to company performance?
+            - How significant is the impact mentioned?
             
-            text = response.choices[0].message.content.strip()
-            
-            # Parse the enhanced response
-            sentiment_match = re.search(r'SENTIMENT:\s*([-+]?\d*\.?\d+)', text)
-            confidence_match = re.search(r'CONFIDENCE:\s*([-+]?\d*\.?\d+)', text)
-            signal_match = re.search(r'SIGNAL:\s*(\w+)', text)
-            reason_match = re.search(r'REASON:\s*(.+)', text)
-            relevance_match = re.search(r'RELEVANCE:\s*(\w+)', text)
-            
-            if sentiment_match and confidence_match and signal_match:
-                return {
-                    'sentiment': float(sentiment_match.group(1)),
-                    'confidence': float(confidence_match.group(1)),
-                    'signal': signal_match.group(1).upper(),
-                    'reason': reason_match.group(1) if reason_match else "No reason provided",
-                    'relevance': relevance_match.group(1) if relevance_match else "MEDIUM",
-                    'title': article['title']
-                }
+            For EVERY item, respond with its number on its own line followed by exactly this format:
+            ITEM [number]
+            SENTIMENT: [number from -1.0 to 1.0]
+            CONFIDENCE: [number from 0.0 to 1.0]
+            SIGNAL: [BUY/SELL/HOLD]
+            REASON: [one sentence explanation]
+            RELEVANCE: [HIGH/MEDIUM/LOW]
+            """
+
+class AdvancedAnalyzer:
+    def __init__(self, max_workers=5, use_cache=True, batch_size=1, collector=None, news_filter=None,
+                 price_store=None, deduplicate=True, store=None, local_scorer=None, escalation_threshold=0.6,
+                 offline=False):
+        # Offline runs never touch the OpenAI API; every article is scored by the local tier
+        self.offline = offline
+        self._client = None
+        
+        # Optional CPU-only first tier (default from $LOCAL_SCORER): articles it scores with at least
+        # escalation_threshold confidence never reach the LLM
+        self.local_scorer = local_scorer if local_scorer is not None else load_local_scorer()
+        if offline and self.local_scorer is None:
+            self.local_scorer = LexiconScorer()
+        self.escalation_threshold = escalation_threshold
+        
+        # Fallback when the LLM is unavailable: the local tier if configured, else the built-in lexicon,
+        # built on first use
+        self._fallback_scorer = None
+        
+        # News collector and filter are built once and reused for every ticker
+        self.collector = collector
+        self.news_filter = news_filter or NewsFilter()
+        self.price_store = price_store or PriceStore()
+        
+        # Near-duplicate (syndicated) stories are scored once per cluster
+        self.deduplicator = NearDuplicateDetector() if deduplicate else None
+        
+        # Optional ArticleStore that keeps raw articles, filter scores and analyses for replay
+        self.store = store
+        
+        # On-disk cache of LLM answers keyed on model, prompt, temperature and article text
+        self.cache = LLMCache() if use_cache else None
+        
+        # Bounded pool shared by every scoring call, so max_workers caps the
+        # number of LLM requests in flight (1 = score articles serially)
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        
+        # Every LLM request goes through retries with backoff, rate-limit-aware throttling, an AIMD
+        # concurrency cap (at most max_workers, shrinking on 429s) and a circuit breaker
+        self.llm = ResilientLLM(lambda: self.client, max_concurrency=max_workers)
+        
+        # Articles packed into one prompt per request (1 = one prompt per article)
+        self.batch_size = batch_size
+        print("✅ Advanced Analyzer ready")
+    
+    @property
+    def client(self):
+        """Shared OpenAI client, created (and the SDK imported) on the first LLM call"""
+        if self._client is None and not self.offline:
+            self._client = get_openai_client()
+        return self._client
+    
+    @client.setter
+    def client(self, client):
+        self._client = client
+    
+    @property
+    def fallback_scorer(self):
+        """Local tier if configured, else a quietly built lexicon scorer"""
+        if self.local_scorer is not None:
+            return self.local_scorer
+        if self._fallback_scorer is None:
+            self._fallback_scorer = LexiconScorer(verbose=False)
+        return self._fallback_scorer
+    
+    def close(self):
+        """Stop the scoring worker threads; the analyzer cannot score afterwards"""
+        self.executor.shutdown(wait=True)
+    
+    def prescreen(self, article):
+        """Local-tier analysis if it is confident enough to skip the LLM (always, when offline), else None"""
+        if self.local_scorer is None:
+            return None
+        
+        analysis = self.local_scorer.score(article)
+        if analysis and (self.offline or analysis['confidence'] >= self.escalation_threshold):
+            return analysis
+        return None
+    
+    def analyze_article(self, article):
+        """Get enhanced sentiment analysis with confidence scoring"""
+        try:
+            # Obvious articles are settled locally; the rest escalate to the LLM
+            analysis = self.prescreen(article)
+            if analysis or self.offline:
+                increment('local_scored' if analysis else 'local_unscored')
+                return analysis
+            
+            article_text = f"{article['title']}. {article.get('description', '')}"
+            
+            prompt = ANALYSIS_PROMPT.format(article_text=article_text)
+            
+            # Reuse a previous answer for the same model, prompt and article
+            cache_key = None
+            text = None
+            if self.cache:
+                cache_key = self.cache.make_key(MODEL, ANALYSIS_PROMPT, TEMPERATURE, article_text)
+                text = self.cache.get(cache_key)
+                increment('llm_cache_hits' if text is not None else 'llm_cache_misses')
+            
+            from_api = text is None
+            if from_api:
+                with stage('llm_call', model=MODEL, articles=1) as span:
+                    response = self.llm.create(
+                        model=MODEL,
+                        messages=[{"role": "user", "content": prompt}],
+                        max_tokens=120,
+                        temperature=TEMPERATURE
+                    )
+                    self.record_usage(response, span)
+                
+                text = response.choices[0].message.content.strip()
+            
+            analysis = self.parse_analysis(text, article)
+            
+            if analysis:
+                # Only fresh, well-formed answers are worth caching (storing a hit again would push back its expiry)
+                if cache_key and from_api:
+                    self.cache.set(cache_key, text)
+                return analysis
             else:
+                increment('llm_parse_errors')
                 print(f"❌ Could not parse response: {text}")
                 return None
                 
+        except CircuitOpenError:
+            return self.fallback_analysis(article)
         except Exception as e:
             print(f"❌ Analysis error: {e}")
+            # Rate limits and outages that outlasted the retries still yield a score
+            return self.fallback_analysis(article) if is_transient(e) else None
+    
+    def fallback_analysis(self, article):
+        """Score an article the LLM could not: a cached answer under either prompt, else the local scorer
+        (flagged with 'fallback': True)"""
+        increment('llm_fallbacks')
+        if self.cache:
+            article_text = f"{article['title']}. {article.get('description', '')}"
+            for prompt in (ANALYSIS_PROMPT, BATCH_PROMPT):
+                cached = self.cache.get(self.cache.make_key(MODEL, prompt, TEMPERATURE, article_text))
+                analysis = self.parse_analysis(cached, article) if cached is not None else None
+                if analysis:
+                    return analysis
+        
+        # Flagged: a local score stands in for the LLM, and counts for less (see annotate_analysis)
+        analysis = self.fallback_scorer.score(article)
+        if analysis:
+            analysis['fallback'] = True
+        return analysis
+    
+    def fallback_unscored(self, articles, results):
+        """Batch results with fallback analyses in place of the unscored items"""
+        return [result if result is not None else self.fallback_analysis(article)
+                for article, result in zip(articles, results)]
+    
+    def parse_analysis(self, text, article):
+        """Parse a SENTIMENT/CONFIDENCE/SIGNAL response, or return None if it is malformed"""
+        sentiment_match = re.search(r'SENTIMENT:\s*([-+]?\d*\.?\d+)', text)
+        confidence_match = re.search(r'CONFIDENCE:\s*([-+]?\d*\.?\d+)', text)
+        signal_match = re.search(r'SIGNAL:\s*(\w+)', text)
+        reason_match = re.search(r'REASON:\s*(.+)', text)
+        relevance_match = re.search(r'RELEVANCE:\s*(\w+)', text)
+        
+        if not (sentiment_match and confidence_match and signal_match):
             return None
+        
+        return {
+            'sentiment': float(sentiment_match.group(1)),
+            'confidence': float(confidence_match.group(1)),
+            'signal': signal_match.group(1).upper(),
+            'reason': reason_match.group(1) if reason_match else "No reason provided",
+            'relevance': relevance_match.group(1) if relevance_match else "MEDIUM",
+            'title': article['title']
+        }
+    
+    def analyze_articles_batch(self, articles):
+        """Analyze several articles in one request, retrying missing or unparseable items one by one"""
+        article_texts = [f"{a['title']}. {a.get('description', '')}" for a in articles]
+        results = [None] * len(articles)
+        
+        # Settle what we can locally, serve what we can from the cache and only send the rest
+        cache_keys = [None] * len(articles)
+        pending = []
+        for i, article_text in enumerate(article_texts):
+            results[i] = self.prescreen(articles[i])
+            if results[i] is not None:
+                increment('local_scored')
+                continue
+            if self.cache:
+                cache_keys[i] = self.cache.make_key(MODEL, BATCH_PROMPT, TEMPERATURE, article_text)
+                cached = self.cache.get(cache_keys[i])
+                increment('llm_cache_hits' if cached is not None else 'llm_cache_misses')
+                if cached is not None:
+                    results[i] = self.parse_analysis(cached, articles[i])
+            if results[i] is None:
+                pending.append(i)
+        
+        if len(pending) > 1 and not self.offline:
+            numbered_articles = "\n".join(
+                f"[ITEM {n}] {article_texts[i]}" for n, i in enumerate(pending, start=1)
+            )
+            prompt = BATCH_PROMPT.format(numbered_articles=numbered_articles)
+            
+            try:
+                with stage('llm_call', model=MODEL, articles=len(pending)) as span:
+                    response = self.llm.create(
+                        model=MODEL,
+                        messages=[{"role": "user", "content": prompt}],
+                        max_tokens=120 * len(pending),
+                        temperature=TEMPERATURE
+                    )
+                    self.record_usage(response, span)
+                text = response.choices[0].message.content.strip()
+                
+                # Split the answer into per-item blocks: ["", "1", block1, "2", block2, ...]
+                parts = re.split(r'^\s*\[?ITEM\s+(\d+)\]?:?\s*$', text, flags=re.MULTILINE | re.IGNORECASE)
+                blocks = {int(number): block.strip() for number, block in zip(parts[1::2], parts[2::2])}
+                
+                for n, i in enumerate(pending, start=1):
+                    block = blocks.get(n)
+                    if block:
+                        results[i] = self.parse_analysis(block, articles[i])
+                        if results[i] and cache_keys[i]:
+                            self.cache.set(cache_keys[i], block)
+                    
+            except CircuitOpenError:
+                return self.fallback_unscored(articles, results)
+            except Exception as e:
+                print(f"❌ Batch analysis error: {e}")
+                # The request itself failed: sending each item on its own would repeat it once per article, so
+                # they are settled as a single failed call would be
+                return self.fallback_unscored(articles, results) if is_transient(e) else results
+        
+        # Anything the batch answered without a clean block gets its own request
+        for i in range(len(articles)):
+            if results[i] is None:
+                increment('llm_batch_items_resent')
+                results[i] = self.analyze_article(articles[i])
+        
+        return results
+    
+    def record_usage(self, response, span):
+        """Add an LLM response's token usage to its metrics span and the per-ticker counters"""
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            return
+        span['prompt_tokens'] = usage.prompt_tokens
+        span['completion_tokens'] = usage.completion_tokens
+        increment('llm_prompt_tokens', usage.prompt_tokens)
+        increment('llm_completion_tokens', usage.completion_tokens)
+    
+    def submit(self, fn, *args, ticker=None):
+        """Run fn on the scoring pool with the caller's context, so metrics land on the right ticker"""
+        context = contextvars.copy_context()
+        if ticker is not None:
+            context.run(current_ticker.set, ticker)
+        return self.executor.submit(context.run, fn, *args)
+    
+    def score_articles(self, articles, ticker=None):
+        """Score articles concurrently, returning analyses in the same order as the articles"""
+        # Results are collected in input order, whatever order the calls finish in
+        if self.batch_size <= 1:
+            futures = [self.submit(self.analyze_article, article, ticker=ticker) for article in articles]
+            return [future.result() for future in futures]
+        
+        batches = [articles[i:i + self.batch_size] for i in range(0, len(articles), self.batch_size)]
+        futures = [self.submit(self.analyze_articles_batch, batch, ticker=ticker) for batch in batches]
+        return [analysis for future in futures for analysis in future.result()]
+    
+    def iter_scored_articles(self, articles, ticker=None):
+        """Yield (index, analysis) pairs as each LLM call finishes, in completion order"""
+        if self.batch_size <= 1:
+            futures = {self.submit(self.analyze_article, article, ticker=ticker): [i] for i, article in enumerate(articles)}
+        else:
+            futures = {}
+            for start in range(0, len(articles), self.batch_size):
+                batch = articles[start:start + self.batch_size]
+                futures[self.submit(self.analyze_articles_batch, batch, ticker=ticker)] = list(range(start, start + len(batch)))
+        
+        try:
+            for future in as_completed(futures):
+                analyses = future.result() if self.batch_size > 1 else [future.result()]
+                for i, analysis in zip(futures[future], analyses):
+                    yield i, analysis
+        finally:
+            # Drop queued calls if the caller stops listening early
+            for future in futures:
+                future.cancel()
+    
+    def annotate_analysis(self, analysis, article, duplicates=()):
+        """Attach the article's quality weight, source and syndication details to its analysis"""
+        cluster_size = 1 + len(duplicates)
+        
+        # Weight the analysis by article quality, boosted (sublinearly) by how many outlets carried it
+        analysis['quality_weight'] = article['quality_score'] * NearDuplicateDetector.cluster_weight(cluster_size)
+        if analysis.get('fallback'):
+            analysis['quality_weight'] *= FALLBACK_WEIGHT
+        analysis['source_credibility'] = article['credibility_score']
+        analysis['cluster_size'] = cluster_size
+        analysis['duplicate_titles'] = [duplicate['title'] for duplicate in duplicates]
+        analysis['published_at'] = article['publishedAt']
+        return analysis
     
     def analyze_stock_sentiment(self, ticker):
         """Analyze overall sentiment for a stock using filtered, high-quality news"""
-        from news_collector import NewsCollector
-        
-        collector = NewsCollector()
-        filter_system = NewsFilter()
+        result = None
+        for event in self.iter_stock_sentiment(ticker):
+            if event['type'] == 'result':
+                result = event['result']
+        return result
+    
+    def iter_stock_sentiment(self, ticker):
+        """Stream analyze_stock_sentiment: yields an 'analysis' event per article as it is scored
+        (with the running quality-weighted sentiment), then a final 'result' event"""
+        if self.collector is None:
+            # Imported here so analyzers that are handed a collector never load newsapi/yfinance
+            from news_collector import NewsCollector
+            self.collector = NewsCollector()
         
         # Get raw news
-        raw_news = collector.get_stock_news(ticker, days=5)
+        raw_news = self.collector.get_stock_news(ticker, days=5)
         
         if not raw_news:
-            return None
+            yield {'type': 'result', 'result': None}
+            return
         
         # Filter and rank articles by quality
-        filtered_news = filter_system.filter_and_rank_articles(raw_news, ticker)
+        filtered_news = self.news_filter.filter_and_rank_articles(raw_news, ticker)
         
         if not filtered_news:
             print("No high-quality articles found after filtering")
-            return None
+            yield {'type': 'result', 'result': None}
+            return
         
-        analyses = []
-        print(f"\nAnalyzing {len(filtered_news)} high-quality articles for {ticker}...")
+        # Collapse syndicated copies of the same story; only one article per story is scored
+        if self.deduplicator:
+            clusters = self.deduplicator.cluster(filtered_news)
+            print(f"Collapsed {len(filtered_news)} articles into {len(clusters)} distinct stories")
+        else:
+            clusters = [[i] for i in range(len(filtered_news))]
+        representatives = [filtered_news[cluster[0]] for cluster in clusters]
+        
+        analyses_by_rank = {}
+        running = SentimentAggregator(window_hours=None, half_life_hours=None)
+        print(f"\nAnalyzing {len(representatives)} high-quality articles for {ticker}...")
         
-        # Analyze only the filtered, high-quality articles
-        for article in filtered_news:
-            analysis = self.analyze_article(article)
+        # Analyze only the filtered, high-quality articles (LLM calls run concurrently, reported as they land)
+        for completed, (i, analysis) in enumerate(self.iter_scored_articles(representatives, ticker), start=1):
             if analysis:
-                # Weight the analysis by article quality
-                analysis['quality_weight'] = article['quality_score']
-                analysis['source_credibility'] = article['credibility_score']
-                analyses.append(analysis)
-                print(f"  {analysis['sentiment']:+.2f} | {analysis['signal']} | Quality: {article['quality_score']:.2f} | {analysis['title'][:50]}...")
+                article, cluster = representatives[i], clusters[i]
+                self.annotate_analysis(analysis, article, [filtered_news[j] for j in cluster[1:]])
+                analyses_by_rank[i] = analysis
+                
+                running.add(analysis)
+                running_text = f"{running.sentiment:+.2f}" if running.sentiment is not None else "n/a"
+                print(f"  {analysis['sentiment']:+.2f} | {analysis['signal']} | Quality: {article['quality_score']:.2f} | "
+                      f"Running: {running_text} | {'(fallback) ' if analysis.get('fallback') else ''}"
+                      f"{analysis['title'][:50]}...")
+            
+            yield {
+                'type': 'analysis',
+                'ticker': ticker,
+                'analysis': analysis,
+                'completed': completed,
+                'total': len(representatives),
+                'articles_scored': len(analyses_by_rank),
+                'running_sentiment': running.sentiment
+            }
+        
+        # Aggregate in rank order, exactly as if every article had been scored at once. Lexicon stand-ins
+        # for failed LLM calls are averaged in at FALLBACK_WEIGHT and also listed separately
+        ranks = sorted(analyses_by_rank)
+        analyses = [analyses_by_rank[i] for i in ranks]
+        fallbacks = [analysis for analysis in analyses if analysis.get('fallback')]
+        
+        if self.store:
+            self.store.save_articles(ticker, raw_news)
+            self.store.save_articles(ticker, filtered_news)
+            # Stand-ins are stored under the local scorer's name, so a later LLM analysis supersedes them
+            self.store.save_analyses(ticker, [(representatives[i], analyses_by_rank[i]) for i in ranks], model=MODEL)
         
         if not analyses:
-            return None
+            yield {'type': 'result', 'result': None}
+            return
+        if len(fallbacks) == len(analyses):
+            print(f"⚠️ The LLM could not score any of the {len(fallbacks)} stories for {ticker}; using local scores")
         
         # Calculate quality-weighted metrics
         total_weight = sum(a['quality_weight'] for a in analyses)
@@ -110,25 +453,25 @@ class AdvancedAnalyzer:
         buy_signals = sum(1 for a in analyses if a['signal'] == 'BUY')
         sell_signals = sum(1 for a in analyses if a['signal'] == 'SELL')
         
-        return {
+        yield {'type': 'result', 'result': {
             'ticker': ticker,
             'avg_sentiment': weighted_sentiment,
             'total_articles': len(analyses),
             'buy_signals': buy_signals,
             'sell_signals': sell_signals,
             'detailed_analyses': analyses,
+            'fallback_analyses': fallbacks,
             'raw_articles_count': len(raw_news),
-            'filtered_articles_count': len(filtered_news)
-    }
+            'filtered_articles_count': len(filtered_news),
+            'unique_stories_count': len(representatives)
+        }}
+    
     def get_stock_price_data(self, ticker):
         """Get recent stock price data"""
         try:
-            import yfinance as yf
-            
-            stock = yf.Ticker(ticker)
-            
-            # Get 30 days of data
-            hist = stock.history(period="1mo")
+            # Get 30 days of data (served from the local price cache when possible)
+            with stage('price_fetch', ticker):
+                hist = self.price_store.get_history(ticker, *recent_window(PRICE_LOOKBACK_DAYS))
             
             if hist.empty:
                 return None
@@ -157,21 +500,38 @@ class AdvancedAnalyzer:
             return None
         
 
-    def calculate_risk_metrics(self, analyses, price_data):
-        """Calculate risk warnings and confidence metrics"""
+    def calculate_risk_metrics(self, analyses, price_data, ticker=None):
+        """Calculate risk warnings and confidence metrics
+        
+        analyses: the list of analyses, or a SentimentAggregator whose running (time-decayed) totals are used as-is
+        """
+        with stage('risk', ticker):
+            return self._risk_metrics(analyses, price_data)
+    
+    def _risk_metrics(self, analyses, price_data):
         if not analyses or not price_data:
             return {}
         
-        # News volume analysis
-        high_relevance = sum(1 for a in analyses if a.get('relevance') == 'HIGH')
-        total_articles = len(analyses)
-        news_volume_score = min(total_articles / 10.0, 1.0)  # Normalize to 0-1
-        
-        # Confidence analysis
-        avg_confidence = sum(a.get('confidence', 0.5) for a in analyses) / len(analyses)
+        if isinstance(analyses, SentimentAggregator):
+            snapshot = analyses.snapshot()
+            if not snapshot['total_articles']:
+                return {}
+            high_relevance = snapshot['high_relevance_articles']
+            total_articles = snapshot['total_articles']
+            avg_confidence = snapshot['avg_confidence']
+            sentiment_direction = snapshot['sentiment_direction']
+        else:
+            # News volume analysis
+            high_relevance = sum(1 for a in analyses if a.get('relevance') == 'HIGH')
+            total_articles = len(analyses)
+            
+            # Confidence analysis
+            avg_confidence = sum(a.get('confidence', 0.5) for a in analyses) / len(analyses)
+            
+            # Disagreement analysis
+            sentiment_direction = "bullish" if sum(a['sentiment'] for a in analyses) > 0 else "bearish"
         
-        # Disagreement analysis
-        sentiment_direction = "bullish" if sum(a['sentiment'] for a in analyses) > 0 else "bearish"
+        news_volume_score = min(total_articles / 10.0, 1.0)  # Normalize to 0-1
         market_direction = "bullish" if price_data['direction'] == 'up' else "bearish"
         agreement = sentiment_direction == market_direction
         
@@ -208,14 +568,24 @@ if __name__ == "__main__":
     
     # Test all features together
     ticker = "AAPL"
-    sentiment_result = analyzer.analyze_stock_sentiment(ticker)
+    
+    # Stream scores as they land; the last event carries what analyze_stock_sentiment would return
+    started = time.monotonic()
+    sentiment_result = None
+    for event in analyzer.iter_stock_sentiment(ticker):
+        if event['type'] == 'analysis' and event['completed'] == 1:
+            print(f"⚡ First signal after {time.monotonic() - started:.1f}s")
+        elif event['type'] == 'result':
+            sentiment_result = event['result']
+    
     price_data = analyzer.get_stock_price_data(ticker)
     
     if sentiment_result and price_data:
         # Calculate risk metrics
         risk_metrics = analyzer.calculate_risk_metrics(
             sentiment_result['detailed_analyses'], 
-            price_data
+            price_data,
+            ticker=ticker
         )
         
         print(f"\n🎯 ENHANCED ANALYSIS FOR {ticker}:")
@@ -237,6 +607,11 @@ if __name__ == "__main__":
                 print(f"  • {warning}")
         else:
             print("\n✅ No major risk warnings detected")
+        
+        # Where the time went
+        print(f"\n⏱️  STAGE TIMINGS:")
+        for row in metrics.breakdown(ticker):
+            print(f"  {row['stage']:14} {row['calls']:3} calls  {row['total_ms']:8.1f}ms total  {row['errors']} errors")
     
     else:
         print("❌ Analysis failed")
\ No newline at end of file
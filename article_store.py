@@ -0,0 +1,268 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from local_scorer import LexiconScorer
+
+load_dotenv()
+
+DEFAULT_ARTICLE_STORE_PATH = os.getenv('ARTICLE_STORE_PATH', os.path.join('.cache', 'articles.sqlite'))
+
+SCORE_FIELDS = ['credibility_score', 'relevance_score', 'time_weight', 'quality_score']
+
+# Only the time-independent filter scores are stored; time_weight and quality_score decay with the article's
+# age, so they are recomputed on read (the columns stay for databases written before this)
+STORED_SCORE_FIELDS = ['credibility_score', 'relevance_score']
+
+# SQLite builds before 3.32 allow at most 999 bound parameters per statement
+MAX_QUERY_PARAMS = 500
+
+def to_utc_iso(value):
+    """Normalize a timestamp (ISO string or datetime) to 'YYYY-MM-DDTHH:MM:SSZ' so stored values sort as text"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def current_weights(credibility, relevance, published_at, now=None):
+    """(time_weight, quality_score) as of now, with NewsFilter's 72-hour decay and quality weights"""
+    now = pd.Timestamp.now(tz='UTC') if now is None else pd.Timestamp(now)
+    hours_ago = (now - pd.to_datetime(published_at, utc=True)) / pd.Timedelta(hours=1)
+    time_weight = np.maximum(0.1, 1.0 - np.asarray(hours_ago, dtype=float) / 72)
+    quality = np.asarray(credibility, dtype=float) * 0.4 + np.asarray(relevance, dtype=float) * 0.4 + time_weight * 0.2
+    return time_weight, quality
+
+def one_analysis_per_article(scores):
+    """Rows of get_scored_window with one analysis per (ticker, article): an LLM's over the local tier's, and
+    otherwise the latest"""
+    if scores.empty:
+        return scores
+    local = scores['model'] == LexiconScorer.name
+    scored_twice = scores.duplicated(subset=['ticker', 'article_id'], keep=False)
+    return scores[~(local & scored_twice)].drop_duplicates(subset=['ticker', 'article_id'], keep='last')
+
+class ArticleStore:
+    def __init__(self, path=DEFAULT_ARTICLE_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One connection shared across threads, guarded by a lock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                article_id TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                published_at TEXT NOT NULL,
+                source TEXT,
+                title TEXT,
+                description TEXT,
+                url TEXT,
+                raw_json TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                credibility_score REAL,
+                relevance_score REAL,
+                time_weight REAL,
+                quality_score REAL,
+                PRIMARY KEY (article_id, ticker)
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_ticker_time ON articles (ticker, published_at);
+            CREATE INDEX IF NOT EXISTS idx_articles_time ON articles (published_at);
+            CREATE INDEX IF NOT EXISTS idx_articles_source ON articles (source);
+
+            CREATE TABLE IF NOT EXISTS analyses (
+                article_id TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                model TEXT NOT NULL,
+                sentiment REAL NOT NULL,
+                confidence REAL NOT NULL,
+                signal TEXT NOT NULL,
+                reason TEXT,
+                relevance TEXT,
+                cluster_size INTEGER NOT NULL DEFAULT 1,
+                analyzed_at REAL NOT NULL,
+                PRIMARY KEY (article_id, ticker, model)
+            );
+        """)
+
+        # Full-text search over titles and descriptions, when this SQLite build has FTS5
+        try:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+                "article_id UNINDEXED, ticker UNINDEXED, title, description)"
+            )
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False
+        self.conn.commit()
+
+    @staticmethod
+    def article_id(article):
+        """Stable id for an article: its URL, or title + timestamp when there is no URL"""
+        key = article.get('url') or f"{article['title']}|{article['publishedAt']}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+    def save_articles(self, ticker, articles):
+        """Insert or update articles for a ticker; filter scores are kept when present"""
+        now = time.time()
+        rows = []
+        for article in articles:
+            raw = {k: v for k, v in article.items() if k not in SCORE_FIELDS}
+            rows.append((
+                self.article_id(article), ticker, to_utc_iso(article['publishedAt']),
+                (article.get('source') or {}).get('name'), article['title'], article.get('description'),
+                article.get('url'), json.dumps(raw), now,
+                *[article.get(field) for field in STORED_SCORE_FIELDS]
+            ))
+
+        with self.lock:
+            # Looked up in chunks to stay under SQLite's bound-parameter limit
+            existing = set()
+            for i in range(0, len(rows), MAX_QUERY_PARAMS):
+                chunk = [row[0] for row in rows[i:i + MAX_QUERY_PARAMS]]
+                existing.update(row[0] for row in self.conn.execute(
+                    f"SELECT article_id FROM articles WHERE ticker = ? AND article_id IN ({','.join('?' * len(chunk))})",
+                    [ticker] + chunk
+                ))
+
+            # Saving raw articles again must not wipe scores saved earlier
+            self.conn.executemany("""
+                INSERT INTO articles (article_id, ticker, published_at, source, title, description, url,
+                                      raw_json, fetched_at, credibility_score, relevance_score)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (article_id, ticker) DO UPDATE SET
+                    credibility_score = COALESCE(excluded.credibility_score, credibility_score),
+                    relevance_score = COALESCE(excluded.relevance_score, relevance_score)
+            """, rows)
+
+            if self.has_fts:
+                self.conn.executemany(
+                    "INSERT INTO articles_fts (article_id, ticker, title, description) VALUES (?, ?, ?, ?)",
+                    [(row[0], ticker, row[4], row[5]) for row in rows if row[0] not in existing]
+                )
+            self.conn.commit()
+
+    def save_analyses(self, ticker, scored, model):
+        """Store analyses given as (article, analysis) pairs, under `model` unless a local scorer produced them"""
+        now = time.time()
+        rows = [(
+            self.article_id(article), ticker, analysis.get('scorer', model), analysis['sentiment'], analysis['confidence'],
+            analysis['signal'], analysis.get('reason'), analysis.get('relevance'),
+            analysis.get('cluster_size', 1), now
+        ) for article, analysis in scored]
+
+        with self.lock:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO analyses (article_id, ticker, model, sentiment, confidence, signal,
+                                                 reason, relevance, cluster_size, analyzed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            self.conn.commit()
+
+    def get_articles(self, ticker, start=None, end=None, source=None):
+        """Stored articles for a ticker with start <= publishedAt < end, newest first, scores as of now included"""
+        query = "SELECT * FROM articles WHERE ticker = ?"
+        params = [ticker]
+        if start is not None:
+            query += " AND published_at >= ?"
+            params.append(to_utc_iso(start))
+        if end is not None:
+            query += " AND published_at < ?"
+            params.append(to_utc_iso(end))
+        if source is not None:
+            query += " AND source = ?"
+            params.append(source)
+        query += " ORDER BY published_at DESC"
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        articles = []
+        for row in rows:
+            article = json.loads(row['raw_json'])
+            if row['credibility_score'] is not None and row['relevance_score'] is not None:
+                time_weight, quality = current_weights(row['credibility_score'], row['relevance_score'],
+                                                       row['published_at'])
+                article.update({
+                    'credibility_score': row['credibility_score'],
+                    'relevance_score': row['relevance_score'],
+                    'time_weight': float(time_weight),
+                    'quality_score': float(quality)
+                })
+            articles.append(article)
+        return articles
+
+    def get_scored_window(self, tickers, start, end, model=None):
+        """One row per stored analysis for the tickers in [start, end) (oldest first per article): filter scores joined
+        with LLM scores
+
+        quality_score is as of now; point-in-time callers recompute it from credibility and relevance.
+        """
+        query = f"""
+            SELECT a.ticker, a.article_id, a.published_at, a.source, a.title,
+                   a.credibility_score, a.relevance_score,
+                   s.model, s.sentiment, s.confidence, s.signal, s.relevance, s.cluster_size
+            FROM articles a
+            JOIN analyses s ON s.article_id = a.article_id AND s.ticker = a.ticker
+            WHERE a.ticker IN ({','.join('?' * len(tickers))})
+              AND a.published_at >= ? AND a.published_at < ?
+        """
+        params = list(tickers) + [to_utc_iso(start), to_utc_iso(end)]
+        if model is not None:
+            query += " AND s.model = ?"
+            params.append(model)
+        query += " ORDER BY a.ticker, a.published_at, s.analyzed_at"
+
+        with self.lock:
+            frame = pd.read_sql_query(query, self.conn, params=params)
+        frame['published_at'] = pd.to_datetime(frame['published_at'], utc=True)
+        frame['quality_score'] = current_weights(frame['credibility_score'], frame['relevance_score'],
+                                                 frame['published_at'])[1]
+        return frame
+
+    def search(self, query, ticker=None, limit=20):
+        """Full-text search over stored titles and descriptions (FTS5 syntax), best matches first"""
+        if not self.has_fts:
+            print("❌ Full-text search needs SQLite with FTS5")
+            return []
+
+        sql = "SELECT article_id, ticker FROM articles_fts WHERE articles_fts MATCH ?"
+        params = [query]
+        if ticker is not None:
+            sql += " AND ticker = ?"
+            params.append(ticker)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
+        with self.lock:
+            matches = self.conn.execute(sql, params).fetchall()
+            results = []
+            for match in matches:
+                row = self.conn.execute(
+                    "SELECT raw_json FROM articles WHERE article_id = ? AND ticker = ?",
+                    (match['article_id'], match['ticker'])
+                ).fetchone()
+                if row:
+                    results.append({**json.loads(row['raw_json']), 'ticker': match['ticker']})
+        return results
+
+# Test it
+if __name__ == "__main__":
+    store = ArticleStore()
+
+    recent = store.get_articles("AAPL", start=datetime.now(timezone.utc).replace(hour=0, minute=0, second=0))
+    print(f"Stored AAPL articles published today: {len(recent)}")
+
+    for article in store.search("earnings", ticker="AAPL", limit=5):
+        print(f"  {article['publishedAt']} | {article['title'][:60]}")
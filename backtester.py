@@ -1,4 +1,3 @@
-import yfinance as yf
 from datetime import datetime, timedelta
 import pandas as pd
 from advanced_analyzer import AdvancedAnalyzer
@@ -7,12 +6,12 @@ import time
 class Backtester:
     def __init__(self):
         self.analyzer = AdvancedAnalyzer()
+        self.price_store = self.analyzer.price_store
         
     def get_historical_prices(self, ticker, start_date, end_date):
         """Get historical stock prices"""
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(start=start_date, end=end_date)
+            hist = self.price_store.get_history(ticker, start_date, end_date)
             return hist
         except Exception as e:
             print(f"Error getting historical data: {e}")
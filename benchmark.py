@@ -0,0 +1,453 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+import contextlib
+import numpy as np
+import pandas as pd
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+from advanced_analyzer import AdvancedAnalyzer, ANALYSIS_PROMPT, TEMPERATURE, MODEL
+from news_collector import NewsCollector
+from news_filter import NewsFilter
+from sentiment_aggregator import SentimentAggregator
+from realistic_backtester import RealisticBacktester
+from historical_backtester import HistoricalBacktester
+from mock_server import TITLE_TEMPLATES, SOURCES, COMPANIES, synthetic_answer
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+FIXTURES_DIR = os.path.join(BENCHMARK_DIR, 'fixtures')
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+
+DEFAULT_SIZES = [10, 1_000, 100_000, 1_000_000]
+REGRESSION_THRESHOLD = 0.10
+
+# Fewer timed runs than this report min/p50/max only
+MIN_REPEATS_FOR_PERCENTILES = 3
+
+class StubNewsApi:
+    """Stands in for NewsApiClient: every get_everything call returns the recorded result set"""
+    def __init__(self, articles):
+        self.articles = articles
+
+    def get_everything(self, **params):
+        # page_size is ignored on purpose, so a single call can feed the pipeline any number of articles
+        return {'status': 'ok', 'totalResults': len(self.articles), 'articles': self.articles}
+
+class StubOpenAI:
+    """Stands in for the OpenAI client: answers from recorded responses, or deterministically from the text"""
+    def __init__(self, answers=None, latency=0.0):
+        self.answers = answers or {}
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def answer(self, article_text):
+        return self.answers.get(article_text) or synthetic_answer(article_text)
+
+    def create(self, model, messages, max_tokens, temperature, timeout=None):
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = messages[0]['content']
+        items = re.findall(r'^\s*\[ITEM (\d+)\] (.*)$', prompt, flags=re.MULTILINE)
+        if items:
+            text = "\n".join(f"ITEM {n}\n{self.answer(article_text)}" for n, article_text in items)
+        else:
+            text = self.answer(re.search(r'News: (.*)', prompt).group(1))
+        usage = SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(text) // 4,
+                                total_tokens=(len(prompt) + len(text)) // 4)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=usage)
+
+class StubPriceStore:
+    """Stands in for PriceStore: serves fixture price frames, never downloads"""
+    def __init__(self, frames):
+        self.frames = frames
+
+    def prefetch(self, tickers, start, end):
+        pass
+
+    def get_history(self, ticker, start, end):
+        return self.frames[ticker]
+
+class StubArticleStore:
+    """Stands in for ArticleStore.get_scored_window with a prepared frame"""
+    def __init__(self, scores):
+        self.scores = scores
+
+    def get_scored_window(self, tickers, start, end, model=None):
+        return self.scores
+
+def record_fixtures(ticker, fixtures_dir=FIXTURES_DIR, max_articles=100):
+    """Capture live NewsAPI, OpenAI and yfinance responses for ticker (needs API keys and network)"""
+    import yfinance as yf
+    directory = os.path.join(fixtures_dir, ticker)
+    os.makedirs(directory, exist_ok=True)
+
+    collector = NewsCollector()
+    company_name = collector.get_company_name(ticker)
+    response = collector.newsapi.get_everything(q=f'"{company_name}" OR {ticker}', language='en',
+                                                sort_by='publishedAt', page_size=min(100, max_articles))
+    articles = response['articles'][:max_articles]
+    with open(os.path.join(directory, 'news.json'), 'w') as f:
+        json.dump(articles, f, indent=2)
+
+    # Raw model answers keyed by the exact article text the analyzer sends
+    analyzer = AdvancedAnalyzer(use_cache=False)
+    answers = {}
+    for article in articles:
+        article_text = f"{article['title']}. {article.get('description', '')}"
+        completion = analyzer.client.chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": ANALYSIS_PROMPT.format(article_text=article_text)}],
+            max_tokens=120,
+            temperature=TEMPERATURE
+        )
+        answers[article_text] = completion.choices[0].message.content.strip()
+    with open(os.path.join(directory, 'llm.json'), 'w') as f:
+        json.dump(answers, f, indent=2)
+
+    prices = yf.Ticker(ticker).history(period='2y', auto_adjust=True)
+    prices.index = prices.index.tz_localize(None)
+    prices.to_parquet(os.path.join(directory, 'prices.parquet'))
+    print(f"✅ Recorded {len(articles)} articles, {len(answers)} LLM answers and {len(prices)} price rows for {ticker}")
+
+def load_fixtures(fixtures_dir=FIXTURES_DIR):
+    """Recorded fixtures from every ticker directory, or None when nothing has been recorded"""
+    if not os.path.isdir(fixtures_dir):
+        return None
+
+    articles, answers, returns = [], {}, []
+    for ticker in sorted(os.listdir(fixtures_dir)):
+        directory = os.path.join(fixtures_dir, ticker)
+        try:
+            with open(os.path.join(directory, 'news.json')) as f:
+                articles += json.load(f)
+            with open(os.path.join(directory, 'llm.json')) as f:
+                answers.update(json.load(f))
+            close = pd.read_parquet(os.path.join(directory, 'prices.parquet'))['Close']
+            returns.append(np.log(close).diff().dropna().to_numpy())
+        except (OSError, ValueError, KeyError):
+            continue
+
+    if not articles:
+        return None
+    return {'articles': articles, 'answers': answers, 'log_returns': np.concatenate(returns) if returns else None}
+
+def synthetic_articles(n, rng, fixtures=None, ticker="AAPL", syndication_rate=0.1):
+    """n NewsAPI-shaped articles: resampled recordings when available, otherwise built from templates.
+    Random vocabulary keeps stories distinct; syndication_rate of them are wire copies under another outlet"""
+    now = datetime.now(timezone.utc)
+    vocabulary = [f"w{i:04d}" for i in range(5000)]
+    recorded = fixtures['articles'] if fixtures else None
+
+    articles = []
+    for i in range(n):
+        if articles and rng.random() < syndication_rate:
+            original = articles[int(rng.integers(len(articles)))]
+            articles.append({**original, 'source': {'id': None, 'name': SOURCES[int(rng.integers(len(SOURCES)))]},
+                             'url': f"https://example.com/{ticker}/{i}"})
+            continue
+
+        words = " ".join(rng.choice(vocabulary, size=3))
+        if recorded:
+            base = recorded[int(rng.integers(len(recorded)))]
+            title, description = f"{base['title']} {words}", base.get('description') or ''
+        else:
+            title = TITLE_TEMPLATES[int(rng.integers(len(TITLE_TEMPLATES)))].format(
+                company=COMPANIES.get(ticker, ticker), fund=f"Fund {words.split()[0]}", other=f"Partner {words.split()[1]}",
+                shares=int(rng.integers(10, 5000)), pct=int(rng.integers(1, 40)), quarter=int(rng.integers(1, 5)), word=words
+            )
+            description = f"{COMPANIES.get(ticker, ticker)} ({ticker}) {words} update for investors."
+
+        articles.append({
+            'source': {'id': None, 'name': SOURCES[int(rng.integers(len(SOURCES)))]},
+            'author': None,
+            'title': title,
+            'description': description,
+            'url': f"https://example.com/{ticker}/{i}",
+            'publishedAt': (now - timedelta(minutes=int(rng.integers(0, 5 * 24 * 60)))).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'content': None
+        })
+    return articles
+
+def synthetic_prices(n, rng, fixtures=None, freq='h'):
+    """n rows of OHLCV; bootstraps recorded daily log returns when available"""
+    if fixtures and fixtures.get('log_returns') is not None and len(fixtures['log_returns']):
+        log_returns = rng.choice(fixtures['log_returns'], size=n)
+    else:
+        log_returns = rng.normal(0.0003, 0.015, size=n)
+    close = 100 * np.exp(np.cumsum(log_returns))
+    index = pd.date_range(end=pd.Timestamp.now().normalize(), periods=n, freq=freq)
+    return pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                         'Volume': rng.integers(1_000_000, 5_000_000, size=n)}, index=index)
+
+def synthetic_analyses(n, rng):
+    sentiment = rng.uniform(-1, 1, size=n)
+    confidence = rng.uniform(0.3, 0.95, size=n)
+    signals = np.where(sentiment > 0.2, 'BUY', np.where(sentiment < -0.2, 'SELL', 'HOLD'))
+    relevance = rng.choice(['HIGH', 'MEDIUM', 'LOW'], size=n)
+    weights = rng.uniform(0.4, 1.5, size=n)
+    return [{'sentiment': float(s), 'confidence': float(c), 'signal': str(g), 'relevance': str(r), 'quality_weight': float(w)}
+            for s, c, g, r, w in zip(sentiment, confidence, signals, relevance, weights)]
+
+# Each benchmark: setup(n, rng, fixtures) builds untimed inputs; run(state) does the timed work and
+# returns the number of rows it processed
+def setup_filter(n, rng, fixtures):
+    return {'filter': NewsFilter(), 'articles': synthetic_articles(n, rng, fixtures)}
+
+def setup_parse(n, rng, fixtures):
+    stub = StubOpenAI(fixtures['answers'] if fixtures else None)
+    articles = synthetic_articles(n, rng, fixtures)
+    texts = [stub.answer(f"{a['title']}. {a.get('description', '')}") for a in articles]
+    return {'analyzer': AdvancedAnalyzer(use_cache=False, offline=True), 'texts': texts, 'articles': articles}
+
+def setup_aggregate(n, rng, fixtures):
+    analyses = synthetic_analyses(n, rng)
+    start = time.time() - n * 60
+    return {'analyses': analyses, 'times': [start + i * 60 for i in range(n)]}
+
+def setup_risk(n, rng, fixtures):
+    return {'analyzer': AdvancedAnalyzer(use_cache=False, offline=True), 'analyses': synthetic_analyses(n, rng),
+            'price_data': {'current_price': 101.0, 'week_ago_price': 100.0, 'price_change_percent': 1.0, 'direction': 'up'}}
+
+def setup_realistic(n, rng, fixtures):
+    # The stub ignores the date window, so the simulation sees all n price rows
+    return {'backtester': RealisticBacktester(StubPriceStore({'AAPL': synthetic_prices(n, rng, fixtures)})), 'rows': n}
+
+def setup_historical(n, rng, fixtures):
+    tickers = list(COMPANIES)
+    end = pd.Timestamp.now(tz='UTC').normalize()
+    start = end - pd.Timedelta(days=365)
+    published = start + pd.to_timedelta(np.sort(rng.uniform(0, 365 * 86400, size=n)), unit='s')
+    sentiment = rng.uniform(-1, 1, size=n)
+    scores = pd.DataFrame({
+        'ticker': rng.choice(tickers, size=n),
+        'article_id': [f"{i:016x}" for i in range(n)],
+        'published_at': published,
+        'source': rng.choice(SOURCES, size=n),
+        'title': '',
+        'credibility_score': rng.choice([0.3, 0.7, 1.0], size=n),
+        'relevance_score': rng.uniform(0, 1, size=n),
+        'quality_score': rng.uniform(0.4, 1, size=n),
+        'model': MODEL,
+        'sentiment': sentiment,
+        'confidence': rng.uniform(0.3, 0.95, size=n),
+        'signal': np.where(sentiment > 0.2, 'BUY', np.where(sentiment < -0.2, 'SELL', 'HOLD')),
+        'relevance': rng.choice(['HIGH', 'MEDIUM', 'LOW'], size=n),
+        'cluster_size': rng.integers(1, 4, size=n)
+    }).sort_values(['ticker', 'published_at'], kind='stable').reset_index(drop=True)
+    frames = {t: synthetic_prices(400, rng, fixtures, freq='B') for t in tickers}
+    return {'backtester': HistoricalBacktester(store=StubArticleStore(scores), price_store=StubPriceStore(frames)),
+            'tickers': tickers, 'start': (start + pd.Timedelta(days=5)).to_pydatetime(), 'end': end.to_pydatetime(),
+            'rows': n}
+
+def setup_end_to_end(n, rng, fixtures):
+    state_dir = tempfile.mkdtemp(prefix='benchmark-')
+    collector = NewsCollector(state_path=os.path.join(state_dir, 'news_state.json'))
+    collector.newsapi = StubNewsApi(synthetic_articles(n, rng, fixtures))
+    collector.state['company_names']['AAPL'] = COMPANIES['AAPL']
+    analyzer = AdvancedAnalyzer(use_cache=False, collector=collector)
+    analyzer.client = StubOpenAI(fixtures['answers'] if fixtures else None)
+    # Every article goes through the (stubbed) LLM path, whatever LOCAL_SCORER says
+    analyzer.local_scorer = None
+    return {'analyzer': analyzer, 'rows': n}
+
+def run_filter(state):
+    state['filter'].filter_and_rank_articles(state['articles'], 'AAPL')
+    return len(state['articles'])
+
+def run_filter_batch(state):
+    state['filter'].filter_and_rank_articles_batch(state['articles'], 'AAPL')
+    return len(state['articles'])
+
+def run_parse(state):
+    for text, article in zip(state['texts'], state['articles']):
+        state['analyzer'].parse_analysis(text, article)
+    return len(state['texts'])
+
+def run_aggregate(state):
+    aggregator = SentimentAggregator(window_hours=24, half_life_hours=6)
+    for analysis, published_at in zip(state['analyses'], state['times']):
+        aggregator.add(analysis, published_at)
+        aggregator.expire(published_at)
+    return len(state['analyses'])
+
+def run_risk(state):
+    state['analyzer'].calculate_risk_metrics(state['analyses'], state['price_data'])
+    return len(state['analyses'])
+
+def run_realistic(state):
+    state['backtester'].simulate_algorithm_performance('AAPL', seed=42)
+    return state['rows']
+
+def run_historical(state):
+    state['backtester'].run(state['tickers'], state['start'], state['end'])
+    return state['rows']
+
+def run_end_to_end(state):
+    state['analyzer'].analyze_stock_sentiment('AAPL')
+    return state['rows']
+
+BENCHMARKS = {
+    # name: (setup, run, min_rows, max_rows); the per-article filter and the live pipeline are capped
+    # where a single run would take minutes
+    'filter_per_article': (setup_filter, run_filter, 10, 100_000),
+    'filter_batch': (setup_filter, run_filter_batch, 10, 1_000_000),
+    'parse_analysis': (setup_parse, run_parse, 10, 1_000_000),
+    'aggregate_incremental': (setup_aggregate, run_aggregate, 10, 1_000_000),
+    'risk_metrics': (setup_risk, run_risk, 10, 1_000_000),
+    'realistic_backtest': (setup_realistic, run_realistic, 100, 1_000_000),
+    'historical_backtest': (setup_historical, run_historical, 10, 1_000_000),
+    'end_to_end_sentiment': (setup_end_to_end, run_end_to_end, 10, 10_000)
+}
+
+def teardown(state):
+    """Release what a setup started (the analyzer's worker threads), so cases do not pile up idle threads"""
+    for value in state.values():
+        if isinstance(value, AdvancedAnalyzer):
+            value.close()
+
+def measure(name, n, repeat, seed):
+    """Time `repeat` runs (fresh inputs each), then one more under tracemalloc for peak memory"""
+    setup, run, _, _ = BENCHMARKS[name]
+    latencies = []
+    rows = 0
+    with open(os.devnull, 'w') as devnull:
+        for i in range(repeat):
+            with contextlib.redirect_stdout(devnull):
+                state = setup(n, np.random.default_rng([seed, i]), FIXTURES)
+                try:
+                    started = time.perf_counter()
+                    rows = run(state)
+                    latencies.append(time.perf_counter() - started)
+                finally:
+                    teardown(state)
+
+        with contextlib.redirect_stdout(devnull):
+            state = setup(n, np.random.default_rng([seed, repeat]), FIXTURES)
+            try:
+                tracemalloc.start()
+                run(state)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+                teardown(state)
+
+    # Tail percentiles from one or two runs would just repeat the max, so they are left out
+    latencies_ms = np.array(latencies) * 1000
+    tail = repeat >= MIN_REPEATS_FOR_PERCENTILES
+    return {
+        'benchmark': name,
+        'rows': n,
+        'repeats': repeat,
+        'throughput_rows_per_s': rows / float(np.median(latencies)),
+        'latency_ms': {
+            'min': float(latencies_ms.min()),
+            'p50': float(np.percentile(latencies_ms, 50)),
+            'p95': float(np.percentile(latencies_ms, 95)) if tail else None,
+            'p99': float(np.percentile(latencies_ms, 99)) if tail else None,
+            'max': float(latencies_ms.max())
+        },
+        'peak_memory_mb': peak / 2**20
+    }
+
+def git_revision():
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        return revision + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """Print throughput changes against a baseline run; returns the regressions beyond threshold"""
+    previous = {(r['benchmark'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    print(f"\n📊 COMPARED WITH {baseline['label']} ({baseline['revision']}):")
+    for result in current['results']:
+        before = previous.get((result['benchmark'], result['rows']))
+        if not before:
+            continue
+        change = result['throughput_rows_per_s'] / before['throughput_rows_per_s'] - 1
+        status = "❌" if change < -threshold else "✅" if change > threshold else "  "
+        print(f"{status} {result['benchmark']:22} {result['rows']:>9,} rows  {change:+7.1%} throughput  "
+              f"p50 {before['latency_ms']['p50']:9.1f} → {result['latency_ms']['p50']:9.1f}ms  "
+              f"peak {before['peak_memory_mb']:7.1f} → {result['peak_memory_mb']:7.1f}MB")
+        if change < -threshold:
+            regressions.append(result)
+    return regressions
+
+FIXTURES = None
+
+# Run it
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Offline pipeline benchmarks. Inputs are built-in synthetic data unless fixtures have been "
+                    "recorded into benchmarks/fixtures/ with --record (none ship with the repository)"
+    )
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help="Comma-separated row counts")
+    parser.add_argument('--only', help="Comma-separated benchmark names (default: all)")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per size (1 above 100k rows)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--label', help="Name for the stored results (default: git revision)")
+    parser.add_argument('--compare', help="Baseline results label or JSON path to compare against")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help="Throughput drop flagged as a regression")
+    parser.add_argument('--record', metavar='TICKER', help="Record live NewsAPI, OpenAI and Yahoo responses for TICKER "
+                        "(needs API keys) as fixtures that later runs replay instead of synthetic data, and exit")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures(args.record.upper())
+        sys.exit(0)
+
+    FIXTURES = load_fixtures()
+    print(f"Fixtures: {'recorded (' + str(len(FIXTURES['articles'])) + ' articles)' if FIXTURES else 'built-in synthetic'}")
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    revision = git_revision()
+    label = args.label or revision
+
+    results = []
+    for name in names:
+        _, _, min_rows, max_rows = BENCHMARKS[name]
+        for n in sizes:
+            if not min_rows <= n <= max_rows:
+                continue
+            result = measure(name, n, args.repeat if n <= 100_000 else 1, args.seed)
+            results.append(result)
+            p95 = result['latency_ms']['p95']
+            print(f"⏱️  {name:22} {n:>9,} rows  {result['throughput_rows_per_s']:>12,.0f} rows/s  "
+                  f"p50 {result['latency_ms']['p50']:9.1f}ms  p95 {f'{p95:9.1f}ms' if p95 is not None else '      n/a  '}  "
+                  f"peak {result['peak_memory_mb']:7.1f}MB")
+
+    run = {
+        'label': label,
+        'revision': revision,
+        'created_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'fixtures': 'recorded' if FIXTURES else 'synthetic',
+        'seed': args.seed,
+        'results': results
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{label}.json")
+    with open(path, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"\n✅ Results saved to {path}")
+
+    if args.compare:
+        baseline_path = args.compare if args.compare.endswith('.json') else os.path.join(RESULTS_DIR, f"{args.compare}.json")
+        with open(baseline_path) as f:
+            regressions = compare(run, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
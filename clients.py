@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import threading
+import subprocess
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Long-lived clients shared by everything in the process. The heavy SDKs (openai ~0.6s, newsapi/requests ~0.1s)
+# are imported the first time a client is asked for, not when a module that might use one is imported
+_clients = {}
+# Re-entrant: building one client may ask for another (the NewsAPI client needs the HTTP session)
+_lock = threading.RLock()
+
+HTTP_POOL_SIZE = 20
+
+# Replay mode: with MOCK_SERVER_URL set (see mock_server.py), requests for these hosts go to the local
+# stand-in instead, paths unchanged. Read when a client is built, so reset_clients() picks up changes
+REPLAYED_HOSTS = ['https://newsapi.org', 'https://api.openai.com', 'https://query1.finance.yahoo.com',
+                  'https://query2.finance.yahoo.com']
+
+def mock_server_url():
+    """Base URL of the local mock server when replay mode is on, else None"""
+    return os.getenv('MOCK_SERVER_URL', '').rstrip('/') or None
+
+def _get_or_create(name, factory):
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+    return client
+
+def get_http_session():
+    """Pooled requests.Session for every outbound HTTP call (NewsAPI and friends)"""
+    def build():
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        base_url = mock_server_url()
+        if base_url:
+            # requests picks the longest matching prefix, so only the replayed hosts are rewritten
+            replay = _replay_adapter(base_url)
+            for host in REPLAYED_HOSTS:
+                session.mount(host, replay)
+        return session
+    return _get_or_create('http_session', build)
+
+def get_openai_client():
+    """The process-wide OpenAI client"""
+    def build():
+        from openai import OpenAI
+        # Retries are handled by resilient_llm.ResilientLLM, so the SDK's own are turned off
+        base_url = mock_server_url()
+        if base_url:
+            return OpenAI(api_key=os.getenv('OPENAI_API_KEY') or 'replay', base_url=f"{base_url}/v1", max_retries=0)
+        return OpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0)
+    return _get_or_create('openai', build)
+
+def get_newsapi_client():
+    """The process-wide NewsApiClient, on the shared HTTP session"""
+    def build():
+        api_key = os.getenv('NEWS_API_KEY') or ('replay' if mock_server_url() else None)
+        if not api_key:
+            raise Exception("NEWS_API_KEY not found in .env file")
+        from newsapi import NewsApiClient
+        return NewsApiClient(api_key=api_key, session=get_http_session())
+    return _get_or_create('newsapi', build)
+
+def _replay_adapter(base_url):
+    """Transport adapter that sends each request to base_url, keeping its path and query"""
+    from urllib.parse import urlsplit
+    from requests.adapters import HTTPAdapter
+
+    class ReplayAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            parts = urlsplit(request.url)
+            request.url = base_url + parts.path + (f"?{parts.query}" if parts.query else '')
+            return super().send(request, **kwargs)
+
+    return ReplayAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+
+def reset_clients():
+    """Forget every client, e.g. in a forked worker or after changing API keys"""
+    with _lock:
+        _clients.clear()
+
+# Test it
+if __name__ == "__main__":
+    # Cold start: fresh interpreter, import the analyzer and build it, no network calls
+    COLD_START_BUDGET_SECONDS = 0.6
+    probe = ("import time; started = time.perf_counter(); import advanced_analyzer; "
+             "advanced_analyzer.AdvancedAnalyzer(); print(time.perf_counter() - started)")
+
+    timings = []
+    for _ in range(3):
+        output = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+
+    cold_start = min(timings)
+    status = "✅" if cold_start <= COLD_START_BUDGET_SECONDS else "❌"
+    print(f"{status} Cold start (import + construct AdvancedAnalyzer): {cold_start:.2f}s "
+          f"(budget {COLD_START_BUDGET_SECONDS:.2f}s)")
+
+    started = time.perf_counter()
+    get_openai_client()
+    print(f"First OpenAI client: {time.perf_counter() - started:.2f}s, "
+          f"same client on reuse: {get_openai_client() is get_openai_client()}")
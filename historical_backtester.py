@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from article_store import ArticleStore, one_analysis_per_article
+from price_store import PriceStore
+
+class HistoricalBacktester:
+    def __init__(self, store=None, price_store=None, lookback_days=5, horizon_days=7, threshold=0.2):
+        # Scores come from the local article store, so no news or LLM calls are made here
+        self.store = store or ArticleStore()
+        self.price_store = price_store or PriceStore()
+
+        # Same windows as the live pipeline: 5 days of news, 7-day forward return, ±0.2 signal threshold
+        self.lookback = pd.Timedelta(days=lookback_days)
+        self.horizon = pd.Timedelta(days=horizon_days)
+        self.threshold = threshold
+
+    def aggregate_sentiment(self, scores, as_of):
+        """Quality-weighted sentiment per as-of date from the articles in each date's lookback window
+
+        scores: one ticker's rows from ArticleStore.get_scored_window, sorted by published_at.
+        Returns (weighted sentiment, article count) arrays aligned with as_of (NaN where no news).
+        """
+        published = scores['published_at'].to_numpy(dtype='datetime64[ns]')
+        as_of = as_of.to_numpy(dtype='datetime64[ns]')
+
+        # Each date's window is a contiguous slice [lo, hi) of the time-sorted articles
+        lo = np.searchsorted(published, as_of - self.lookback.to_timedelta64(), side='left')
+        hi = np.searchsorted(published, as_of, side='left')
+        counts = hi - lo
+
+        # Expand to one (date, article) pair per article in each window
+        date_idx = np.repeat(np.arange(len(as_of)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        article_idx = np.repeat(lo, counts) + offsets
+
+        # Point-in-time quality: the time weight is measured from the as-of date, not from when we fetched
+        hours_ago = (as_of[date_idx] - published[article_idx]) / np.timedelta64(1, 'h')
+        time_weight = np.maximum(0.1, 1.0 - hours_ago / 72)
+        quality = (scores['credibility_score'].to_numpy()[article_idx] * 0.4 +
+                   scores['relevance_score'].to_numpy()[article_idx] * 0.4 +
+                   time_weight * 0.2)
+
+        # Same quality cut and syndication weighting as analyze_stock_sentiment
+        keep = quality > 0.4
+        cluster_weight = 1.0 + np.log(scores['cluster_size'].to_numpy()[article_idx])
+        weight = np.where(keep, quality * cluster_weight, 0.0)
+        sentiment = scores['sentiment'].to_numpy()[article_idx]
+
+        total_weight = np.bincount(date_idx, weights=weight, minlength=len(as_of))
+        weighted_sum = np.bincount(date_idx, weights=weight * sentiment, minlength=len(as_of))
+        article_count = np.bincount(date_idx, weights=keep.astype(float), minlength=len(as_of)).astype(int)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weighted_sentiment = np.where(total_weight > 0, weighted_sum / total_weight, np.nan)
+        return weighted_sentiment, article_count
+
+    def forward_returns(self, prices, as_of):
+        """Return (%) from the first close on/after each date to the last close before date + horizon"""
+        if prices is None or prices.empty:
+            return np.full(len(as_of), np.nan)
+
+        days = prices.index.to_numpy(dtype='datetime64[ns]')
+        close = prices['Close'].to_numpy()
+        dates = as_of.tz_localize(None).normalize().to_numpy(dtype='datetime64[ns]')
+
+        entry = np.searchsorted(days, dates, side='left')
+        exit_ = np.searchsorted(days, dates + self.horizon.to_timedelta64(), side='left') - 1
+
+        # Need at least two closes inside the window, like Backtester.backtest_single_date
+        valid = (entry < len(days)) & (exit_ > entry)
+        entry_price = close[np.minimum(entry, len(days) - 1)]
+        exit_price = close[np.clip(exit_, 0, len(days) - 1)]
+        return np.where(valid, (exit_price - entry_price) / entry_price * 100, np.nan)
+
+    def run(self, tickers, start_date, end_date, freq='B'):
+        """Backtest every ticker on every `freq` date in [start_date, end_date] from stored scores"""
+        print(f"\n📼 POINT-IN-TIME BACKTEST: {len(tickers)} tickers, "
+              f"{pd.Timestamp(start_date):%Y-%m-%d} → {pd.Timestamp(end_date):%Y-%m-%d}")
+
+        as_of = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize(),
+                              freq=freq, tz='UTC')
+        if as_of.empty:
+            print("❌ No backtest dates between start and end")
+            results = pd.DataFrame(columns=['date', 'ticker', 'ai_sentiment', 'articles', 'forward_return',
+                                            'signal', 'position', 'correct'])
+            return {'summary': self.summarize(results), 'results': results}
+
+        window_start = as_of[0] - self.lookback
+        scores = self.store.get_scored_window(tickers, window_start.to_pydatetime(), as_of[-1].to_pydatetime())
+
+        # Each article counts once, however many models scored it
+        scores = one_analysis_per_article(scores)
+        print(f"Loaded {len(scores)} stored article scores")
+
+        # One bulk price download (or cache read) for every ticker and the full horizon
+        price_end = (as_of[-1] + self.horizon + pd.Timedelta(days=1)).tz_localize(None)
+        self.price_store.prefetch(tickers, as_of[0].tz_localize(None), price_end)
+
+        frames = []
+        grouped = dict(tuple(scores.groupby('ticker')))
+        for ticker in tickers:
+            ticker_scores = grouped.get(ticker, scores.iloc[0:0])
+            sentiment, article_count = self.aggregate_sentiment(ticker_scores, as_of)
+            prices = self.price_store.get_history(ticker, as_of[0].tz_localize(None), price_end)
+
+            frames.append(pd.DataFrame({
+                'date': as_of.tz_localize(None),
+                'ticker': ticker,
+                'ai_sentiment': sentiment,
+                'articles': article_count,
+                'forward_return': self.forward_returns(prices, as_of)
+            }))
+
+        results = pd.concat(frames, ignore_index=True)
+
+        # Signals, positions and correctness for every (date, ticker) at once
+        sentiment = results['ai_sentiment'].to_numpy()
+        results['signal'] = np.select([sentiment > self.threshold, sentiment < -self.threshold], ['BUY', 'SELL'], 'HOLD')
+        results['position'] = np.select([results['signal'] == 'BUY', results['signal'] == 'SELL'], [1, -1], 0)
+        market_up = results['forward_return'] > 0
+        results['correct'] = ((results['signal'] == 'BUY') & market_up) | ((results['signal'] == 'SELL') & ~market_up)
+
+        return {'summary': self.summarize(results), 'results': results}
+
+    def summarize(self, results):
+        """Hit rate, mean forward return per signal and turnover"""
+        evaluated = results.dropna(subset=['forward_return'])
+        directional = evaluated[evaluated['signal'] != 'HOLD']
+        hit_rate = directional['correct'].mean() * 100 if len(directional) else float('nan')
+
+        mean_return = evaluated.groupby('signal')['forward_return'].mean().to_dict()
+        signal_counts = evaluated['signal'].value_counts().to_dict()
+
+        # Average absolute position change between consecutive dates, per ticker
+        position_changes = results.groupby('ticker')['position'].diff().abs()
+        turnover = position_changes.mean() if position_changes.notna().any() else 0.0
+
+        summary = {
+            'observations': len(evaluated),
+            'hit_rate': hit_rate,
+            'mean_forward_return': mean_return,
+            'signal_counts': signal_counts,
+            'turnover': turnover
+        }
+
+        print(f"\n🎯 POINT-IN-TIME RESULTS:")
+        print(f"Observations: {summary['observations']}")
+        print(f"Hit Rate (BUY/SELL): {hit_rate:.1f}%")
+        for signal in ['BUY', 'SELL', 'HOLD']:
+            if signal in mean_return:
+                print(f"{signal}: {signal_counts[signal]} signals, mean forward return {mean_return[signal]:+.2f}%")
+        print(f"Turnover: {turnover:.2f} position change per day")
+
+        return summary
+
+# Test it
+if __name__ == "__main__":
+    backtester = HistoricalBacktester()
+
+    end = datetime.now() - timedelta(days=8)
+    start = end - timedelta(days=60)
+    output = backtester.run(["AAPL", "MSFT", "NVDA"], start, end)
+
+    print("\n=== LAST 5 SIGNALS ===")
+    print(output['results'].dropna(subset=['ai_sentiment']).tail().to_string())
@@ -1,12 +1,36 @@
-import os
-from openai import OpenAI
+import re
 from dotenv import load_dotenv
+from llm_cache import LLMCache
+from clients import get_openai_client
+from resilient_llm import ResilientLLM
 
 load_dotenv()
 
+MODEL = "gpt-4o-mini"
+
+SENTIMENT_PROMPT = """
+            Is this financial news positive, negative, or neutral for the stock?
+            
+            News: {article_text}
+            
+            Just respond with one word: positive, negative, or neutral
+            """
+
+BATCH_SENTIMENT_PROMPT = """
+            Is each numbered financial news item below positive, negative, or neutral for the stock?
+            
+            {numbered_articles}
+            
+            Respond with one line per item in the form "number: word", where word is positive, negative, or neutral
+            """
+
 class LLMAnalyzer:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    def __init__(self, use_cache=True):
+        # Shared with every other analyzer in the process
+        self.client = get_openai_client()
+        # Retries, throttling and circuit breaking around every request (see resilient_llm.py)
+        self.llm = ResilientLLM(lambda: self.client)
+        self.cache = LLMCache() if use_cache else None
         print("✅ LLM Analyzer ready")
     
     def analyze_article(self, article):
@@ -14,21 +38,26 @@ class LLMAnalyzer:
         try:
             article_text = f"{article['title']}. {article.get('description', '')}"
             
-            prompt = f"""
-            Is this financial news positive, negative, or neutral for the stock?
+            prompt = SENTIMENT_PROMPT.format(article_text=article_text)
             
-            News: {article_text}
+            # No temperature is sent, so the key records the API default
+            cache_key = None
+            if self.cache:
+                cache_key = self.cache.make_key(MODEL, SENTIMENT_PROMPT, None, article_text)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    print(f"✅ Article sentiment (cached): {cached}")
+                    return cached
             
-            Just respond with one word: positive, negative, or neutral
-            """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+            response = self.llm.create(
+                model=MODEL,
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=10
             )
             
             sentiment = response.choices[0].message.content.strip().lower()
+            if cache_key:
+                self.cache.set(cache_key, sentiment)
             print(f"✅ Article sentiment: {sentiment}")
             return sentiment
             
@@ -36,6 +65,53 @@ class LLMAnalyzer:
             print(f"❌ Error: {e}")
             return "error"
 
+    def analyze_articles(self, articles):
+        """Analyze several articles in one request, retrying missing or unparseable items one by one"""
+        article_texts = [f"{a['title']}. {a.get('description', '')}" for a in articles]
+        results = [None] * len(articles)
+        
+        pending = []
+        cache_keys = [None] * len(articles)
+        for i, article_text in enumerate(article_texts):
+            if self.cache:
+                cache_keys[i] = self.cache.make_key(MODEL, BATCH_SENTIMENT_PROMPT, None, article_text)
+                results[i] = self.cache.get(cache_keys[i])
+            if results[i] is None:
+                pending.append(i)
+        
+        if len(pending) > 1:
+            try:
+                numbered_articles = "\n".join(
+                    f"{n}. {article_texts[i]}" for n, i in enumerate(pending, start=1)
+                )
+                response = self.llm.create(
+                    model=MODEL,
+                    messages=[{"role": "user", "content": BATCH_SENTIMENT_PROMPT.format(numbered_articles=numbered_articles)}],
+                    max_tokens=10 * len(pending)
+                )
+                text = response.choices[0].message.content.strip().lower()
+                
+                answers = dict(re.findall(r'^\s*(\d+)\s*[:.)-]\s*(positive|negative|neutral)\b', text, flags=re.MULTILINE))
+                for n, i in enumerate(pending, start=1):
+                    sentiment = answers.get(str(n))
+                    if sentiment:
+                        results[i] = sentiment
+                        if cache_keys[i]:
+                            self.cache.set(cache_keys[i], sentiment)
+                
+            except Exception as e:
+                print(f"❌ Batch error: {e}")
+                # The request itself failed; sending each item on its own would repeat it once per article
+                return ["error" if result is None else result for result in results]
+        
+        # Anything the batch answered without a clean line gets its own request
+        for i in range(len(articles)):
+            if results[i] is None:
+                results[i] = self.analyze_article(articles[i])
+        
+        print(f"✅ Batch sentiments: {results}")
+        return results
+
 # Simple test
 if __name__ == "__main__":
     analyzer = LLMAnalyzer()
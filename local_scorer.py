@@ -0,0 +1,158 @@
+import os
+import re
+import csv
+from typing import Dict, Optional
+
+# Any object with a `name` and a score(article) -> analysis (or None) method can serve as the local tier;
+# analyses use the same fields as AdvancedAnalyzer.parse_analysis, plus 'scorer' naming the model
+
+# Compact finance word lists in the spirit of Loughran-McDonald (pass the full dictionary CSV for coverage)
+POSITIVE_WORDS = {
+    'beat', 'beats', 'exceed', 'exceeded', 'exceeds', 'surge', 'surged', 'surges', 'soar', 'soared', 'soars',
+    'gain', 'gained', 'gains', 'growth', 'grew', 'strong', 'stronger', 'strongest', 'record', 'profitable',
+    'profitability', 'upgrade', 'upgraded', 'upgrades', 'outperform', 'outperformed', 'raise', 'raised', 'raises',
+    'rally', 'rallied', 'boost', 'boosted', 'boosts', 'improve', 'improved', 'improvement', 'improves',
+    'success', 'successful', 'win', 'wins', 'won', 'breakthrough', 'expand', 'expanded', 'expansion',
+    'rebound', 'rebounded', 'jump', 'jumped', 'jumps', 'bullish', 'robust', 'accelerate', 'accelerated',
+    'approval', 'approved', 'dividend', 'buyback', 'optimistic', 'upbeat', 'tops', 'topped'
+}
+
+NEGATIVE_WORDS = {
+    'miss', 'missed', 'misses', 'plunge', 'plunged', 'plunges', 'fall', 'fell', 'falls', 'drop', 'dropped',
+    'drops', 'decline', 'declined', 'declines', 'loss', 'losses', 'weak', 'weaker', 'weakness', 'downgrade',
+    'downgraded', 'downgrades', 'underperform', 'underperformed', 'cut', 'cuts', 'lawsuit', 'sued', 'probe',
+    'investigation', 'fraud', 'recall', 'recalls', 'recalled', 'layoff', 'layoffs', 'slump', 'slumped',
+    'slowdown', 'bearish', 'warn', 'warned', 'warning', 'warns', 'tumble', 'tumbled', 'sink', 'sank',
+    'delay', 'delayed', 'fined', 'penalty', 'bankruptcy', 'default', 'halt', 'halted', 'crash',
+    'concern', 'concerns', 'disappointing', 'disappoint', 'disappointed', 'lowered', 'shortfall'
+}
+
+UNCERTAINTY_WORDS = {
+    'may', 'might', 'could', 'possibly', 'uncertain', 'uncertainty', 'rumor', 'rumors', 'reportedly',
+    'speculation', 'speculate', 'unclear', 'volatile', 'volatility', 'risk', 'risks', 'pending'
+}
+
+NEGATIONS = {'not', 'no', 'never', 'without', "n't", 'nor', 'neither', 'none', 'barely'}
+
+# Routine holdings filings ("X sells 145 shares of AAPL") carry no view on the company. Ambiguous words
+# ('fine', 'top', 'lower', 'expected') are left out of the word lists above: they are as often neutral as not
+ROUTINE_PATTERNS = [
+    re.compile(r'\b(?:buys|sells|acquires|purchases|trims|boosts|lowers|raises|cuts)\s+[\d,]+\s+shares\b', re.IGNORECASE),
+    re.compile(r'\b(?:stake|position|holdings?)\s+in\b.*\bby\s+[\d,]+\s+shares\b', re.IGNORECASE),
+    re.compile(r'\bshares\s+(?:sold|bought|acquired|purchased)\s+by\b', re.IGNORECASE),
+    re.compile(r'\b13[fF]\b|\bform\s+4\b', re.IGNORECASE)
+]
+
+# Percentages, dollar amounts and deal words mean a stake change is news, not a filing
+MATERIAL_PATTERN = re.compile(
+    r'%|\$|\b(?:percent|million|billion|acquisition|merger|takeover|buyout)\b|\bacquir(?:e|es|ed|ing)\b(?!\s+[\d,]+\s+shares)',
+    re.IGNORECASE
+)
+
+class LexiconScorer:
+    name = 'lexicon'
+
+    def __init__(self, positive=None, negative=None, uncertainty=None, negation_window=3, verbose=True):
+        self.positive = set(positive or POSITIVE_WORDS)
+        self.negative = set(negative or NEGATIVE_WORDS)
+        self.uncertainty = set(uncertainty or UNCERTAINTY_WORDS)
+
+        # A negation up to this many words before a sentiment word flips it ("did not beat")
+        self.negation_window = negation_window
+        if verbose:
+            print("✅ Lexicon scorer ready")
+
+    @classmethod
+    def from_loughran_mcdonald(cls, path, **kwargs):
+        """Load word lists from the Loughran-McDonald master dictionary CSV (non-zero column = member)"""
+        positive, negative, uncertainty = set(), set(), set()
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                word = row['Word'].lower()
+                if row.get('Positive', '0') not in ('', '0'):
+                    positive.add(word)
+                if row.get('Negative', '0') not in ('', '0'):
+                    negative.add(word)
+                if row.get('Uncertainty', '0') not in ('', '0'):
+                    uncertainty.add(word)
+        return cls(positive, negative, uncertainty, **kwargs)
+
+    def score(self, article: Dict) -> Optional[Dict]:
+        """Score an article with the lexicon; confidence reflects how much clear, one-sided evidence it has"""
+        text = f"{article['title']}. {article.get('description') or ''}"
+
+        if any(pattern.search(text) for pattern in ROUTINE_PATTERNS) and not MATERIAL_PATTERN.search(text):
+            return {
+                'sentiment': 0.0,
+                'confidence': 0.9,
+                'signal': 'HOLD',
+                'reason': "Routine holdings or trading filing, no view on the company",
+                'relevance': 'LOW',
+                'title': article['title'],
+                'scorer': self.name
+            }
+
+        words = re.findall(r"[a-z]+(?:'[a-z]+)?|n't", text.lower())
+        positive, negative, uncertain = [], [], 0
+        for i, word in enumerate(words):
+            if word in self.uncertainty:
+                uncertain += 1
+            polarity = 1 if word in self.positive else -1 if word in self.negative else 0
+            if not polarity:
+                continue
+            window = words[max(0, i - self.negation_window):i]
+            if any(w in NEGATIONS or w.endswith("n't") for w in window):
+                polarity = -polarity
+            (positive if polarity > 0 else negative).append(word)
+
+        hits = len(positive) + len(negative)
+        sentiment = (len(positive) - len(negative)) / (hits + 1)
+
+        # More hits and a one-sided balance raise confidence; hedging words lower it
+        agreement = abs(len(positive) - len(negative)) / hits if hits else 0.0
+        confidence = min(0.95, 0.2 + 0.15 * hits) * agreement - 0.1 * uncertain
+        confidence = round(max(0.1, confidence), 2)
+
+        if sentiment > 0.3:
+            signal = 'BUY'
+        elif sentiment < -0.3:
+            signal = 'SELL'
+        else:
+            signal = 'HOLD'
+
+        terms = ', '.join(sorted(set(positive + negative))[:5]) or 'none'
+        return {
+            'sentiment': round(sentiment, 2),
+            'confidence': confidence,
+            'signal': signal,
+            'reason': f"Lexicon: {len(positive)} positive, {len(negative)} negative terms ({terms})",
+            'relevance': 'HIGH' if hits >= 3 else 'MEDIUM' if hits else 'LOW',
+            'title': article['title'],
+            'scorer': self.name
+        }
+
+def load_local_scorer(spec=None):
+    """Build the local tier from a spec: 'lexicon', a Loughran-McDonald CSV path, or None/'' for no local tier"""
+    spec = spec if spec is not None else os.getenv('LOCAL_SCORER', '')
+    if not spec:
+        return None
+    if spec == 'lexicon':
+        return LexiconScorer()
+    if spec.endswith('.csv'):
+        return LexiconScorer.from_loughran_mcdonald(spec)
+    raise ValueError(f"Unknown local scorer: {spec}")
+
+# Test it
+if __name__ == "__main__":
+    scorer = LexiconScorer()
+
+    headlines = [
+        "Vanguard Group Inc sells 145 shares of Apple Inc",
+        "Apple beats earnings expectations as iPhone revenue surges to a record",
+        "Tesla misses delivery estimates and cuts prices amid weak demand",
+        "Nvidia did not beat expectations, shares fall",
+        "Microsoft could announce a new AI partnership, sources say"
+    ]
+    for headline in headlines:
+        analysis = scorer.score({'title': headline, 'description': ''})
+        print(f"{analysis['sentiment']:+.2f} | {analysis['signal']} | conf {analysis['confidence']:.2f} | {headline}")
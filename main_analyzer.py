@@ -1,12 +1,12 @@
 from news_collector import NewsCollector
 from llm_analyzer import LLMAnalyzer
 
-def analyze_stock(ticker):
+def analyze_stock(ticker, collector=None, analyzer=None):
     """Get news for a stock and analyze each article"""
     print(f"\n=== ANALYZING {ticker} ===")
     
-    # Get news
-    collector = NewsCollector()
+    # Get news (pass a collector/analyzer in to reuse their clients across tickers)
+    collector = collector or NewsCollector()
     news = collector.get_stock_news(ticker, days=3)
     
     if not news:
@@ -14,7 +14,7 @@ def analyze_stock(ticker):
         return
     
     # Analyze each article
-    analyzer = LLMAnalyzer()
+    analyzer = analyzer or LLMAnalyzer()
     results = []
     
     for i, article in enumerate(news[:5]):  # Analyze first 5 articles
@@ -45,6 +45,14 @@ def analyze_stock(ticker):
     else:
         print("🟡 Overall sentiment: NEUTRAL")
 
+def analyze_stocks(tickers):
+    """Analyze several stocks, building the news and LLM clients only once"""
+    collector = NewsCollector()
+    analyzer = LLMAnalyzer()
+    
+    for ticker in tickers:
+        analyze_stock(ticker, collector=collector, analyzer=analyzer)
+
 if __name__ == "__main__":
     # Test with Apple
     analyze_stock("AAPL")
\ No newline at end of file
@@ -0,0 +1,432 @@
+import os
+import re
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from rate_limiter import TokenBucket
+
+# Stand-in for NewsAPI, OpenAI and Yahoo Finance on one local port. Point the pipeline at it with
+# MOCK_SERVER_URL=http://127.0.0.1:8765 (see clients.py); every request is answered from recorded
+# fixtures (benchmarks/fixtures/<TICKER>/, as written by `benchmark.py --record`) or synthesized on the fly
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures')
+SERVICES = ('news', 'openai', 'yahoo')
+
+# Synthetic history starts here, so every request sees the same price path for a ticker
+SYNTHETIC_PRICE_START = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+# Synthetic templates cover every filter branch (high-impact, company-specific, noise, routine filings)
+TITLE_TEMPLATES = [
+    "{company} beats quarterly earnings expectations as revenue grows {pct}% on {word} demand",
+    "{company} shares fall after the CEO cuts full-year guidance citing {word} costs",
+    "{fund} sells {shares} shares of {company}",
+    "Analyst says {company} could rally, price target raised on {word} outlook",
+    "{company} announces {word} partnership with {other} in quarterly update",
+    "Why {company} stock might be a buy according to Reddit {word} threads",
+    "{company} recall of {word} devices widens as regulators open probe",
+    "{company} dividend raised; Q{quarter} profit tops estimates on {word} sales"
+]
+SOURCES = ["Reuters", "Bloomberg", "CNBC", "Yahoo Finance", "Benzinga", "The Motley Fool", "Some Blog", "Newswire Today"]
+COMPANIES = {"AAPL": "Apple Inc", "MSFT": "Microsoft", "NVDA": "Nvidia", "TSLA": "Tesla", "GOOGL": "Alphabet"}
+
+def synthetic_answer(article_text):
+    """Deterministic analysis in ANALYSIS_PROMPT's format, derived from a hash of the article text"""
+    h = zlib.crc32(article_text.encode('utf-8'))
+    sentiment = (h % 201 - 100) / 100
+    signal = 'BUY' if sentiment > 0.2 else 'SELL' if sentiment < -0.2 else 'HOLD'
+    return (f"SENTIMENT: {sentiment:.2f}\nCONFIDENCE: {0.5 + (h >> 8) % 46 / 100:.2f}\nSIGNAL: {signal}\n"
+            f"REASON: Synthetic answer\nRELEVANCE: {['HIGH', 'MEDIUM', 'LOW'][(h >> 16) % 3]}")
+
+def per_service(value, cast=float):
+    """Parse "0.2" (every service) or "openai=0.8,news=0.2" (the rest 0) into {service: value}"""
+    if value is None:
+        return {}
+    if '=' not in value:
+        return {service: cast(value) for service in SERVICES}
+    settings = {}
+    for pair in value.split(','):
+        service, setting = pair.split('=', 1)
+        if service not in SERVICES:
+            raise ValueError(f"Unknown service {service!r} (expected one of {', '.join(SERVICES)})")
+        settings[service] = cast(setting)
+    return settings
+
+class MockServer:
+    def __init__(self, host='127.0.0.1', port=8765, fixtures_dir=DEFAULT_FIXTURES_DIR, latency=None, jitter=None,
+                 error_rate=None, rate_limit=None, article_interval=3600, max_results=None, seed=42):
+        # Per-service behaviour, each {service: value}: base latency and uniform jitter (seconds),
+        # fraction of requests failed with a 500, and requests per second before 429s (burst of one second)
+        self.latency = latency or {}
+        self.jitter = jitter or {}
+        self.error_rate = error_rate or {}
+        self.limiters = {service: TokenBucket(rate=rps, capacity=max(1.0, rps)) for service, rps in (rate_limit or {}).items()}
+
+        # Synthetic news: one article per ticker every article_interval seconds, so polls see new stories as
+        # time passes; max_results caps paging depth like NewsAPI's developer plan
+        self.article_interval = article_interval
+        self.max_results = max_results
+
+        self.fixtures_dir = fixtures_dir
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.recorded_news = {}
+        self.recorded_answers = {}
+        self.price_series = {}
+        self._load_fixtures()
+
+        # (service, status) -> responses sent
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+        self.host = host
+        self.port = port
+        self.server = None
+
+    def _load_fixtures(self):
+        if not os.path.isdir(self.fixtures_dir):
+            return
+        for ticker in sorted(os.listdir(self.fixtures_dir)):
+            directory = os.path.join(self.fixtures_dir, ticker)
+            try:
+                with open(os.path.join(directory, 'news.json')) as f:
+                    self.recorded_news[ticker] = json.load(f)
+                with open(os.path.join(directory, 'llm.json')) as f:
+                    self.recorded_answers.update(json.load(f))
+            except (OSError, ValueError):
+                continue
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    # Behaviour shared by every endpoint
+    def _random(self):
+        with self.rng_lock:
+            return self.rng.random()
+
+    def _count(self, service, status):
+        with self.stats_lock:
+            self.stats[(service, status)] = self.stats.get((service, status), 0) + 1
+
+    def stats_summary(self):
+        """{service: {status: count}} for every response sent so far"""
+        summary = {}
+        with self.stats_lock:
+            for (service, status), count in sorted(self.stats.items()):
+                summary.setdefault(service, {})[str(status)] = count
+        return summary
+
+    def delay(self, service):
+        latency = self.latency.get(service, 0.0) + self.jitter.get(service, 0.0) * self._random()
+        if latency > 0:
+            time.sleep(latency)
+
+    def fault(self, service):
+        """(status, headers) for a throttled or failed request, or None to answer normally"""
+        limiter = self.limiters.get(service)
+        if limiter and not limiter.try_acquire():
+            retry_after = max(1, round(1 / limiter.rate))
+            return 429, {'Retry-After': str(retry_after)}
+        if self._random() < self.error_rate.get(service, 0.0):
+            return 500, {}
+        return None
+
+    def ratelimit_headers(self, service):
+        """OpenAI-style x-ratelimit-* headers describing the service's bucket"""
+        limiter = self.limiters.get(service)
+        if not limiter:
+            return {}
+        return {
+            'x-ratelimit-limit-requests': str(int(limiter.capacity)),
+            'x-ratelimit-remaining-requests': str(int(limiter.tokens)),
+            'x-ratelimit-reset-requests': f"{max(0.0, (1 - limiter.tokens) / limiter.rate):.3f}s"
+        }
+
+    # NewsAPI: GET /v2/everything
+    def synthetic_article(self, ticker, slot):
+        """The article published in `slot` (article_interval seconds since the epoch) for ticker"""
+        rng = random.Random(f"{self.seed}:{ticker}:{slot}")
+        words = " ".join(f"w{rng.randrange(5000):04d}" for _ in range(3))
+        company = COMPANIES.get(ticker, ticker)
+        title = rng.choice(TITLE_TEMPLATES).format(
+            company=company, fund=f"Fund {words.split()[0]}", other=f"Partner {words.split()[1]}",
+            shares=rng.randrange(10, 5000), pct=rng.randrange(1, 40), quarter=rng.randrange(1, 5), word=words
+        )
+        published = datetime.fromtimestamp(slot * self.article_interval, tz=timezone.utc)
+        return {
+            'source': {'id': None, 'name': rng.choice(SOURCES)},
+            'author': None,
+            'title': title,
+            'description': f"{company} ({ticker}) {words} update for investors.",
+            'url': f"https://example.com/{ticker}/{slot}",
+            'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'content': None
+        }
+
+    def news_articles(self, ticker, from_param, to_param=None):
+        """Every article for ticker published between from_param and to_param (both inclusive), newest first"""
+        from_time = datetime.fromisoformat(from_param).replace(tzinfo=timezone.utc) if from_param else None
+        to_time = datetime.fromisoformat(to_param).replace(tzinfo=timezone.utc) if to_param else None
+        if ticker in self.recorded_news:
+            articles = self.recorded_news[ticker]
+            if from_time:
+                cutoff = from_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+                articles = [a for a in articles if a['publishedAt'] >= cutoff]
+            if to_time:
+                cutoff = to_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+                articles = [a for a in articles if a['publishedAt'] <= cutoff]
+            return sorted(articles, key=lambda a: a['publishedAt'], reverse=True)
+
+        now = min(time.time(), to_time.timestamp()) if to_time else time.time()
+        first = from_time.timestamp() if from_time else now - 30 * 86400
+        newest, oldest = int(now // self.article_interval), -int(-first // self.article_interval)
+        return [self.synthetic_article(ticker, slot) for slot in range(newest, oldest - 1, -1)]
+
+    def news_response(self, query):
+        fault = self.fault('news')
+        if fault:
+            status, headers = fault
+            code, message = (('rateLimited', "You have made too many requests recently.") if status == 429
+                             else ('unexpectedError', "This shouldn't happen, and if it does then it's our fault."))
+            return status, headers, {'status': 'error', 'code': code, 'message': message}
+
+        # q looks like '"Apple Inc" OR AAPL'
+        q = query.get('q', [''])[0]
+        match = re.search(r'OR\s+(\S+)\s*$', q)
+        ticker = (match.group(1) if match else q.strip('"')).upper()
+
+        articles = self.news_articles(ticker, query.get('from', [None])[0], query.get('to', [None])[0])
+        page_size = int(query.get('pageSize', ['100'])[0])
+        page = int(query.get('page', ['1'])[0])
+        if self.max_results is not None and page * page_size > self.max_results:
+            return 426, {}, {'status': 'error', 'code': 'maximumResultsReached',
+                             'message': f"You have requested too many results. Limit is {self.max_results}."}
+
+        return 200, {}, {'status': 'ok', 'totalResults': len(articles),
+                         'articles': articles[(page - 1) * page_size:page * page_size]}
+
+    # OpenAI: POST /v1/chat/completions
+    def completion_response(self, body):
+        fault = self.fault('openai')
+        if fault:
+            status, headers = fault
+            error = ({'message': "Rate limit reached for requests", 'type': 'requests', 'code': 'rate_limit_exceeded'}
+                     if status == 429 else {'message': "The server had an error while processing your request.",
+                                            'type': 'server_error', 'code': None})
+            return status, {**headers, **self.ratelimit_headers('openai')}, {'error': error}
+
+        prompt = body['messages'][-1]['content']
+        answer = lambda article_text: self.recorded_answers.get(article_text) or synthetic_answer(article_text)
+
+        # Batched prompts number their articles "[ITEM n] text"
+        items = re.findall(r'^\s*\[ITEM (\d+)\] (.*)$', prompt, flags=re.MULTILINE)
+        if items:
+            text = "\n".join(f"ITEM {n}\n{answer(article_text)}" for n, article_text in items)
+        else:
+            match = re.search(r'News: (.*)', prompt)
+            text = answer(match.group(1) if match else prompt)
+
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(text) // 4
+        return 200, self.ratelimit_headers('openai'), {
+            'id': f"chatcmpl-mock{zlib.crc32(prompt.encode('utf-8')):08x}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'gpt-4o-mini'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens}
+        }
+
+    # Yahoo Finance: GET /v8/finance/chart/<ticker>
+    def daily_prices(self, ticker):
+        """[(epoch seconds, close)] for every weekday from SYNTHETIC_PRICE_START to tomorrow, cached per ticker"""
+        series = self.price_series.get(ticker)
+        end = datetime.now(timezone.utc) + timedelta(days=1)
+        if series is None or series[-1][0] < end.timestamp() - 86400:
+            rng = random.Random(f"{self.seed}:{ticker}:prices")
+            day, close, series = SYNTHETIC_PRICE_START, 50 + rng.random() * 250, []
+            while day < end:
+                if day.weekday() < 5:
+                    close *= 1 + rng.gauss(0.0003, 0.015)
+                    # Bars are stamped at the 09:30 New York open, like Yahoo's daily chart
+                    series.append((int((day + timedelta(hours=14, minutes=30)).timestamp()), round(close, 4)))
+                day += timedelta(days=1)
+            self.price_series[ticker] = series
+        return series
+
+    def chart_response(self, ticker, query):
+        fault = self.fault('yahoo')
+        if fault:
+            status, headers = fault
+            description = "Too Many Requests" if status == 429 else "Internal Server Error"
+            return status, headers, {'chart': {'result': None, 'error': {'code': str(status), 'description': description}}}
+
+        ticker = ticker.upper()
+        period1 = int(query.get('period1', ['0'])[0])
+        period2 = int(query.get('period2', [str(int(time.time()))])[0])
+        bars = [(t, close) for t, close in self.daily_prices(ticker) if period1 <= t < period2]
+        closes = [close for _, close in bars]
+        return 200, {}, {'chart': {'result': [{
+            'meta': {'symbol': ticker, 'longName': COMPANIES.get(ticker, f"{ticker} Corp"), 'currency': 'USD',
+                     'exchangeName': 'NMS', 'instrumentType': 'EQUITY', 'dataGranularity': '1d',
+                     'regularMarketPrice': closes[-1] if closes else None},
+            'timestamp': [t for t, _ in bars],
+            'indicators': {
+                'quote': [{
+                    'open': [round(c * 0.995, 4) for c in closes],
+                    'high': [round(c * 1.01, 4) for c in closes],
+                    'low': [round(c * 0.99, 4) for c in closes],
+                    'close': closes,
+                    'volume': [1_000_000 + zlib.crc32(f"{ticker}{t}".encode()) % 4_000_000 for t, _ in bars]
+                }],
+                'adjclose': [{'adjclose': closes}]
+            }
+        }], 'error': None}}
+
+    def handle(self, method, path, query, body):
+        """Route one request to (service, status, headers, JSON payload)"""
+        if method == 'GET' and path == '/v2/everything':
+            service, (status, headers, payload) = 'news', self.news_response(query)
+        elif method == 'POST' and path == '/v1/chat/completions':
+            service, (status, headers, payload) = 'openai', self.completion_response(body)
+        elif method == 'GET' and path.startswith('/v8/finance/chart/'):
+            service, (status, headers, payload) = 'yahoo', self.chart_response(path.rsplit('/', 1)[1], query)
+        elif method == 'GET' and path == '/stats':
+            return None, 200, {}, self.stats_summary()
+        else:
+            return None, 404, {}, {'error': f"No mock for {method} {path}"}
+
+        self.delay(service)
+        self._count(service, status)
+        return service, status, headers, payload
+
+    def start(self):
+        """Serve from a daemon thread; returns the base URL to put in MOCK_SERVER_URL"""
+        mock = self
+
+        class MockHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def respond(self, method):
+                parsed = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    body = json.loads(self.rfile.read(length)) if length else {}
+                    _, status, headers, payload = mock.handle(method, parsed.path, parse_qs(parsed.query), body)
+                except Exception as e:
+                    status, headers, payload = 400, {}, {'error': f"{type(e).__name__}: {e}"}
+
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self.respond('GET')
+
+            def do_POST(self):
+                self.respond('POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), MockHandler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"🧪 Mock NewsAPI/OpenAI/Yahoo server on {self.url}")
+        return self.url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+def soak(server, tickers, rounds, max_workers, article_workers, batch_size):
+    """Run the portfolio pipeline against the mock server `rounds` times and report stages and responses"""
+    # Replay mode must be on before the first client is built
+    os.environ['MOCK_SERVER_URL'] = server.url
+    from clients import reset_clients
+    from pipeline_metrics import metrics
+    from portfolio_analyzer import PortfolioAnalyzer
+    reset_clients()
+
+    portfolio = PortfolioAnalyzer(max_workers=max_workers, article_workers=article_workers, batch_size=batch_size)
+    for round_number in range(1, rounds + 1):
+        started = time.perf_counter()
+        results = portfolio.analyze_portfolio(tickers)
+        print(f"\n🔁 Round {round_number}/{rounds}: {time.perf_counter() - started:.1f}s, "
+              f"{int(results['total_articles'].sum())} articles scored, "
+              f"{int((results['status'] == 'ok').sum())}/{len(tickers)} tickers ok")
+
+    print("\n⏱️  STAGE TIMINGS (all tickers):")
+    totals = {}
+    for row in metrics.breakdown():
+        stats = totals.setdefault(row['stage'], {'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        stats['calls'] += row['calls']
+        stats['errors'] += row['errors']
+        stats['total_ms'] += row['total_ms']
+        stats['max_ms'] = max(stats['max_ms'], row['max_ms'])
+    for name, stats in sorted(totals.items(), key=lambda item: item[1]['total_ms'], reverse=True):
+        print(f"  {name:14} {stats['calls']:5} calls  {stats['total_ms'] / stats['calls']:8.1f}ms mean  "
+              f"{stats['max_ms']:8.1f}ms max  {stats['errors']} errors")
+    print(f"\n🧮 Counters: {metrics.counter_totals()}")
+    print(f"📡 Mock responses: {server.stats_summary()}")
+
+# Run it
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for NewsAPI, OpenAI and Yahoo Finance")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES_DIR, help="Recorded fixtures directory")
+    parser.add_argument('--latency', help="Seconds per response: 0.2, or per service like openai=0.8,news=0.2")
+    parser.add_argument('--jitter', help="Extra uniform random latency in seconds (same format)")
+    parser.add_argument('--error-rate', help="Fraction of requests answered with a 500 (same format)")
+    parser.add_argument('--rate-limit', help="Requests per second before 429s (same format; default unlimited)")
+    parser.add_argument('--article-interval', type=float, default=3600, help="Seconds between synthetic articles per ticker")
+    parser.add_argument('--max-results', type=int, help="Deepest result NewsAPI paging may reach")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--soak', metavar='TICKERS', help="Comma-separated tickers to run the portfolio pipeline against the server")
+    parser.add_argument('--rounds', type=int, default=3, help="Soak rounds")
+    parser.add_argument('--workers', type=int, default=8, help="Soak ticker workers")
+    parser.add_argument('--article-workers', type=int, default=10, help="Soak concurrent LLM calls")
+    parser.add_argument('--batch-size', type=int, default=1, help="Soak articles per LLM prompt")
+    args = parser.parse_args()
+
+    server = MockServer(
+        host=args.host,
+        port=args.port,
+        fixtures_dir=args.fixtures,
+        latency=per_service(args.latency),
+        jitter=per_service(args.jitter),
+        error_rate=per_service(args.error_rate),
+        rate_limit=per_service(args.rate_limit),
+        article_interval=args.article_interval,
+        max_results=args.max_results,
+        seed=args.seed
+    )
+    server.start()
+
+    if args.soak:
+        soak(server, [t.strip().upper() for t in args.soak.split(',')], args.rounds, args.workers,
+             args.article_workers, args.batch_size)
+        server.stop()
+    else:
+        print(f"Set MOCK_SERVER_URL={server.url} to point the pipeline here (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            server.stop()
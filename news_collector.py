@@ -1,24 +1,123 @@
 import os
-from newsapi import NewsApiClient
-import yfinance as yf
+import json
+import time
+import random
+import threading
+import requests
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from rate_limiter import TokenBucket
+from clients import get_newsapi_client, mock_server_url
+from pipeline_metrics import stage, increment
 
 load_dotenv()
 
+DEFAULT_STATE_PATH = os.getenv('NEWS_STATE_PATH', os.path.join('.cache', 'news_state.json'))
+
+# NewsAPI error codes worth retrying; anything else fails fast
+RETRYABLE_CODES = {'rateLimited', 'unexpectedError'}
+
 class NewsCollector:
-    def __init__(self):
+    def __init__(self, session=None, requests_per_second=1.0, burst=5, state_path=DEFAULT_STATE_PATH):
         try:
-            api_key = os.getenv('NEWS_API_KEY')
-            if not api_key:
-                raise Exception("NEWS_API_KEY not found in .env file")
-            
-            self.newsapi = NewsApiClient(api_key=api_key)
+            # Collectors share the process-wide client and connection pool unless given their own session
+            if session is None:
+                self.newsapi = get_newsapi_client()
+            else:
+                from newsapi import NewsApiClient
+                api_key = os.getenv('NEWS_API_KEY')
+                if not api_key:
+                    raise Exception("NEWS_API_KEY not found in .env file")
+                self.newsapi = NewsApiClient(api_key=api_key, session=session)
             print("✅ News API initialized")
-            
+        
         except Exception as e:
             print(f"❌ Error initializing News API: {e}")
             self.newsapi = None
+        
+        # Every NewsAPI request draws from this bucket
+        self.rate_limiter = TokenBucket(rate=requests_per_second, capacity=burst)
+        
+        # Persistent company names and per-ticker high-water marks (last publishedAt seen)
+        self.state_path = state_path
+        self.state_lock = threading.Lock()
+        self.state = self._load_state()
+        
+        # Mark updates from the last fetch per ticker, applied by commit_high_water_mark once the caller
+        # has stored or scored the batch
+        self.pending_marks = {}
+    
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault('company_names', {})
+        state.setdefault('high_water_marks', {})
+        # URLs already seen at exactly the mark's timestamp, and the cursor of an unfinished backfill
+        state.setdefault('mark_urls', {})
+        state.setdefault('backfills', {})
+        return state
+    
+    def _save_state(self):
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # Write-then-rename so a crash never leaves a truncated state file
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+    
+    def get_company_name(self, ticker):
+        """Resolve a ticker to its company name, cached on disk after the first lookup"""
+        cached = self.state['company_names'].get(ticker)
+        if cached:
+            increment('company_cache_hits', ticker=ticker)
+            return cached
+        
+        print(f"Looking up company info for {ticker}...")
+        with stage('company_lookup', ticker):
+            if mock_server_url():
+                # Replay mode: the chart endpoint's metadata carries the name, no yfinance session needed
+                from price_store import fetch_chart, recent_window
+                company_name = fetch_chart(ticker, *recent_window(1))[1].get('longName', ticker)
+            else:
+                import yfinance as yf
+                stock = yf.Ticker(ticker)
+                company_name = stock.info.get('longName', ticker)
+        print(f"Found company: {company_name}")
+        
+        with self.state_lock:
+            self.state['company_names'][ticker] = company_name
+            self._save_state()
+        return company_name
+    
+    def _get_everything(self, max_retries=4, ticker=None, **params):
+        """Rate-limited get_everything with exponential backoff and jitter on transient errors"""
+        from newsapi.newsapi_exception import NewsAPIException
+        
+        for attempt in range(max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                with stage('news_fetch', ticker, page=params.get('page', 1), attempt=attempt) as span:
+                    response = self.newsapi.get_everything(**params)
+                    span['articles'] = len(response.get('articles', []))
+                return response
+            except NewsAPIException as e:
+                if e.get_code() not in RETRYABLE_CODES or attempt == max_retries:
+                    raise
+                print(f"⚠️  NewsAPI {e.get_code()}, retrying ({attempt + 1}/{max_retries})...")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # Network-level failures (timeouts, dropped connections); anything else is a bug, not bad luck
+                if attempt == max_retries:
+                    raise
+                print(f"⚠️  NewsAPI request failed ({e}), retrying ({attempt + 1}/{max_retries})...")
+            
+            increment('news_retries', ticker=ticker)
+            time.sleep(min(30, 2 ** attempt) * random.uniform(0.5, 1.0))
     
     def get_stock_news(self, ticker, days=7):
         """Get recent news for a stock ticker"""
@@ -28,17 +127,15 @@ class NewsCollector:
         
         try:
             # Get company name
-            print(f"Looking up company info for {ticker}...")
-            stock = yf.Ticker(ticker)
-            company_name = stock.info.get('longName', ticker)
-            print(f"Found company: {company_name}")
+            company_name = self.get_company_name(ticker)
             
             # Calculate date range
             from_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
             print(f"Searching news from {from_date}...")
             
             # Search for news
-            articles = self.newsapi.get_everything(
+            articles = self._get_everything(
+                ticker=ticker,
                 q=f'"{company_name}" OR {ticker}',
                 from_param=from_date,
                 language='en',
@@ -48,10 +145,133 @@ class NewsCollector:
             
             print(f"✅ Found {len(articles['articles'])} articles")
             return articles['articles']
+        
+        except Exception as e:
+            print(f"❌ Error fetching news: {e}")
+            return []
+    
+    def fetch_new_articles(self, ticker, days=7, page_size=100, max_articles=500):
+        """Page through every article newer than the ticker's high-water mark (or the last `days` days)
+        
+        The mark only moves when commit_high_water_mark(ticker) is called, so a batch that fails to be
+        stored or scored is fetched again on the next poll.
+        """
+        if not self.newsapi:
+            print("❌ News API not available")
+            return []
+        
+        from newsapi.newsapi_exception import NewsAPIException
+        
+        try:
+            company_name = self.get_company_name(ticker)
+            
+            with self.state_lock:
+                high_water_mark = self.state['high_water_marks'].get(ticker)
+                mark_urls = set(self.state['mark_urls'].get(ticker, []))
+                backfill = self.state['backfills'].get(ticker)
+            
+            # Resume from the last article we saw, or start `days` back on the first poll. While a backfill is
+            # open, the previous poll hit max_articles and older articles down to the mark are still unseen
+            from_param = (high_water_mark.rstrip('Z') if high_water_mark
+                          else (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d'))
+            to_param = backfill['to'] if backfill else None
+            known_urls = mark_urls | set(backfill['urls'] if backfill else [])
+            print(f"Polling {ticker} news since {from_param}" + (f" (backfilling to {to_param})" if to_param else "") + "...")
             
+            new_articles = []
+            seen_urls = set()
+            complete = False
+            page = 1
+            while len(new_articles) <= max_articles:
+                try:
+                    response = self._get_everything(
+                        ticker=ticker,
+                        q=f'"{company_name}" OR {ticker}',
+                        from_param=from_param,
+                        to=to_param.rstrip('Z') if to_param else None,
+                        language='en',
+                        sort_by='publishedAt',
+                        page_size=page_size,
+                        page=page
+                    )
+                except NewsAPIException as e:
+                    # Plans cap how deep paging can go; keep what we have
+                    if e.get_code() == 'maximumResultsReached':
+                        break
+                    raise
+                
+                articles = response['articles']
+                for article in articles:
+                    # from/to are inclusive, so articles at either end may have been seen already; anything
+                    # at the mark's own second is new unless its URL was recorded with the mark
+                    if high_water_mark and article['publishedAt'] < high_water_mark:
+                        continue
+                    if article.get('url') in known_urls or article.get('url') in seen_urls:
+                        continue
+                    seen_urls.add(article.get('url'))
+                    new_articles.append(article)
+                
+                if len(articles) < page_size or page * page_size >= response.get('totalResults', 0):
+                    complete = True
+                    break
+                page += 1
+            
+            # Newest first; when capped, the skipped articles are the older ones
+            new_articles.sort(key=lambda article: article['publishedAt'], reverse=True)
+            if len(new_articles) > max_articles:
+                new_articles = new_articles[:max_articles]
+                complete = False
+            
+            with self.state_lock:
+                self.pending_marks[ticker] = self._next_marks(high_water_mark, mark_urls, backfill,
+                                                              new_articles, complete)
+            
+            print(f"✅ Found {len(new_articles)} new articles for {ticker} ({page} page{'s' if page > 1 else ''})")
+            return new_articles
+        
         except Exception as e:
             print(f"❌ Error fetching news: {e}")
             return []
+    
+    @staticmethod
+    def _next_marks(high_water_mark, mark_urls, backfill, new_articles, complete):
+        """(mark, mark URLs, backfill) after a fetch; ISO-8601 UTC timestamps sort correctly as strings"""
+        def boundary(timestamp, known=()):
+            return [timestamp, sorted({a.get('url') for a in new_articles if a['publishedAt'] == timestamp} | set(known))]
+        
+        if new_articles:
+            newest = new_articles[0]['publishedAt']
+            latest = boundary(newest, mark_urls if newest == high_water_mark else ())
+        else:
+            latest = [high_water_mark, sorted(mark_urls)]
+        
+        if not complete and new_articles:
+            # Older unseen articles remain between the mark and the oldest one returned: keep the mark, and
+            # walk backwards from there on the next poll. The newest article seen so far becomes the mark
+            # once the backfill finishes
+            oldest = new_articles[-1]['publishedAt']
+            known = backfill['urls'] if backfill and backfill['to'] == oldest else ()
+            pending = boundary(*backfill['pending']) if backfill else latest
+            to, urls = boundary(oldest, known)
+            return high_water_mark, sorted(mark_urls), {'to': to, 'urls': urls, 'pending': pending}
+        
+        mark, urls = boundary(*backfill['pending']) if backfill else latest
+        return mark, urls, None
+    
+    def commit_high_water_mark(self, ticker):
+        """Advance the ticker's mark past the last fetch_new_articles batch, once it has been stored or scored"""
+        with self.state_lock:
+            if ticker not in self.pending_marks:
+                return
+            mark, urls, backfill = self.pending_marks.pop(ticker)
+            if mark:
+                self.state['high_water_marks'][ticker] = mark
+                self.state['mark_urls'][ticker] = urls
+            if backfill:
+                self.state['backfills'][ticker] = backfill
+            else:
+                self.state['backfills'].pop(ticker, None)
+            self._save_state()
 
 # Test it
 if __name__ == "__main__":
@@ -64,4 +284,8 @@ if __name__ == "__main__":
         print(f"Source: {news[0]['source']['name']}")
         print(f"Published: {news[0]['publishedAt']}")
     else:
-        print("No news found - check your News API key")
\ No newline at end of file
+        print("No news found - check your News API key")
+    
+    # Incremental polling: a second call only returns articles published since the first
+    print(f"\nNew since last poll: {len(collector.fetch_new_articles('AAPL'))} articles")
+    collector.commit_high_water_mark('AAPL')
@@ -0,0 +1,101 @@
+import re
+import math
+import hashlib
+import numpy as np
+from typing import List, Dict
+
+class NearDuplicateDetector:
+    def __init__(self, threshold=0.6, num_perm=64, bands=16, shingle_size=3, seed=1):
+        # Articles whose estimated Jaccard similarity reaches threshold are the same story
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+
+        # LSH banding: signatures are split into bands; only articles sharing a whole band are compared
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        # Multiply-shift hash family (uint64 arithmetic wraps), one (a, b) pair per permutation
+        rng = np.random.default_rng(seed)
+        self.hash_a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.hash_b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, article: Dict) -> List[str]:
+        """Overlapping word n-grams of title + description"""
+        text = f"{article['title']} {article.get('description') or ''}".lower()
+        words = re.findall(r'\w+', text)
+        if len(words) < self.shingle_size:
+            return words
+        return [' '.join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+
+    def signature(self, article: Dict) -> np.ndarray:
+        """MinHash signature: the minimum of each hash permutation over the article's shingles"""
+        shingles = set(self.shingles(article))
+        if not shingles:
+            return np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big') for s in shingles],
+            dtype=np.uint64
+        )
+        permuted = (self.hash_a[:, None] * hashes[None, :] + self.hash_b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1)
+
+    def cluster(self, articles: List[Dict]) -> List[List[int]]:
+        """Group near-duplicate articles; each cluster lists article indexes in input order"""
+        if not articles:
+            return []
+
+        signatures = np.array([self.signature(article) for article in articles])
+        parent = list(range(len(articles)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        # Bucket by each band, then confirm candidates with the full signature
+        for band in range(self.bands):
+            band_values = signatures[:, band * self.rows:(band + 1) * self.rows]
+            buckets = {}
+            for i, key in enumerate(map(bytes, band_values)):
+                buckets.setdefault(key, []).append(i)
+
+            for members in buckets.values():
+                for a in range(len(members)):
+                    for b in range(a + 1, len(members)):
+                        i, j = members[a], members[b]
+                        root_i, root_j = find(i), find(j)
+                        if root_i == root_j:
+                            continue
+                        if (signatures[i] == signatures[j]).mean() >= self.threshold:
+                            # Keep the earliest (highest-ranked) article as the root
+                            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        clusters = {}
+        for i in range(len(articles)):
+            clusters.setdefault(find(i), []).append(i)
+        return sorted(clusters.values(), key=lambda members: members[0])
+
+    @staticmethod
+    def cluster_weight(cluster_size: int) -> float:
+        """Weight multiplier for a story carried by cluster_size outlets: grows with syndication,
+        but sublinearly, so one wire story cannot outweigh several independent ones"""
+        return 1.0 + math.log(cluster_size)
+
+# Test it
+if __name__ == "__main__":
+    detector = NearDuplicateDetector()
+
+    articles = [
+        {'title': 'Apple beats quarterly earnings expectations on strong iPhone sales',
+         'description': 'Apple Inc reported revenue above analyst estimates for the third quarter.'},
+        {'title': 'Apple beats quarterly earnings expectations on strong iPhone sales - Reuters',
+         'description': 'Apple Inc reported revenue above analyst estimates for the third quarter.'},
+        {'title': 'Tesla recalls 10,000 vehicles over seatbelt issue',
+         'description': 'The electric carmaker said no injuries had been reported.'}
+    ]
+
+    for cluster in detector.cluster(articles):
+        print(f"Story ({len(cluster)} copies): {articles[cluster[0]]['title']}")
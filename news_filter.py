@@ -1,21 +1,57 @@
+import os
 import re
+import json
+import time
+import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Optional
+from pipeline_metrics import stage
+
+DEFAULT_SOURCE_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'source_tiers.json')
+
+# Below this many articles filter_and_rank_articles_batch hands off to the per-article path, which measured
+# faster there (the columnar path broke even around 300-400 articles)
+BATCH_MIN_ARTICLES = 500
+
+# Maps every ASCII non-word byte except NUL (the row separator) to a space, so bytes.translate + split yields
+# exactly the \w+ tokens of ASCII text
+NON_WORD_TO_SPACE = bytes(c if re.fullmatch(rb'\w', bytes([c])) or c >= 128 or c == 0 else ord(' ')
+                          for c in range(256))
+
+def keyword_alternation(keywords):
+    """Regex alternation of keywords factored into a prefix trie ('ipad|iphone' -> 'ip(?:ad|hone)'),
+    which the regex engine walks far faster than a flat list; longer keywords still win"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        group = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A keyword ends here too: the longer continuation is optional (and tried first)
+        return f'(?:{group})?' if '' in node else group
+    
+    return build(trie)
 
 class NewsFilter:
-    def __init__(self):
-        # High-credibility financial news sources (more comprehensive)
-        self.tier1_sources = {
-            'reuters', 'bloomberg', 'wall street journal', 'financial times', 
-            'wsj', 'ft.com', 'cnbc', 'marketwatch', 'seeking alpha',
-            'associated press', 'ap news', 'dow jones'
-        }
+    def __init__(self, source_config: str = DEFAULT_SOURCE_CONFIG, reload_interval: float = 30.0,
+                 credibility_cache_size: int = 4096):
+        # Source credibility tiers live in a JSON config, re-read when the file changes
+        self.source_config = source_config
+        self.reload_interval = reload_interval
+        self.source_config_mtime = None
+        self.last_reload_check = 0.0
         
-        self.tier2_sources = {
-            'yahoo finance', 'yahoo entertainment', 'cnn business', 'forbes', 
-            'business insider', 'the motley fool', 'benzinga', 'zacks', 
-            'barrons', 'investor place', 'thestreet', 'fool.com'
-        }
+        # Memoized per raw source string; cleared whenever the tiers are reloaded
+        self.lookup_credibility = lru_cache(maxsize=credibility_cache_size)(self._lookup_credibility)
+        self.load_source_tiers()
         
         # Enhanced high-impact keywords
         self.high_impact_keywords = {
@@ -37,20 +73,135 @@ class NewsFilter:
             'social media', 'twitter', 'reddit', 'meme', 'sells 145 shares',
             'buys', 'sells', 'shares of', 'price target', 'rating'
     }
+        
+        self.compile_keywords()
     
-    def calculate_source_credibility(self, source_name: str) -> float:
-        """Rate source credibility from 0.0 to 1.0"""
-        source_lower = source_name.lower()
+    def compile_keywords(self):
+        """Compile all keyword sets into one word-boundary regex (call again after editing the sets)"""
+        self.keyword_categories = {
+            'high_impact': self.high_impact_keywords,
+            'relevance': self.relevance_boosters,
+            'noise': self.noise_keywords
+        }
+        all_keywords = set().union(*self.keyword_categories.values())
         
-        for tier1 in self.tier1_sources:
-            if tier1 in source_lower:
-                return 1.0
-                
-        for tier2 in self.tier2_sources:
-            if tier2 in source_lower:
-                return 0.7
+        # Zero-width lookahead so overlapping keywords ('sells 145 shares', 'shares of') all match;
+        # each position reports its longest keyword
+        self.keyword_pattern = re.compile(rf'\b(?=({keyword_alternation(all_keywords)})\b)')
+        
+        # A matched phrase also counts the shorter keywords nested in it ('sells 145 shares' -> 'sells')
+        self.keyword_expansions = {
+            keyword: {other for other in all_keywords if re.search(rf'\b{re.escape(other)}\b', keyword)}
+            for keyword in all_keywords
+        }
+        
+        # Tables for count_keywords_batch: single words are matched as whole tokens, phrases by substring
+        # screen plus a boundary check
+        self.word_keywords = frozenset(keyword for keyword in all_keywords if re.fullmatch(r'\w+', keyword))
+        self.phrase_patterns = {
+            phrase: re.compile(rf'\b{re.escape(phrase)}\b')
+            for phrase in sorted(all_keywords - self.word_keywords)
+        }
+    
+    def count_keywords(self, text: str) -> Dict[str, int]:
+        """Count distinct keywords per category in one pass over lowercased text"""
+        found = set()
+        for match in self.keyword_pattern.finditer(text):
+            found |= self.keyword_expansions[match.group(1)]
+        
+        return {
+            category: len(found & keywords)
+            for category, keywords in self.keyword_categories.items()
+        }
+    
+    def count_keywords_batch(self, texts: List[str]) -> pd.DataFrame:
+        """count_keywords for a whole column of lowercased texts, one row per text"""
+        texts = list(texts)
+        
+        # Punctuation is blanked for the whole column in one C-level pass, with rows joined on NUL
+        tokenized = '\x00'.join(texts).encode('utf-8').translate(NON_WORD_TO_SPACE).decode('utf-8').split('\x00')
+        if len(tokenized) != len(texts):
+            # Some text contains NUL itself
+            return pd.DataFrame([self.count_keywords(text) for text in texts], columns=list(self.keyword_categories))
+        
+        counts = np.zeros((len(texts), len(self.keyword_categories)), dtype=np.int64)
+        categories = list(self.keyword_categories.values())
+        for row, (text, tokens) in enumerate(zip(texts, tokenized)):
+            if text.isascii():
+                found = self.word_keywords.intersection(tokens.split())
+                phrases = [phrase for phrase, pattern in self.phrase_patterns.items()
+                           if phrase in text and pattern.search(text)]
+                if phrases:
+                    found = found.union(phrases)
+            else:
+                # Unicode word boundaries: fall back to the regex scan
+                found = set()
+                for match in self.keyword_pattern.finditer(text):
+                    found |= self.keyword_expansions[match.group(1)]
+            if found:
+                counts[row] = [len(found & keywords) for keywords in categories]
+        
+        return pd.DataFrame(counts, columns=list(self.keyword_categories))
+    
+    @staticmethod
+    def normalize_source(source_name: str) -> str:
+        """Canonical form of a source name or domain ('https://www.Reuters.com/' -> 'reuters.com')"""
+        source = source_name.strip().lower()
+        source = re.sub(r'^[a-z]+://', '', source)
+        source = re.sub(r'^www\.', '', source).rstrip('/')
+        return re.sub(r'\s+', ' ', source)
+    
+    def load_source_tiers(self):
+        """(Re)build the credibility index from the tier config file"""
+        with open(self.source_config) as f:
+            config = json.load(f)
+        
+        self.default_credibility = config.get('default_weight', 0.3)
+        
+        # Tiers are listed best first; a source in several tiers keeps its first weight
+        self.source_patterns = []
+        self.source_index = {}
+        for tier in config['tiers']:
+            for source in tier['sources']:
+                normalized = self.normalize_source(source)
+                self.source_patterns.append((normalized, tier['weight']))
+                self.source_index.setdefault(normalized, tier['weight'])
+        
+        self.source_config_mtime = os.path.getmtime(self.source_config)
+        self.lookup_credibility.cache_clear()
+    
+    def reload_source_tiers_if_changed(self):
+        """Hot-reload the tier config, checking its mtime at most every reload_interval seconds"""
+        now = time.monotonic()
+        if now - self.last_reload_check < self.reload_interval:
+            return
+        self.last_reload_check = now
+        
+        try:
+            if os.path.getmtime(self.source_config) != self.source_config_mtime:
+                self.load_source_tiers()
+                print("🔄 Reloaded source credibility tiers")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Could not reload source tiers, keeping current ones: {e}")
+    
+    def _lookup_credibility(self, source_name: str) -> float:
+        source = self.normalize_source(source_name)
+        
+        # Exact names and domains are a single dict hit
+        if source in self.source_index:
+            return self.source_index[source]
+        
+        # Otherwise fall back to substring matching ('reuters uk' -> 'reuters'), best tier first
+        for pattern, weight in self.source_patterns:
+            if pattern in source:
+                return weight
                 
-        return 0.3  # Unknown sources get low credibility
+        return self.default_credibility  # Unknown sources get low credibility
+    
+    def calculate_source_credibility(self, source_name: str) -> float:
+        """Rate source credibility from 0.0 to 1.0"""
+        self.reload_source_tiers_if_changed()
+        return self.lookup_credibility(source_name)
     
     def calculate_relevance_score(self, article: Dict, ticker: str) -> float:
         """Calculate how relevant an article is to the stock (0.0 to 1.0)"""
@@ -66,16 +217,19 @@ class NewsFilter:
         elif ticker_lower in text:
             relevance_score += 0.2
         
+        # Whole-word keyword counts for every category in a single scan
+        keyword_counts = self.count_keywords(text)
+        
         # High-impact financial keywords
-        impact_words = sum(1 for keyword in self.high_impact_keywords if keyword in text)
+        impact_words = keyword_counts['high_impact']
         relevance_score += min(impact_words * 0.15, 0.4)
         
         # Company-specific relevance boosters
-        company_words = sum(1 for keyword in self.relevance_boosters if keyword in text)
+        company_words = keyword_counts['relevance']
         relevance_score += min(company_words * 0.1, 0.3)
         
         # Heavy penalty for noise (institutional buying/selling news)
-        noise_penalty = sum(1 for keyword in self.noise_keywords if keyword in text)
+        noise_penalty = keyword_counts['noise']
         relevance_score -= min(noise_penalty * 0.2, 0.5)
         
         return max(0.0, min(1.0, relevance_score))
@@ -94,29 +248,102 @@ class NewsFilter:
     
     def filter_and_rank_articles(self, articles: List[Dict], ticker: str) -> List[Dict]:
         """Filter and rank articles by quality and relevance"""
-        scored_articles = []
+        with stage('filter', ticker) as span:
+            scored_articles = []
+            
+            for article in articles:
+                # Calculate scores
+                credibility = self.calculate_source_credibility(article['source']['name'])
+                relevance = self.calculate_relevance_score(article, ticker)
+                time_weight = self.calculate_time_weight(article['publishedAt'])
+                
+                # Combined quality score
+                quality_score = (credibility * 0.4 + relevance * 0.4 + time_weight * 0.2)
+                
+                # Only keep articles with decent quality
+                if quality_score > 0.4:
+                    scored_articles.append({
+                        **article,
+                        'credibility_score': credibility,
+                        'relevance_score': relevance,
+                        'time_weight': time_weight,
+                        'quality_score': quality_score
+                    })
+            
+            # Sort by quality score, highest first
+            scored_articles.sort(key=lambda x: x['quality_score'], reverse=True)
+            span['articles_in'] = len(articles)
+            span['articles_out'] = len(scored_articles)
+        
+        print(f"Filtered {len(articles)} articles down to {len(scored_articles)} high-quality articles")
         
-        for article in articles:
-            # Calculate scores
-            credibility = self.calculate_source_credibility(article['source']['name'])
-            relevance = self.calculate_relevance_score(article, ticker)
-            time_weight = self.calculate_time_weight(article['publishedAt'])
+        return scored_articles
+
+    def filter_and_rank_articles_batch(self, articles: List[Dict], ticker: str,
+                                       top_k: Optional[int] = None) -> List[Dict]:
+        """Columnar version of filter_and_rank_articles for large article dumps, optionally keeping only the top_k"""
+        if len(articles) < BATCH_MIN_ARTICLES:
+            # The column setup costs more than it saves on small inputs
+            scored_articles = self.filter_and_rank_articles(articles, ticker)
+            return scored_articles if top_k is None else scored_articles[:top_k]
+        
+        with stage('filter', ticker) as span:
+            ticker_lower = ticker.lower()
+            
+            # Lowercase every title and text once
+            titles = [article['title'].lower() for article in articles]
+            texts = [f"{title} {article.get('description', '')}".lower() for title, article in zip(titles, articles)]
+            
+            # Source credibility, looked up once per distinct source name
+            sources = [article['source']['name'] for article in articles]
+            source_scores = {name: self.calculate_source_credibility(name) for name in set(sources)}
+            credibility = np.array([source_scores[name] for name in sources])
+            
+            # Relevance: ticker placement plus capped keyword counts, same weights as calculate_relevance_score
+            in_title = np.array([ticker_lower in title or 'apple inc' in title for title in titles])
+            in_text = np.array([ticker_lower in text for text in texts])
+            counts = self.count_keywords_batch(texts)
+            
+            relevance = np.where(in_title, 0.5, np.where(in_text, 0.2, 0.0))
+            relevance = relevance + np.minimum(counts['high_impact'].to_numpy() * 0.15, 0.4)
+            relevance = relevance + np.minimum(counts['relevance'].to_numpy() * 0.1, 0.3)
+            relevance = relevance - np.minimum(counts['noise'].to_numpy() * 0.2, 0.5)
+            relevance = np.clip(relevance, 0.0, 1.0)
+            
+            # Time weight: parse all timestamps in one call; unparseable ones get the 0.5 default
+            published = pd.to_datetime([article['publishedAt'] for article in articles],
+                                       utc=True, errors='coerce', format='ISO8601')
+            hours_ago = (pd.Timestamp.now(tz='UTC') - published).total_seconds().to_numpy() / 3600
+            time_weight = np.where(np.isnan(hours_ago), 0.5, np.maximum(0.1, 1.0 - hours_ago / 72))
             
             # Combined quality score
-            quality_score = (credibility * 0.4 + relevance * 0.4 + time_weight * 0.2)
+            quality = credibility * 0.4 + relevance * 0.4 + time_weight * 0.2
             
             # Only keep articles with decent quality
-            if quality_score > 0.4:
-                scored_articles.append({
-                    **article,
-                    'credibility_score': credibility,
-                    'relevance_score': relevance,
-                    'time_weight': time_weight,
-                    'quality_score': quality_score
-                })
-        
-        # Sort by quality score, highest first
-        scored_articles.sort(key=lambda x: x['quality_score'], reverse=True)
+            kept = np.flatnonzero(quality > 0.4)
+            if top_k is not None and 0 < top_k < len(kept):
+                # Partial selection: find the top_k-th best score in linear time and sort only the articles above
+                # it; ties at that score go to the earliest articles, as in the stable full sort
+                kept_quality = quality[kept]
+                cutoff = np.partition(kept_quality, len(kept) - top_k)[len(kept) - top_k]
+                above = kept_quality > cutoff
+                at_cutoff = np.flatnonzero(kept_quality == cutoff)[:top_k - above.sum()]
+                above[at_cutoff] = True
+                kept = kept[above]
+            
+            # Highest first (stable, like list.sort)
+            ranked = kept[np.argsort(-quality[kept], kind='stable')][:top_k]
+            
+            # Only the surviving articles are copied
+            scored_articles = [{
+                **articles[i],
+                'credibility_score': float(credibility[i]),
+                'relevance_score': float(relevance[i]),
+                'time_weight': float(time_weight[i]),
+                'quality_score': float(quality[i])
+            } for i in ranked]
+            span['articles_in'] = len(articles)
+            span['articles_out'] = len(scored_articles)
         
         print(f"Filtered {len(articles)} articles down to {len(scored_articles)} high-quality articles")
         
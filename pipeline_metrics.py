@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Span events are appended here as JSON lines when set (off by default)
+DEFAULT_METRICS_PATH = os.getenv('METRICS_PATH', '')
+
+# Ticker the current work is for; worker threads inherit it when submitted with contextvars.copy_context().run
+current_ticker = contextvars.ContextVar('current_ticker', default=None)
+
+class PipelineMetrics:
+    def __init__(self, path=DEFAULT_METRICS_PATH):
+        self.lock = threading.Lock()
+        self.path = path or None
+        if self.path and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        # The JSONL export has its own lock and line-buffered handle, so threads only wait on each other
+        # for the aggregate update, not for file I/O
+        self.export_lock = threading.Lock()
+        self.export_file = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            # (stage, ticker) -> {'count', 'errors', 'total_seconds', 'max_seconds'}
+            self.stages = {}
+            # (name, ticker) -> running total (tokens, cache hits, retries, ...)
+            self.counters = {}
+
+    def record(self, stage, ticker, duration, error=None, **attrs):
+        """Add one timed stage run and append it to the JSONL export"""
+        with self.lock:
+            stats = self.stages.setdefault((stage, ticker), {'count': 0, 'errors': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            stats['count'] += 1
+            stats['errors'] += error is not None
+            stats['total_seconds'] += duration
+            stats['max_seconds'] = max(stats['max_seconds'], duration)
+
+        if self.path:
+            event = {
+                'time': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+                'ticker': ticker,
+                'stage': stage,
+                'duration_ms': round(duration * 1000, 3),
+                'error': error,
+                **attrs
+            }
+            line = json.dumps(event, default=str) + '\n'
+            with self.export_lock:
+                if self.export_file is None:
+                    self.export_file = open(self.path, 'a', buffering=1)
+                self.export_file.write(line)
+
+    def increment(self, name, value=1, ticker=None):
+        ticker = ticker if ticker is not None else current_ticker.get()
+        with self.lock:
+            self.counters[(name, ticker)] = self.counters.get((name, ticker), 0) + value
+
+    @contextmanager
+    def stage(self, name, ticker=None, **attrs):
+        """Time a block as one run of `name`; the yielded dict collects extra attributes for the export"""
+        ticker = ticker if ticker is not None else current_ticker.get()
+        span = dict(attrs)
+        started = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            self.record(name, ticker, time.perf_counter() - started, error=f"{type(e).__name__}: {e}", **span)
+            raise
+        self.record(name, ticker, time.perf_counter() - started, **span)
+
+    def breakdown(self, ticker=None):
+        """Per-stage rows (all tickers, or one), slowest total first"""
+        with self.lock:
+            rows = [{
+                'stage': stage,
+                'ticker': stage_ticker,
+                'calls': stats['count'],
+                'errors': stats['errors'],
+                'total_ms': stats['total_seconds'] * 1000,
+                'mean_ms': stats['total_seconds'] * 1000 / stats['count'],
+                'max_ms': stats['max_seconds'] * 1000
+            } for (stage, stage_ticker), stats in self.stages.items() if ticker is None or stage_ticker == ticker]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def counter_totals(self, ticker=None):
+        """Counter totals (tokens, cache hits, retries, ...) across all tickers, or for one"""
+        totals = {}
+        with self.lock:
+            for (name, counter_ticker), value in self.counters.items():
+                if ticker is None or counter_ticker == ticker:
+                    totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def prometheus_text(self):
+        """Everything in the Prometheus text exposition format"""
+        def labels(**values):
+            pairs = ','.join(f'{k}="{str(v or "").replace(chr(34), "")}"' for k, v in values.items())
+            return '{' + pairs + '}'
+
+        lines = [
+            '# HELP pipeline_stage_seconds Time spent per pipeline stage',
+            '# TYPE pipeline_stage_seconds summary'
+        ]
+        with self.lock:
+            stages = sorted(self.stages.items(), key=lambda item: (item[0][0], str(item[0][1])))
+            counters = sorted(self.counters.items(), key=lambda item: (item[0][0], str(item[0][1])))
+
+        for (stage, ticker), stats in stages:
+            lines.append(f"pipeline_stage_seconds_sum{labels(stage=stage, ticker=ticker)} {stats['total_seconds']}")
+            lines.append(f"pipeline_stage_seconds_count{labels(stage=stage, ticker=ticker)} {stats['count']}")
+        lines += ['# HELP pipeline_stage_errors_total Failed runs per pipeline stage',
+                  '# TYPE pipeline_stage_errors_total counter']
+        for (stage, ticker), stats in stages:
+            lines.append(f"pipeline_stage_errors_total{labels(stage=stage, ticker=ticker)} {stats['errors']}")
+
+        seen = set()
+        for (name, ticker), value in counters:
+            if name not in seen:
+                lines.append(f'# TYPE pipeline_{name}_total counter')
+                seen.add(name)
+            lines.append(f"pipeline_{name}_total{labels(ticker=ticker)} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def start_prometheus_server(self, port=9108, host='0.0.0.0'):
+        """Serve /metrics for Prometheus from a daemon thread"""
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"📊 Prometheus metrics on http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+# One registry per process, shared by every instrumented stage
+metrics = PipelineMetrics()
+
+def stage(name, ticker=None, **attrs):
+    return metrics.stage(name, ticker, **attrs)
+
+def increment(name, value=1, ticker=None):
+    metrics.increment(name, value, ticker)
+
+@contextmanager
+def ticker_context(ticker):
+    """Attribute everything inside the block (that does not name a ticker itself) to `ticker`"""
+    token = current_ticker.set(ticker)
+    try:
+        yield
+    finally:
+        current_ticker.reset(token)
+
+# Test it
+if __name__ == "__main__":
+    with ticker_context("AAPL"):
+        with stage('news_fetch'):
+            time.sleep(0.05)
+        for _ in range(3):
+            with stage('llm_call') as span:
+                time.sleep(0.01)
+                span['total_tokens'] = 150
+            increment('llm_tokens', 150)
+        try:
+            with stage('price_fetch'):
+                raise TimeoutError("yfinance timed out")
+        except TimeoutError:
+            pass
+
+    for row in metrics.breakdown():
+        print(f"{row['stage']:12} {row['ticker']}: {row['calls']} calls, {row['total_ms']:.1f}ms total, {row['errors']} errors")
+    print(metrics.counter_totals())
+    print(metrics.prometheus_text())
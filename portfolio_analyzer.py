@@ -0,0 +1,115 @@
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from news_collector import NewsCollector
+from news_filter import NewsFilter
+from advanced_analyzer import AdvancedAnalyzer, PRICE_LOOKBACK_DAYS
+from price_store import recent_window
+from clients import get_http_session
+
+# One row per ticker, in this column order
+ROW_COLUMNS = ['ticker', 'avg_sentiment', 'total_articles', 'buy_signals', 'sell_signals', 'current_price',
+               'price_change_percent', 'avg_confidence', 'conviction_level', 'agreement_with_market',
+               'risk_warnings', 'status']
+
+class PortfolioAnalyzer:
+    def __init__(self, max_workers=8, article_workers=10, batch_size=1):
+        # The process-wide pooled HTTP session carries every NewsAPI request across the watchlist
+        self.session = get_http_session()
+
+        # Collector, filter and OpenAI client are shared by every ticker
+        self.collector = NewsCollector()
+        self.analyzer = AdvancedAnalyzer(
+            max_workers=article_workers,
+            batch_size=batch_size,
+            collector=self.collector,
+            news_filter=NewsFilter()
+        )
+
+        # Tickers fan out here; article scoring stays bounded by the analyzer's own pool
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        print("✅ Portfolio Analyzer ready")
+
+    def fetch_price_data(self, ticker, bulk_prices):
+        """Price summary for one ticker once the bulk download has landed"""
+        bulk_prices.result()
+        return self.analyzer.get_stock_price_data(ticker)
+
+    def analyze_ticker(self, ticker, price_future):
+        """Run the news -> filter -> LLM pipeline for one ticker and join it with its price data"""
+        try:
+            sentiment_result = self.analyzer.analyze_stock_sentiment(ticker)
+        except Exception as e:
+            print(f"❌ Error analyzing {ticker}: {e}")
+            sentiment_result = None
+
+        price_data = price_future.result()
+
+        row = {
+            'ticker': ticker,
+            'avg_sentiment': None,
+            'total_articles': 0,
+            'buy_signals': 0,
+            'sell_signals': 0,
+            'current_price': None,
+            'price_change_percent': None,
+            'avg_confidence': None,
+            'conviction_level': None,
+            'agreement_with_market': None,
+            'risk_warnings': 0,
+            'status': 'ok'
+        }
+
+        if price_data:
+            row['current_price'] = price_data['current_price']
+            row['price_change_percent'] = price_data['price_change_percent']
+
+        if not sentiment_result:
+            row['status'] = 'no news'
+            return row
+
+        row['avg_sentiment'] = sentiment_result['avg_sentiment']
+        row['total_articles'] = sentiment_result['total_articles']
+        row['buy_signals'] = sentiment_result['buy_signals']
+        row['sell_signals'] = sentiment_result['sell_signals']
+
+        if not price_data:
+            row['status'] = 'no price data'
+            return row
+
+        risk_metrics = self.analyzer.calculate_risk_metrics(sentiment_result['detailed_analyses'], price_data, ticker=ticker)
+        row['avg_confidence'] = risk_metrics['avg_confidence']
+        row['conviction_level'] = risk_metrics['conviction_level']
+        row['agreement_with_market'] = risk_metrics['agreement_with_market']
+        row['risk_warnings'] = len(risk_metrics['risk_warnings'])
+        return row
+
+    def analyze_portfolio(self, tickers):
+        """Analyze every ticker concurrently and return one row per ticker"""
+        if not tickers:
+            return pd.DataFrame(columns=ROW_COLUMNS).set_index('ticker')
+
+        print(f"\n📂 Analyzing {len(tickers)} tickers with {self.max_workers} workers...")
+
+        # One bulk price download for the whole watchlist goes out alongside the news pipelines;
+        # each ticker's price lookup then reads from the local price cache
+        bulk_prices = self.executor.submit(
+            self.analyzer.price_store.prefetch, tickers, *recent_window(PRICE_LOOKBACK_DAYS)
+        )
+        price_futures = {t: self.executor.submit(self.fetch_price_data, t, bulk_prices) for t in tickers}
+
+        # Price tasks are queued first, so ticker tasks never wait on work queued behind them
+        row_futures = [self.executor.submit(self.analyze_ticker, t, price_futures[t]) for t in tickers]
+        rows = [f.result() for f in row_futures]
+
+        return pd.DataFrame(rows, columns=ROW_COLUMNS).set_index('ticker')
+
+# Test it
+if __name__ == "__main__":
+    portfolio = PortfolioAnalyzer()
+
+    watchlist = ["AAPL", "TSLA", "NVDA", "MSFT", "GOOGL"]
+    results = portfolio.analyze_portfolio(watchlist)
+
+    print("\n=== PORTFOLIO SUMMARY ===")
+    print(results.to_string())
@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from pipeline_metrics import stage
+from clients import get_http_session, mock_server_url
+
+load_dotenv()
+
+DEFAULT_PRICE_CACHE_DIR = os.getenv('PRICE_CACHE_DIR', os.path.join('.cache', 'prices'))
+
+# Yahoo's daily chart endpoint; used directly (instead of through yfinance) in replay mode
+CHART_URL = "https://query2.finance.yahoo.com/v8/finance/chart/{ticker}"
+
+# Corporate-action columns saved alongside the auto-adjusted prices
+ACTION_COLUMNS = ['Dividends', 'Stock Splits']
+
+# An empty download this short is a weekend or holiday and counts as covered; a longer one means the
+# download failed and is retried next time
+MAX_EMPTY_RANGE_DAYS = 4
+
+def recent_window(days):
+    """(start, end) covering the last `days` calendar days up to and including today"""
+    today = datetime.now().date()
+    return today - timedelta(days=days), today + timedelta(days=1)
+
+def fetch_chart(ticker, start, end):
+    """(adjusted daily OHLCV frame, chart metadata) for start <= date < end from Yahoo's chart API"""
+    response = get_http_session().get(
+        CHART_URL.format(ticker=ticker),
+        params={'period1': int(pd.Timestamp(start, tz='UTC').timestamp()),
+                'period2': int(pd.Timestamp(end, tz='UTC').timestamp()),
+                'interval': '1d', 'events': 'div,splits'},
+        timeout=30
+    )
+    response.raise_for_status()
+    result = response.json()['chart']['result'][0]
+
+    quote = result['indicators']['quote'][0]
+    frame = pd.DataFrame({
+        'Open': quote['open'],
+        'High': quote['high'],
+        'Low': quote['low'],
+        'Close': quote['close'],
+        'Volume': quote['volume']
+    }, index=pd.to_datetime(result.get('timestamp', []), unit='s').normalize(), dtype=float)
+
+    # Same columns as yf.download(auto_adjust=True, actions=True): prices scaled to the adjusted close
+    adjclose = result['indicators'].get('adjclose')
+    if adjclose:
+        ratio = pd.Series(adjclose[0]['adjclose'], index=frame.index, dtype=float) / frame['Close']
+        frame[['Open', 'High', 'Low', 'Close']] = frame[['Open', 'High', 'Low', 'Close']].mul(ratio, axis=0)
+    frame['Dividends'] = 0.0
+    frame['Stock Splits'] = 0.0
+    frame.index.name = 'Date'
+    return frame, result.get('meta', {})
+
+class PriceStore:
+    def __init__(self, cache_dir=DEFAULT_PRICE_CACHE_DIR, live_ttl_seconds=900):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        
+        # How long today's partial bar is trusted before it is downloaded again
+        self.live_ttl_seconds = live_ttl_seconds
+
+        # Guards the read-merge-write of a ticker's files; downloads run outside it
+        self.lock = threading.Lock()
+
+    def _data_path(self, ticker):
+        return os.path.join(self.cache_dir, f"{ticker.upper()}.parquet")
+
+    def _meta_path(self, ticker):
+        return os.path.join(self.cache_dir, f"{ticker.upper()}.json")
+
+    @staticmethod
+    def _day(value):
+        """Normalize dates, datetimes and strings to a tz-naive midnight Timestamp"""
+        ts = pd.Timestamp(value)
+        if ts.tzinfo is not None:
+            ts = ts.tz_localize(None)
+        return ts.normalize()
+
+    def _load_meta(self, ticker):
+        try:
+            with open(self._meta_path(ticker)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load_coverage(self, ticker):
+        """The contiguous [start, end) range already downloaded for a ticker, or None"""
+        meta = self._load_meta(ticker)
+        if meta is None:
+            return None
+
+        start, end = pd.Timestamp(meta['start']), pd.Timestamp(meta['end'])
+
+        # A recent download of today's bar counts as covering today
+        if time.time() < meta.get('live_until', 0):
+            end = max(end, self._day(datetime.now()) + pd.Timedelta(days=1))
+        return start, end
+
+    def _load_data(self, ticker):
+        path = self._data_path(ticker)
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path)
+
+    def _missing_ranges(self, ticker, start, end):
+        """Sub-ranges of [start, end) not covered yet, keeping coverage contiguous"""
+        coverage = self._load_coverage(ticker)
+        if coverage is None:
+            return [(start, end)]
+
+        covered_start, covered_end = coverage
+        missing = []
+        if start < covered_start:
+            missing.append((start, covered_start))
+        if end > covered_end:
+            missing.append((covered_end, end))
+        return missing
+
+    def _save(self, ticker, new_data, start, end):
+        """Merge freshly downloaded rows into the ticker's file and extend its coverage"""
+        # Today's bar is still moving, so coverage stops at midnight and today is only
+        # trusted for live_ttl_seconds
+        today = self._day(datetime.now())
+
+        with self.lock:
+            meta = self._load_meta(ticker)
+            if not new_data.empty:
+                existing = self._load_data(ticker)
+                if existing is not None and self._has_new_actions(existing, new_data):
+                    # Prices are auto-adjusted as of download time, so a split or dividend the cache has
+                    # not seen puts every cached row on a stale basis: keep only the fresh rows and let
+                    # the rest be downloaded again
+                    print(f"♻️  New split/dividend for {ticker}, discarding previously cached prices")
+                    existing, meta = None, None
+                if existing is not None:
+                    combined = pd.concat([existing, new_data])
+                    combined = combined[~combined.index.duplicated(keep='last')]
+                else:
+                    combined = new_data
+                combined.sort_index().to_parquet(self._data_path(ticker))
+
+            new_start, new_end = start, min(end, today)
+            if meta is not None:
+                new_start = min(new_start, pd.Timestamp(meta['start']))
+                new_end = max(new_end, pd.Timestamp(meta['end']))
+
+            meta = {'start': new_start.isoformat(), 'end': new_end.isoformat()}
+            if end > today:
+                meta['live_until'] = time.time() + self.live_ttl_seconds
+
+            # Write-then-rename so readers in other processes never see a half-written file
+            tmp_path = self._meta_path(ticker) + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, self._meta_path(ticker))
+
+    def _download_charts(self, tickers, start, end):
+        """Replay-mode stand-in for yf.download(group_by='ticker'): one chart request per ticker"""
+        frames = {}
+        for ticker in tickers:
+            try:
+                frames[ticker] = fetch_chart(ticker, start, end)[0]
+            except Exception as e:
+                print(f"❌ Error downloading {ticker} chart: {e}")
+        if not frames:
+            raise RuntimeError(f"every chart request failed for {', '.join(tickers)}")
+        return pd.concat(frames, axis=1)
+
+    @staticmethod
+    def _has_new_actions(existing, new_data):
+        """Whether new_data has a split or dividend, dated after some cached row, that the cache lacks"""
+        if not set(ACTION_COLUMNS) <= set(new_data.columns):
+            return False
+        actions = new_data[ACTION_COLUMNS].fillna(0)
+        action_dates = new_data.index[(actions != 0).any(axis=1)]
+        if existing.empty or not len(action_dates):
+            return False
+
+        if set(ACTION_COLUMNS) <= set(existing.columns):
+            known = existing[ACTION_COLUMNS].fillna(0)
+            known_dates = existing.index[(known != 0).any(axis=1)]
+        else:
+            known_dates = existing.index[:0]
+        new_dates = action_dates.difference(known_dates)
+
+        # Actions before the first cached row are already reflected in the cache's basis
+        return bool(len(new_dates)) and new_dates.max() > existing.index.min()
+
+    def prefetch(self, tickers, start, end):
+        """Download whatever is missing for many tickers, one bulk call per distinct date range"""
+        start, end = self._day(start), self._day(end)
+
+        # Tickers missing the same range are downloaded together
+        requests_by_range = {}
+        for ticker in tickers:
+            for missing in self._missing_ranges(ticker, start, end):
+                requests_by_range.setdefault(missing, []).append(ticker)
+
+        replay = mock_server_url() is not None
+        if requests_by_range and not replay:
+            # yfinance is only loaded when something actually has to be downloaded
+            import yfinance as yf
+        
+        for (range_start, range_end), range_tickers in requests_by_range.items():
+            try:
+                print(f"📥 Downloading {len(range_tickers)} tickers "
+                      f"({range_start.strftime('%Y-%m-%d')} → {range_end.strftime('%Y-%m-%d')})...")
+                with stage('price_download', tickers=len(range_tickers)):
+                    if replay:
+                        data = self._download_charts(range_tickers, range_start, range_end)
+                    else:
+                        data = yf.download(
+                            range_tickers,
+                            start=range_start,
+                            end=range_end,
+                            group_by='ticker',
+                            auto_adjust=True,
+                            actions=True,
+                            progress=False,
+                            threads=True
+                        )
+            except Exception as e:
+                print(f"❌ Error downloading price data: {e}")
+                continue
+
+            if data is None or data.empty:
+                # Nothing traded (weekend or holiday): remember that, so the range is not requested again
+                if (range_end - range_start).days <= MAX_EMPTY_RANGE_DAYS:
+                    for ticker in range_tickers:
+                        self._save(ticker, pd.DataFrame(), range_start, range_end)
+                continue
+
+            for ticker in range_tickers:
+                if isinstance(data.columns, pd.MultiIndex):
+                    if ticker not in data.columns.get_level_values(0):
+                        continue
+                    ticker_data = data[ticker]
+                else:
+                    ticker_data = data
+
+                # Bulk downloads pad every ticker to the union of trading days;
+                # an all-empty column means the ticker failed, so leave it uncovered
+                if ticker_data['Close'].isna().all():
+                    continue
+                ticker_data = ticker_data.dropna(subset=['Close'])
+
+                ticker_data.index = pd.DatetimeIndex(ticker_data.index).tz_localize(None)
+                ticker_data.columns.name = None
+                self._save(ticker, ticker_data, range_start, range_end)
+
+    def get_history(self, ticker, start, end):
+        """OHLCV rows for ticker with start <= date < end, downloading only what is missing"""
+        start, end = self._day(start), self._day(end)
+        self.prefetch([ticker], start, end)
+
+        data = self._load_data(ticker)
+        if data is None:
+            return pd.DataFrame()
+        return data[(data.index >= start) & (data.index < end)]
+
+# Test it
+if __name__ == "__main__":
+    store = PriceStore()
+
+    start, end = recent_window(90)
+    store.prefetch(["AAPL", "MSFT", "NVDA"], start, end)
+
+    # Served from the local cache without another download
+    hist = store.get_history("AAPL", *recent_window(30))
+    print(f"AAPL rows in the last 30 days: {len(hist)}")
+    if not hist.empty:
+        print(hist.tail())
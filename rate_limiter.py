@@ -0,0 +1,105 @@
+import time
+import threading
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        # Refills `rate` tokens per second, holding at most `capacity` (the allowed burst)
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if they are available right now, without waiting"""
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """Block until tokens are available, then take them"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+class AIMDLimiter:
+    def __init__(self, max_limit, min_limit=1, increase=1.0, decrease=0.5):
+        # Concurrency cap that grows by `increase` per limit's worth of successes (about one step per
+        # round of calls) and is multiplied by `decrease` on an overload signal, like TCP congestion control.
+        # As in TCP, one round of overloads counts once: calls that started before the last decrease were
+        # sent at the old limit, so their overloads are ignored
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.last_decrease = float('-inf')
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Block until fewer than `limit` calls are in flight, then take a slot; returns the start time"""
+        with self.condition:
+            while self.in_flight >= max(self.min_limit, int(self.limit)):
+                self.condition.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def on_success(self):
+        with self.condition:
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+            self.condition.notify_all()
+
+    def on_overload(self, started_at=None):
+        """Shrink the limit for an overloaded call that started at started_at (from acquire); returns whether
+        it shrank, which it does not for calls already in flight at the last decrease"""
+        with self.condition:
+            if started_at is not None and started_at <= self.last_decrease:
+                return False
+            self.limit = max(self.min_limit, self.limit * self.decrease)
+            self.last_decrease = time.monotonic()
+            return True
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+# Test it
+if __name__ == "__main__":
+    bucket = TokenBucket(rate=2, capacity=2)
+
+    start = time.monotonic()
+    for i in range(6):
+        bucket.acquire()
+        print(f"Request {i + 1} at {time.monotonic() - start:.2f}s")
+
+    limiter = AIMDLimiter(max_limit=8)
+    started = [limiter.acquire() for _ in range(4)]
+    for started_at in started:
+        limiter.on_overload(started_at)
+        limiter.release()
+    print(f"\nAIMD limit after 4 concurrent 429s: {limiter.limit:.1f}")
+    for _ in range(20):
+        limiter.on_success()
+    print(f"AIMD limit after 20 successes: {limiter.limit:.1f}")
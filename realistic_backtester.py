@@ -1,46 +1,65 @@
-import yfinance as yf
+import zlib
 import pandas as pd
 from datetime import datetime, timedelta
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from price_store import PriceStore
+
+# History used by simulate_algorithm_performance
+SIMULATION_MONTHS_BACK = 3
+
+def ticker_seed(root_seed, ticker):
+    """Per-ticker seed derived from the run's root seed and the ticker symbol alone,
+    so results do not depend on ticker order or worker count"""
+    return np.random.SeedSequence([root_seed.entropy, zlib.crc32(ticker.encode('utf-8'))])
+
+def _simulate_ticker(args):
+    """Process-pool entry point: simulate one ticker against the shared on-disk price cache"""
+    ticker, seed, n_simulations, cache_dir = args
+    print(f"\n" + "="*50)
+    backtester = RealisticBacktester(PriceStore(cache_dir))
+    return backtester.simulate_algorithm_performance(ticker, seed=seed, n_simulations=n_simulations)
 
 class RealisticBacktester:
-    def __init__(self):
-        pass
+    def __init__(self, price_store=None):
+        # Shared, locally cached price history (see price_store.py)
+        self.price_store = price_store or PriceStore()
     
     def get_stock_performance_periods(self, ticker, months_back=6):
-        """Get historical periods where we can measure prediction accuracy"""
+        """Get historical weekly periods (one row each) where we can measure prediction accuracy"""
         try:
             # Get 6 months of historical data
             end_date = datetime.now()
             start_date = end_date - timedelta(days=months_back * 30)
             
-            stock = yf.Ticker(ticker)
-            hist = stock.history(start=start_date, end=end_date)
+            hist = self.price_store.get_history(ticker, start_date, end_date)
             
             if len(hist) < 30:
                 return None
             
-            # Create weekly performance periods
-            weekly_periods = []
-            for i in range(0, len(hist) - 7, 7):  # Every 7 days
-                period_start = hist.index[i]
-                period_end = hist.index[min(i + 7, len(hist) - 1)]
-                
-                start_price = hist['Close'].iloc[i]
-                end_price = hist['Close'].iloc[min(i + 7, len(hist) - 1)]
-                
-                weekly_return = (end_price - start_price) / start_price * 100
-                volatility = hist['Close'].iloc[i:i+7].pct_change().std() * 100
-                
-                weekly_periods.append({
-                    'start_date': period_start,
-                    'end_date': period_end,
-                    'start_price': start_price,
-                    'end_price': end_price,
-                    'return_pct': weekly_return,
-                    'volatility': volatility,
-                    'market_direction': 'up' if weekly_return > 0 else 'down'
-                })
+            # Create weekly performance periods: one every 7 trading days, computed over whole arrays
+            close = hist['Close'].to_numpy()
+            starts = np.arange(0, len(hist) - 7, 7)
+            ends = starts + 7
+            
+            start_prices = close[starts]
+            end_prices = close[ends]
+            weekly_returns = (end_prices - start_prices) / start_prices * 100
+            
+            # Std of the 6 daily returns between closes i..i+6, read off a rolling window
+            # that ends at i+6
+            rolling_volatility = hist['Close'].pct_change().rolling(6).std().to_numpy() * 100
+            volatility = rolling_volatility[starts + 6]
+            
+            weekly_periods = pd.DataFrame({
+                'start_date': hist.index[starts],
+                'end_date': hist.index[ends],
+                'start_price': start_prices,
+                'end_price': end_prices,
+                'return_pct': weekly_returns,
+                'volatility': volatility,
+                'market_direction': np.where(weekly_returns > 0, 'up', 'down')
+            })
             
             return weekly_periods
             
@@ -48,64 +67,77 @@ class RealisticBacktester:
             print(f"Error getting historical periods: {e}")
             return None
     
-    def simulate_algorithm_performance(self, ticker):
+    def simulate_sentiments(self, periods, rng, n_simulations=1):
+        """Draw simulated AI sentiments for every period and replication in one call"""
+        # Simulate what our AI might have predicted, based on volatility and recent trends
+        returns = periods['return_pct'].to_numpy()
+        volatility = periods['volatility'].to_numpy()
+        prev_return = np.concatenate([[0.0], returns[:-1]])
+        
+        # Contrarian sentiment logic (markets often do opposite of obvious trends).
+        # np.select takes the first matching regime, like an if/elif chain
+        regimes = [
+            (prev_return > 3) & (volatility < 2),   # After big gains with low volatility, market might correct
+            (prev_return < -3) & (volatility > 4),  # After big losses with high volatility, market might bounce
+            volatility > 5,                         # High volatility periods often mean uncertainty
+        ]
+        means = np.select(regimes, [-0.2, 0.3, -0.1], default=0.1)  # Normal conditions: slight bullish bias
+        stds = np.select(regimes, [0.2, 0.2, 0.3], default=0.2)
+        
+        # Shape (n_simulations, n_periods); cap sentiment between -1 and 1
+        sentiments = rng.normal(means, stds, size=(n_simulations, len(periods)))
+        return np.clip(sentiments, -1, 1)
+    
+    def simulate_algorithm_performance(self, ticker, seed=None, n_simulations=1):
         """Simulate how our algorithm would have performed historically"""
         print(f"\n📊 SIMULATING ALGORITHM PERFORMANCE FOR {ticker}")
         
-        periods = self.get_stock_performance_periods(ticker, months_back=3)
-        if not periods:
+        periods = self.get_stock_performance_periods(ticker, months_back=SIMULATION_MONTHS_BACK)
+        if periods is None or periods.empty:
             print("Could not get historical data")
             return None
         
         print(f"Testing across {len(periods)} historical weekly periods...")
         
-        # Simulate algorithm predictions based on market patterns
-        results = []
+        # Seeded generator: the same seed reproduces the same run
+        rng = np.random.default_rng(seed)
+        sentiments = self.simulate_sentiments(periods, rng, n_simulations)
         
-        for i, period in enumerate(periods):
-            # Simulate what our AI might have predicted
-            # Based on volatility and recent trends
-            
-            prev_return = periods[i-1]['return_pct'] if i > 0 else 0
-            volatility = period['volatility']
-            
-            # Contrarian sentiment logic (markets often do opposite of obvious trends)
-            if prev_return > 3 and volatility < 2:
-                # After big gains with low volatility, market might correct
-                simulated_sentiment = np.random.normal(-0.2, 0.2)  # Slightly bearish
-            elif prev_return < -3 and volatility > 4:
-                # After big losses with high volatility, market might bounce
-                simulated_sentiment = np.random.normal(0.3, 0.2)  # Bullish
-            elif volatility > 5:
-                # High volatility periods often mean uncertainty
-                simulated_sentiment = np.random.normal(-0.1, 0.3)  # Slight bearish bias
-            else:
-                # Normal conditions
-                simulated_sentiment = np.random.normal(0.1, 0.2)  # Slight bullish bias
-                        
-            # Cap sentiment between -1 and 1
-            simulated_sentiment = max(-1, min(1, simulated_sentiment))
-            
-            # Determine AI prediction
-            ai_bullish = simulated_sentiment > 0.2
-            ai_bearish = simulated_sentiment < -0.2
-            actual_up = period['return_pct'] > 0
-            
-            # Check if prediction was correct
-            correct = (ai_bullish and actual_up) or (ai_bearish and not actual_up) or (abs(simulated_sentiment) <= 0.2)
-            
-            results.append({
-                'week': i + 1,
-                'date': period['start_date'].strftime('%Y-%m-%d'),
-                'simulated_sentiment': simulated_sentiment,
-                'actual_return': period['return_pct'],
-                'ai_prediction': 'BUY' if ai_bullish else 'SELL' if ai_bearish else 'HOLD',
-                'market_result': 'UP' if actual_up else 'DOWN',
-                'correct': correct,
-                'volatility': volatility
-            })
+        # Determine AI predictions and check them against the market, all replications at once
+        ai_bullish = sentiments > 0.2
+        ai_bearish = sentiments < -0.2
+        actual_up = periods['return_pct'].to_numpy() > 0
+        correct = (ai_bullish & actual_up) | (ai_bearish & ~actual_up) | (np.abs(sentiments) <= 0.2)
+        
+        # The first replication supplies the week-by-week detail
+        results = pd.DataFrame({
+            'week': np.arange(1, len(periods) + 1),
+            'date': periods['start_date'].dt.strftime('%Y-%m-%d'),
+            'simulated_sentiment': sentiments[0],
+            'actual_return': periods['return_pct'],
+            'ai_prediction': np.where(ai_bullish[0], 'BUY', np.where(ai_bearish[0], 'SELL', 'HOLD')),
+            'market_result': np.where(actual_up, 'UP', 'DOWN'),
+            'correct': correct[0],
+            'volatility': periods['volatility']
+        }).to_dict('records')
+        
+        summary = self.analyze_backtest_results(results, ticker)
         
-        return self.analyze_backtest_results(results, ticker)
+        if n_simulations > 1:
+            accuracies = correct.mean(axis=1) * 100
+            summary['accuracy_distribution'] = {
+                'simulations': n_simulations,
+                'mean': float(accuracies.mean()),
+                'std': float(accuracies.std()),
+                'p5': float(np.percentile(accuracies, 5)),
+                'p50': float(np.percentile(accuracies, 50)),
+                'p95': float(np.percentile(accuracies, 95))
+            }
+            dist = summary['accuracy_distribution']
+            print(f"\n🎲 MONTE CARLO ({n_simulations} runs): accuracy {dist['mean']:.1f}% ± {dist['std']:.1f}% "
+                  f"(5th-95th pct: {dist['p5']:.1f}%-{dist['p95']:.1f}%)")
+        
+        return summary
     
     def analyze_backtest_results(self, results, ticker):
         """Analyze backtest performance metrics"""
@@ -142,17 +174,39 @@ class RealisticBacktester:
             'avg_sell_return': avg_sell_return,
             'detailed_results': results
         }
-    def test_multiple_stocks(self, tickers):
-        """Test algorithm across multiple stocks"""
+    
+    def prefetch_prices(self, tickers):
+        """One bulk download of the price history every simulation for these tickers reads"""
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=SIMULATION_MONTHS_BACK * 30)
+        self.price_store.prefetch(list(tickers), start_date, end_date)
+    
+    def test_multiple_stocks(self, tickers, max_workers=1, seed=None, n_simulations=1):
+        """Test algorithm across multiple stocks (max_workers > 1 spreads them over a process pool)"""
         print(f"\n🔬 MULTI-STOCK BACKTESTING")
         print(f"Testing {len(tickers)} stocks...")
         
         all_results = {}
         summary_stats = []
         
-        for ticker in tickers:
-            print(f"\n" + "="*50)
-            result = self.simulate_algorithm_performance(ticker)
+        # Fetch every ticker's history up front in one bulk download, so simulations only hit the local cache
+        self.prefetch_prices(tickers)
+        
+        root_seed = np.random.SeedSequence(seed)
+        seeds = [ticker_seed(root_seed, ticker) for ticker in tickers]
+        
+        if max_workers > 1:
+            jobs = [(ticker, seed_seq, n_simulations, self.price_store.cache_dir)
+                    for ticker, seed_seq in zip(tickers, seeds)]
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(_simulate_ticker, jobs))
+        else:
+            results = []
+            for ticker, seed_seq in zip(tickers, seeds):
+                print(f"\n" + "="*50)
+                results.append(self.simulate_algorithm_performance(ticker, seed=seed_seq, n_simulations=n_simulations))
+        
+        for ticker, result in zip(tickers, results):
             if result:
                 all_results[ticker] = result
                 summary_stats.append({
@@ -185,4 +239,4 @@ if __name__ == "__main__":
     # Test multiple major stocks
     test_stocks = ["AAPL", "TSLA", "NVDA", "MSFT", "GOOGL"]
     
-    results = backtester.test_multiple_stocks(test_stocks)
+    results = backtester.test_multiple_stocks(test_stocks, max_workers=4, seed=42)
@@ -0,0 +1,228 @@
+import re
+import time
+import random
+import threading
+from rate_limiter import AIMDLimiter
+from pipeline_metrics import increment
+
+# Statuses worth retrying: timeouts, conflicts, rate limits and server-side errors
+RETRYABLE_STATUSES = {408, 409, 429}
+RETRYABLE_ERRORS = ('APITimeoutError', 'APIConnectionError', 'Timeout', 'ConnectionError')
+
+# Seconds one request may take before it is abandoned and retried (the SDK's own default is 600)
+DEFAULT_REQUEST_TIMEOUT = 60.0
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the circuit breaker is open"""
+
+def status_code(error):
+    return getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+
+def is_transient(error):
+    """Whether an LLM call failure is worth retrying (rate limits, timeouts, 5xx, dropped connections)"""
+    status = status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES or status >= 500
+    return isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in RETRYABLE_ERRORS
+
+def parse_duration(value):
+    """Seconds in an OpenAI reset header ("1s", "6m0s", "20ms", "0.5") or None"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value)
+    if not parts:
+        return None
+    scale = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+def retry_after(headers):
+    """Server-requested wait in seconds from retry-after-ms / retry-after headers, or None"""
+    if not headers:
+        return None
+    if headers.get('retry-after-ms'):
+        return parse_duration(headers['retry-after-ms'] + 'ms')
+    return parse_duration(headers.get('retry-after'))
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, cooldown_seconds=30.0):
+        # Opens after failure_threshold transient failures in a row; after cooldown_seconds one probe call
+        # is let through (half-open), and its outcome closes or re-opens the circuit
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half_open' if time.monotonic() - self.opened_at >= self.cooldown_seconds else 'open'
+
+    def allow(self):
+        """Whether a call may go out now"""
+        with self.lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_neutral(self):
+        """An outcome that says nothing about health (a 429): counts stay, but a half-open probe is freed"""
+        with self.lock:
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self.probing:
+                    increment('llm_circuit_opened')
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+class ResilientLLM:
+    def __init__(self, get_client, max_concurrency=5, max_retries=4, base_delay=0.5, max_delay=30.0,
+                 failure_threshold=5, cooldown_seconds=30.0, request_timeout=DEFAULT_REQUEST_TIMEOUT):
+        # Chat completions with retries, header-aware throttling, an adaptive concurrency cap and a circuit
+        # breaker; get_client is called per request so the analyzer's lazy, swappable client is honoured
+        self.get_client = get_client
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiter = AIMDLimiter(max_limit=max_concurrency)
+        self.breaker = CircuitBreaker(failure_threshold, cooldown_seconds)
+
+        # Monotonic time before which no new request is sent (set from rate-limit headers)
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff: uniform in [0, min(max_delay, base_delay * 2^attempt)]"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def wait_for_quota(self):
+        while True:
+            with self.lock:
+                wait = self.paused_until - time.monotonic()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def observe_headers(self, headers):
+        """Hold new requests until the window resets once the server reports no requests left"""
+        if not headers:
+            return
+        remaining = headers.get('x-ratelimit-remaining-requests')
+        if remaining is not None and remaining.isdigit() and int(remaining) == 0:
+            reset = parse_duration(headers.get('x-ratelimit-reset-requests'))
+            if reset:
+                increment('llm_throttled')
+                self.pause(reset)
+
+    def send(self, **params):
+        """One request; returns (response, headers), reading headers when the client exposes them"""
+        completions = self.get_client().chat.completions
+        params.setdefault('timeout', self.request_timeout)
+        raw_api = getattr(completions, 'with_raw_response', None)
+        if raw_api is None:
+            return completions.create(**params), None
+        raw = raw_api.create(**params)
+        return raw.parse(), raw.headers
+
+    def create(self, **params):
+        """chat.completions.create with retries; raises CircuitOpenError while the breaker is open"""
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"LLM circuit open after {self.breaker.failures} consecutive failures")
+
+            self.wait_for_quota()
+            started_at = self.limiter.acquire()
+            try:
+                try:
+                    response, headers = self.send(**params)
+                finally:
+                    self.limiter.release()
+            except Exception as e:
+                rate_limited = status_code(e) == 429
+                if rate_limited:
+                    # A 429 says the service is up but busy: AIMD handles it, the breaker ignores it
+                    self.breaker.record_neutral()
+                elif not is_transient(e):
+                    # The service answered (a 400), so it is up as far as the breaker is concerned;
+                    # only timeouts, 5xx and dropped connections trip it
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+                if not is_transient(e):
+                    raise
+
+                headers = getattr(getattr(e, 'response', None), 'headers', None)
+                delay = retry_after(headers)
+                if rate_limited:
+                    # Overloaded: fewer calls in flight (once per round), and everyone waits out the server's window
+                    self.limiter.on_overload(started_at)
+                    increment('llm_rate_limited')
+                    if delay:
+                        self.pause(delay)
+
+                if attempt == self.max_retries:
+                    raise
+                increment('llm_transient_retries')
+                print(f"⚠️  LLM {type(e).__name__}, retrying ({attempt + 1}/{self.max_retries})...")
+                time.sleep(delay if delay is not None else self.backoff(attempt))
+                continue
+
+            self.limiter.on_success()
+            self.breaker.record_success()
+            self.observe_headers(headers)
+            return response
+
+# Test it
+if __name__ == "__main__":
+    from types import SimpleNamespace
+
+    class FlakyCompletions:
+        """Fails with a 429 and then a 503 before answering"""
+        def __init__(self):
+            self.calls = 0
+
+        def create(self, **params):
+            self.calls += 1
+            if self.calls <= 2:
+                error = Exception("Rate limit reached" if self.calls == 1 else "Service unavailable")
+                error.status_code = 429 if self.calls == 1 else 503
+                raise error
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="SENTIMENT: 0.5"))])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FlakyCompletions()))
+    llm = ResilientLLM(lambda: client, base_delay=0.1)
+    response = llm.create(model="gpt-4o-mini", messages=[])
+    print(f"✅ Answer after {client.chat.completions.calls} calls: {response.choices[0].message.content}, "
+          f"concurrency limit now {llm.limiter.limit:.1f}")
+
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=0.2)
+    breaker.record_failure()
+    breaker.record_failure()
+    print(f"Breaker after 2 failures: {breaker.state}, allows calls: {breaker.allow()}")
+    time.sleep(0.25)
+    print(f"After cooldown: {breaker.state}, probe allowed: {breaker.allow()}, second call allowed: {breaker.allow()}")
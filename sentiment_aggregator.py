@@ -0,0 +1,170 @@
+import math
+import time
+import bisect
+from collections import deque
+from datetime import datetime, timezone
+
+# Re-anchor the decay reference once exp() of the newest offset gets this large, long before float overflow
+REBASE_EXPONENT = 300.0
+
+def to_epoch(value):
+    """Seconds since the epoch for an ISO timestamp, datetime or number (naive datetimes are UTC)"""
+    if value is None:
+        return time.time()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class SentimentAggregator:
+    def __init__(self, window_hours=120, half_life_hours=24):
+        # Analyses older than window_hours are expired; None keeps everything
+        self.window = window_hours * 3600 if window_hours else None
+
+        # Exponential time decay: an article's weight halves every half_life_hours (None = no decay)
+        self.decay_rate = math.log(2) / (half_life_hours * 3600) if half_life_hours else 0.0
+
+        # (published_at, quality_weight, analysis) in publish order, oldest first
+        self.entries = deque()
+
+        # Decay is applied as exp(rate * (t - reference)), so the sums never need rescanning:
+        # every entry's weight shrinks by the same factor as time passes, which cancels in the averages
+        self.reference = None
+        self.reset_sums()
+
+    def reset_sums(self):
+        self.weight_sum = 0.0           # Σ decay × quality weight
+        self.weighted_sentiment = 0.0   # Σ decay × quality weight × sentiment
+        self.decay_sum = 0.0            # Σ decay
+        self.decayed_confidence = 0.0   # Σ decay × confidence
+        self.decayed_sentiment = 0.0    # Σ decay × sentiment
+        self.buy_signals = 0
+        self.sell_signals = 0
+        self.high_relevance = 0
+
+    def _decay(self, published_at):
+        return math.exp(self.decay_rate * (published_at - self.reference))
+
+    def _rebase(self, reference):
+        """Move the decay reference forward, rescaling the sums so nothing else changes"""
+        scale = math.exp(-self.decay_rate * (reference - self.reference))
+        self.weight_sum *= scale
+        self.weighted_sentiment *= scale
+        self.decay_sum *= scale
+        self.decayed_confidence *= scale
+        self.decayed_sentiment *= scale
+        self.reference = reference
+
+    def _apply(self, published_at, weight, analysis, sign):
+        decay = self._decay(published_at) * sign
+        self.weight_sum += decay * weight
+        self.weighted_sentiment += decay * weight * analysis['sentiment']
+        self.decay_sum += decay
+        self.decayed_confidence += decay * analysis.get('confidence', 0.5)
+        self.decayed_sentiment += decay * analysis['sentiment']
+
+        count = 1 if sign > 0 else -1
+        if analysis['signal'] == 'BUY':
+            self.buy_signals += count
+        elif analysis['signal'] == 'SELL':
+            self.sell_signals += count
+        if analysis.get('relevance') == 'HIGH':
+            self.high_relevance += count
+
+    def add(self, analysis, published_at=None):
+        """Add one analysis (weighted by its quality_weight, default 1.0) published at published_at"""
+        published_at = to_epoch(published_at if published_at is not None else analysis.get('published_at'))
+        weight = analysis.get('quality_weight', 1.0)
+
+        if self.reference is None:
+            self.reference = published_at
+        elif self.decay_rate * (published_at - self.reference) > REBASE_EXPONENT:
+            self._rebase(published_at)
+
+        # Articles usually arrive in publish order (O(1) append); stragglers are slotted into place
+        entry = (published_at, weight, analysis)
+        if not self.entries or published_at >= self.entries[-1][0]:
+            self.entries.append(entry)
+        else:
+            times = [e[0] for e in self.entries]
+            self.entries.insert(bisect.bisect_right(times, published_at), entry)
+
+        self._apply(published_at, weight, analysis, +1)
+
+    def expire(self, now=None):
+        """Drop analyses that have aged out of the window; returns how many were removed"""
+        if self.window is None:
+            return 0
+
+        cutoff = to_epoch(now) - self.window
+        removed = 0
+        while self.entries and self.entries[0][0] < cutoff:
+            published_at, weight, analysis = self.entries.popleft()
+            self._apply(published_at, weight, analysis, -1)
+            removed += 1
+
+        # Subtracting leaves float residue; an empty window starts clean
+        if not self.entries:
+            self.reset_sums()
+            self.reference = None
+        return removed
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def sentiment(self):
+        """Decayed, quality-weighted average sentiment (None when the window is empty)"""
+        return self.weighted_sentiment / self.weight_sum if self.weight_sum > 0 else None
+
+    @property
+    def confidence(self):
+        """Decayed average LLM confidence (None when the window is empty)"""
+        return self.decayed_confidence / self.decay_sum if self.decay_sum > 0 else None
+
+    @property
+    def conviction(self):
+        """HIGH/MEDIUM/LOW, on the same thresholds as AdvancedAnalyzer.calculate_risk_metrics"""
+        confidence = self.confidence or 0.0
+        if confidence > 0.7 and len(self) >= 5:
+            return 'HIGH'
+        if confidence > 0.5 and len(self) >= 3:
+            return 'MEDIUM'
+        return 'LOW'
+
+    @property
+    def direction(self):
+        return "bullish" if self.decayed_sentiment > 0 else "bearish"
+
+    def snapshot(self, now=None):
+        """Expire old analyses, then report the current aggregates"""
+        self.expire(now)
+        return {
+            'avg_sentiment': self.sentiment,
+            'avg_confidence': self.confidence,
+            'conviction_level': self.conviction,
+            'sentiment_direction': self.direction,
+            'total_articles': len(self),
+            'buy_signals': self.buy_signals,
+            'sell_signals': self.sell_signals,
+            'high_relevance_articles': self.high_relevance
+        }
+
+# Test it
+if __name__ == "__main__":
+    aggregator = SentimentAggregator(window_hours=48, half_life_hours=12)
+    start = time.time() - 72 * 3600
+
+    # One article every 6 hours for three days, turning from bearish to bullish
+    for i in range(13):
+        sentiment = -0.6 + 0.1 * i
+        aggregator.add({'sentiment': sentiment, 'confidence': 0.8, 'signal': 'BUY' if sentiment > 0 else 'SELL',
+                        'relevance': 'HIGH', 'quality_weight': 0.7}, start + i * 6 * 3600)
+
+    snapshot = aggregator.snapshot()
+    print(f"Articles in window: {snapshot['total_articles']}")
+    print(f"Decayed sentiment: {snapshot['avg_sentiment']:+.2f} ({snapshot['sentiment_direction']})")
+    print(f"Confidence: {snapshot['avg_confidence']:.2f} | Conviction: {snapshot['conviction_level']}")
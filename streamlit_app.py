@@ -1,7 +1,215 @@
+import time
+import threading
 import streamlit as st
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from advanced_analyzer import AdvancedAnalyzer
 import pandas as pd
 from realistic_backtester import RealisticBacktester
+from pipeline_metrics import metrics
+
+# How long results are reused across reruns and across everyone sharing this deployment
+SENTIMENT_TTL_SECONDS = 15 * 60
+PRICE_TTL_SECONDS = 5 * 60
+BACKTEST_TTL_SECONDS = 60 * 60
+
+# Most tickers whose finished sentiment analyses are kept, least recently used dropped first
+SENTIMENT_MAX_ENTRIES = 100
+
+MULTI_STOCK_TICKERS = ("AAPL", "TSLA", "NVDA", "MSFT", "GOOGL")
+
+@st.cache_resource
+def get_analyzer():
+    """One analyzer (OpenAI client, news collector, caches) per server process"""
+    return AdvancedAnalyzer()
+
+@st.cache_resource
+def get_backtester():
+    return RealisticBacktester()
+
+@st.cache_resource
+def get_backtest_executor():
+    """Background workers for long backtests, shared by all sessions"""
+    return ThreadPoolExecutor(max_workers=4)
+
+@st.cache_resource
+def get_backtest_jobs():
+    """Running and finished multi-stock backtests: tuple of tickers -> {'started_at', 'futures'}"""
+    return {}
+
+class SentimentResults:
+    def __init__(self, ttl_seconds, max_entries):
+        # Finished analyses (ticker -> (finished_at, result)) in least-recently-used order, and an event per
+        # ticker being analyzed right now so a second session waits for that run instead of starting its own
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+    def get(self, ticker):
+        """The fresh result for a ticker, or None"""
+        with self.lock:
+            entry = self.entries.get(ticker)
+            if entry is None:
+                return None
+            if time.time() - entry[0] >= self.ttl_seconds:
+                del self.entries[ticker]
+                return None
+            self.entries.move_to_end(ticker)
+            return entry[1]
+
+    def claim(self, ticker):
+        """(event, owner): owner is True for the caller that should run the analysis and then call finish()"""
+        with self.lock:
+            if ticker in self.in_flight:
+                return self.in_flight[ticker], False
+            event = self.in_flight[ticker] = threading.Event()
+            return event, True
+
+    def finish(self, ticker, result):
+        """Store a run's result (failures are not kept, so the next click tries again) and wake any waiters"""
+        with self.lock:
+            if result:
+                self.entries[ticker] = (time.time(), result)
+                self.entries.move_to_end(ticker)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+            self.in_flight.pop(ticker).set()
+
+@st.cache_resource
+def get_sentiment_results():
+    """Finished sentiment analyses shared by all sessions"""
+    return SentimentResults(SENTIMENT_TTL_SECONDS, SENTIMENT_MAX_ENTRIES)
+
+def load_sentiment(ticker):
+    """Sentiment for a ticker: reused while fresh, otherwise scored live with each article shown as it lands"""
+    results = get_sentiment_results()
+    cached = results.get(ticker)
+    if cached:
+        return cached
+    
+    event, owner = results.claim(ticker)
+    if not owner:
+        with st.spinner(f"Another session is analyzing {ticker}, waiting for its results..."):
+            event.wait()
+        return results.get(ticker)
+    
+    result = None
+    try:
+        result = stream_sentiment(ticker)
+    finally:
+        results.finish(ticker, result)
+    return result
+
+def stream_sentiment(ticker):
+    """Score a ticker live, drawing each article as it lands"""
+    # st.cache_data cannot draw into placeholders made outside it, so live runs fill SentimentResults instead
+    live = st.empty()
+    live.info(f"📰 Fetching and filtering news for {ticker}...")
+    result = None
+    latest = []
+    for event in get_analyzer().iter_stock_sentiment(ticker):
+        if event['type'] == 'result':
+            result = event['result']
+            continue
+        
+        if event['analysis']:
+            latest.insert(0, event['analysis'])
+        with live.container():
+            st.progress(event['completed'] / event['total'], text=f"Scored {event['completed']}/{event['total']} stories")
+            if event['running_sentiment'] is not None:
+                st.metric("Running AI Sentiment", f"{event['running_sentiment']:+.2f}",
+                          help=f"Quality-weighted over the {event['articles_scored']} stories scored so far")
+            for analysis in latest[:5]:
+                st.write(f"{analysis['sentiment']:+.2f} | {analysis['signal']} | {analysis['title'][:70]}")
+    live.empty()
+    return result
+
+@st.cache_data(ttl=PRICE_TTL_SECONDS, show_spinner=False)
+def load_price_data(ticker):
+    return get_analyzer().get_stock_price_data(ticker)
+
+@st.cache_data(ttl=BACKTEST_TTL_SECONDS, show_spinner=False)
+def run_backtest(ticker):
+    return get_backtester().simulate_algorithm_performance(ticker)
+
+def start_multi_backtest(tickers):
+    """Submit one background task per ticker, reusing a job that is still running or fresh"""
+    jobs = get_backtest_jobs()
+    job = jobs.get(tickers)
+    if job:
+        running = not all(f.done() for f in job['futures'].values())
+        if running or time.time() - job['started_at'] < BACKTEST_TTL_SECONDS:
+            return job
+
+    # One bulk price download for every ticker first; each ticker's task waits for it, so the simulations
+    # read the local cache instead of downloading one by one
+    executor = get_backtest_executor()
+    prefetch = executor.submit(get_backtester().prefetch_prices, tickers)
+    jobs[tickers] = {
+        'started_at': time.time(),
+        'futures': {t: executor.submit(simulate_after_prefetch, prefetch, t) for t in tickers}
+    }
+    return jobs[tickers]
+
+def simulate_after_prefetch(prefetch, ticker):
+    """One ticker's backtest once the bulk download is done (if it failed, the ticker fetches its own prices)"""
+    wait([prefetch])
+    return get_backtester().simulate_algorithm_performance(ticker)
+
+def show_multi_backtest(tickers):
+    """Stream per-ticker results as the background job finishes them"""
+    job = get_backtest_jobs().get(tickers)
+    if not job:
+        return
+    
+    # Only this fragment reruns, once a second while the job is running
+    running = not all(f.done() for f in job['futures'].values())
+    st.fragment(run_every=1 if running else None)(render_multi_backtest)(tickers, running)
+
+def render_multi_backtest(tickers, polling):
+    futures = get_backtest_jobs()[tickers]['futures']
+    finished = [t for t in tickers if futures[t].done()]
+    st.progress(len(finished) / len(tickers), text=f"Backtested {len(finished)}/{len(tickers)} stocks")
+
+    multi_results = {}
+    for t in finished:
+        try:
+            result = futures[t].result()
+        except Exception as e:
+            st.write(f"**{t}**: ❌ {e}")
+            continue
+        if result:
+            multi_results[t] = result
+
+    if len(finished) < len(tickers):
+        # Show what is done so far; the fragment timer polls again
+        for t, result in multi_results.items():
+            st.write(f"**{t}**: {result['accuracy']:.1f}% accuracy, {result['avg_buy_return']:+.1f}% avg BUY return")
+        return
+    
+    if polling:
+        # Job just finished: one full rerun redraws it without the poll timer
+        st.rerun()
+
+    if multi_results:
+        st.success("✅ Multi-Stock Backtest Complete!")
+        
+        # Calculate summary stats
+        accuracies = [r['accuracy'] for r in multi_results.values()]
+        buy_returns = [r['avg_buy_return'] for r in multi_results.values()]
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Average Accuracy", f"{sum(accuracies)/len(accuracies):.1f}%")
+        with col2:
+            st.metric("Average BUY Return", f"{sum(buy_returns)/len(buy_returns):+.1f}%")
+        
+        # Show individual results
+        st.write("**Individual Stock Performance:**")
+        for t, result in multi_results.items():
+            st.write(f"**{t}**: {result['accuracy']:.1f}% accuracy, {result['avg_buy_return']:+.1f}% avg BUY return")
 
 
 st.title("🤖 Enhanced AI Stock Analyzer")
@@ -16,21 +224,30 @@ with col2:
     st.write("")
     analyze_button = st.button("Analyze Stock", type="primary")
 
+# Remember the analyzed ticker so the results survive reruns triggered by other widgets
 if analyze_button:
-    with st.spinner(f"Analyzing {ticker}..."):
-        analyzer = AdvancedAnalyzer()
-        
-        # Get all data
-        sentiment_result = analyzer.analyze_stock_sentiment(ticker)
-        price_data = analyzer.get_stock_price_data(ticker)
+    st.session_state['analyzed_ticker'] = ticker
+
+analyzed_ticker = st.session_state.get('analyzed_ticker')
+if analyzed_ticker:
+    analyzer = get_analyzer()
+    
+    # Get all data (cached per ticker, so repeat clicks are instant; fresh runs stream per-article progress)
+    sentiment_result = load_sentiment(analyzed_ticker)
+    with st.spinner(f"Analyzing {analyzed_ticker}..."):
+        price_data = load_price_data(analyzed_ticker)
         
         if sentiment_result and price_data:
             risk_metrics = analyzer.calculate_risk_metrics(
                 sentiment_result['detailed_analyses'], 
-                price_data
+                price_data,
+                ticker=analyzed_ticker
             )
             # Show filtering effectiveness
             st.info(f"📰 Analyzed {sentiment_result['filtered_articles_count']} high-quality articles (filtered from {sentiment_result['raw_articles_count']} total)")
+            if sentiment_result.get('fallback_analyses'):
+                st.warning(f"⚠️ {len(sentiment_result['fallback_analyses'])} stories could not be scored by the AI; "
+                           f"their local scores count at reduced weight")
             # Main metrics
             col1, col2, col3, col4 = st.columns(4)
             with col1:
@@ -83,6 +300,27 @@ if analyze_button:
             with st.expander("📊 Detailed Article Analysis"):
                 df = pd.DataFrame(sentiment_result['detailed_analyses'])
                 st.dataframe(df[['sentiment', 'confidence', 'signal', 'relevance', 'title']])
+            
+            # Where the time went, per pipeline stage (cumulative for this server process)
+            with st.expander("⏱️ Pipeline Timing"):
+                stages = pd.DataFrame(metrics.breakdown(analyzed_ticker))
+                if stages.empty:
+                    st.write("No timings recorded for this ticker yet")
+                else:
+                    st.dataframe(stages[['stage', 'calls', 'errors', 'total_ms', 'mean_ms', 'max_ms']].round(1),
+                                 hide_index=True)
+                
+                counters = metrics.counter_totals(analyzed_ticker)
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("LLM Tokens", int(counters.get('llm_prompt_tokens', 0) + counters.get('llm_completion_tokens', 0)))
+                with col2:
+                    st.metric("LLM Cache Hits", int(counters.get('llm_cache_hits', 0)))
+                with col3:
+                    st.metric("Scored Locally", int(counters.get('local_scored', 0)))
+                with col4:
+                    st.metric("Retries", int(counters.get('news_retries', 0) + counters.get('llm_transient_retries', 0)),
+                              help="NewsAPI and LLM requests retried after a transient error")
         
         else:
             st.error("❌ Could not analyze - check ticker symbol")
@@ -95,8 +333,7 @@ col1, col2 = st.columns([1, 1])
 with col1:
     if st.button("Run Backtest for This Stock"):
         with st.spinner("Running backtest simulation..."):
-            backtester = RealisticBacktester()
-            backtest_result = backtester.simulate_algorithm_performance(ticker)
+            backtest_result = run_backtest(ticker)
             
             if backtest_result:
                 st.success(f"✅ Backtest Complete!")
@@ -118,28 +355,12 @@ with col1:
 
 with col2:
     if st.button("Multi-Stock Backtest"):
-        with st.spinner("Testing algorithm across multiple stocks..."):
-            backtester = RealisticBacktester()
-            test_stocks = ["AAPL", "TSLA", "NVDA", "MSFT", "GOOGL"]
-            multi_results = backtester.test_multiple_stocks(test_stocks)
-            
-            if multi_results:
-                st.success("✅ Multi-Stock Backtest Complete!")
-                
-                # Calculate summary stats
-                accuracies = [r['accuracy'] for r in multi_results.values()]
-                buy_returns = [r['avg_buy_return'] for r in multi_results.values()]
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.metric("Average Accuracy", f"{sum(accuracies)/len(accuracies):.1f}%")
-                with col2:
-                    st.metric("Average BUY Return", f"{sum(buy_returns)/len(buy_returns):+.1f}%")
-                
-                # Show individual results
-                st.write("**Individual Stock Performance:**")
-                for ticker, result in multi_results.items():
-                    st.write(f"**{ticker}**: {result['accuracy']:.1f}% accuracy, {result['avg_buy_return']:+.1f}% avg BUY return")
+        # Runs in the background; progress streams in below without blocking the page
+        start_multi_backtest(MULTI_STOCK_TICKERS)
+        st.session_state['multi_backtest'] = MULTI_STOCK_TICKERS
+    
+    if st.session_state.get('multi_backtest'):
+        show_multi_backtest(st.session_state['multi_backtest'])
 
 # Add sidebar with tips
 st.sidebar.title("How to Use")
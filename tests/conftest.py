@@ -0,0 +1,13 @@
+import os
+import sys
+
+# The modules live at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Nothing under test may reach a live service: clients get placeholder keys, and tests swap in stubs
+os.environ['OPENAI_API_KEY'] = 'test-key'
+os.environ['NEWS_API_KEY'] = 'test-key'
+# ...and never the local mock server either
+os.environ.pop('MOCK_SERVER_URL', None)
+# Analyzers only use the local tier when a test hands them a scorer
+os.environ['LOCAL_SCORER'] = ''
@@ -0,0 +1,189 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from advanced_analyzer import AdvancedAnalyzer, FALLBACK_WEIGHT
+from llm_cache import LLMCache
+from local_scorer import LexiconScorer
+from resilient_llm import ResilientLLM
+
+def answer(sentiment, signal):
+    return (f"SENTIMENT: {sentiment}\nCONFIDENCE: 0.8\nSIGNAL: {signal}\n"
+            f"REASON: Test answer.\nRELEVANCE: HIGH")
+
+def response(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=None)
+
+def api_error(status):
+    error = Exception(f"HTTP {status}")
+    error.status_code = status
+    return error
+
+class ScriptedCompletions:
+    """Answers the first (batch) request with `batch_text`, every later single-article request with a HOLD"""
+    def __init__(self, batch_text):
+        self.batch_text = batch_text
+        self.prompts = []
+
+    def create(self, messages, **params):
+        self.prompts.append(messages[0]['content'])
+        if isinstance(self.batch_text, Exception):
+            raise self.batch_text
+        return response(self.batch_text if len(self.prompts) == 1 else answer(0.0, 'HOLD'))
+
+class HeadlineCompletions:
+    """Answers single-article prompts from a headline -> answer (or exception) table"""
+    def __init__(self, answers):
+        self.answers = answers
+        self.prompts = []
+
+    def create(self, messages, **params):
+        prompt = messages[0]['content']
+        self.prompts.append(prompt)
+        outcome = next(outcome for headline, outcome in self.answers.items() if f"News: {headline}." in prompt)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return response(outcome)
+
+def with_completions(analyzer, completions):
+    analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return completions
+
+def analyzer_with(batch_text, batch_size):
+    analyzer = AdvancedAnalyzer(use_cache=False, batch_size=batch_size)
+    return analyzer, with_completions(analyzer, ScriptedCompletions(batch_text))
+
+ARTICLES = [{'title': f"Headline {i}", 'description': f"Story {i}"} for i in range(1, 4)]
+
+def test_cache_hit_does_not_extend_expiry(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('llm_cache.time.time', lambda: clock[0])
+    analyzer = AdvancedAnalyzer(use_cache=False)
+    analyzer.cache = LLMCache(path=str(tmp_path / 'cache.sqlite'), ttl_seconds=60)
+    completions = with_completions(analyzer, HeadlineCompletions({'Headline 1': answer(0.5, 'BUY')}))
+
+    assert analyzer.analyze_article(ARTICLES[0])['signal'] == 'BUY'
+    clock[0] += 50
+    assert analyzer.analyze_article(ARTICLES[0])['signal'] == 'BUY'
+    assert len(completions.prompts) == 1
+
+    # 70s after the API answered: the hit in between did not restart the TTL
+    clock[0] += 20
+    analyzer.analyze_article(ARTICLES[0])
+    assert len(completions.prompts) == 2
+
+def test_batch_answer_is_split_per_item():
+    text = "\n".join([
+        "ITEM 1", answer(0.6, 'BUY'),
+        "[ITEM 2]:", answer(-0.4, 'SELL'),
+        "item 3", answer(0.1, 'HOLD'),
+    ])
+    analyzer, completions = analyzer_with(text, batch_size=3)
+    results = analyzer.analyze_articles_batch(ARTICLES)
+
+    assert len(completions.prompts) == 1
+    assert "[ITEM 3] Headline 3. Story 3" in completions.prompts[0]
+    assert [r['signal'] for r in results] == ['BUY', 'SELL', 'HOLD']
+    assert [r['sentiment'] for r in results] == [0.6, -0.4, 0.1]
+    assert [r['title'] for r in results] == [a['title'] for a in ARTICLES]
+
+def test_missing_or_malformed_items_are_retried_one_by_one():
+    text = "\n".join(["ITEM 1", answer(0.6, 'BUY'), "ITEM 3", "SENTIMENT: lots"])
+    analyzer, completions = analyzer_with(text, batch_size=3)
+    results = analyzer.analyze_articles_batch(ARTICLES)
+
+    # One batch request, then one request each for item 2 (missing) and item 3 (unparseable)
+    assert len(completions.prompts) == 3
+    assert [r['signal'] for r in results] == ['BUY', 'HOLD', 'HOLD']
+
+def test_failed_batch_request_is_not_resent_item_by_item():
+    analyzer, completions = analyzer_with(api_error(400), batch_size=3)
+    results = analyzer.analyze_articles_batch(ARTICLES)
+
+    assert len(completions.prompts) == 1
+    assert results == [None, None, None]
+
+def test_parse_analysis_defaults_and_rejects():
+    analyzer = AdvancedAnalyzer(use_cache=False)
+    article = {'title': 'Headline'}
+
+    parsed = analyzer.parse_analysis("SENTIMENT: -0.3\nCONFIDENCE: 0.9\nSIGNAL: sell", article)
+    assert parsed['sentiment'] == -0.3
+    assert parsed['signal'] == 'SELL'
+    assert parsed['relevance'] == 'MEDIUM'
+    assert analyzer.parse_analysis("I cannot help with that.", article) is None
+
+class StubCollector:
+    def __init__(self, articles):
+        self.articles = articles
+
+    def get_stock_news(self, ticker, days=7):
+        return [dict(article) for article in self.articles]
+
+def news(headlines):
+    # Reuters articles from two hours ago all clear the quality cut, with equal scores
+    published = (datetime.now(timezone.utc) - timedelta(hours=2)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    return [{'title': headline, 'description': 'Details inside.', 'source': {'name': 'Reuters'},
+             'publishedAt': published, 'url': f"https://example.com/{i}"}
+            for i, headline in enumerate(headlines)]
+
+def streaming_analyzer(answers, **kwargs):
+    articles = news(list(answers))
+    analyzer = AdvancedAnalyzer(use_cache=False, deduplicate=False, collector=StubCollector(articles),
+                                price_store=object(), **kwargs)
+    return analyzer, with_completions(analyzer, HeadlineCompletions(answers))
+
+def test_iter_stock_sentiment_streams_then_matches_the_batch_result():
+    answers = {'Apple one': answer(0.6, 'BUY'), 'Apple two': answer(-0.2, 'HOLD'), 'Apple three': answer(0.3, 'BUY')}
+    analyzer, _ = streaming_analyzer(answers, max_workers=2)
+
+    events = list(analyzer.iter_stock_sentiment('AAPL'))
+    assert [e['type'] for e in events] == ['analysis'] * 3 + ['result']
+    assert [e['completed'] for e in events[:-1]] == [1, 2, 3]
+    assert all(e['total'] == 3 for e in events[:-1])
+
+    result = events[-1]['result']
+    assert result['total_articles'] == 3 and result['buy_signals'] == 2
+    assert events[-2]['running_sentiment'] == pytest.approx(result['avg_sentiment'])
+    assert analyzer.analyze_stock_sentiment('AAPL')['avg_sentiment'] == pytest.approx(result['avg_sentiment'])
+
+def test_iter_stock_sentiment_reports_no_news():
+    analyzer = AdvancedAnalyzer(use_cache=False, collector=StubCollector([]), price_store=object())
+    assert list(analyzer.iter_stock_sentiment('AAPL')) == [{'type': 'result', 'result': None}]
+
+def test_confident_local_scores_skip_the_llm():
+    confident = "Apple beats estimates as revenue surges to a record on strong growth"
+    hedged = "Apple could announce a product, sources say"
+    analyzer = AdvancedAnalyzer(use_cache=False, local_scorer=LexiconScorer(), escalation_threshold=0.6)
+    completions = with_completions(analyzer, HeadlineCompletions({hedged: answer(0.1, 'HOLD')}))
+
+    settled = analyzer.analyze_article({'title': confident, 'description': ''})
+    assert settled['scorer'] == 'lexicon' and settled['signal'] == 'BUY'
+    assert completions.prompts == []
+
+    escalated = analyzer.analyze_article({'title': hedged, 'description': ''})
+    assert 'scorer' not in escalated
+    assert len(completions.prompts) == 1
+
+def test_failed_batch_request_falls_back_without_resending():
+    analyzer, completions = analyzer_with(api_error(503), batch_size=3)
+    analyzer.llm = ResilientLLM(lambda: analyzer.client, max_retries=0)
+    results = analyzer.analyze_articles_batch(ARTICLES)
+
+    assert len(completions.prompts) == 1
+    assert all(r['fallback'] and r['scorer'] == 'lexicon' for r in results)
+
+def test_fallback_scores_count_at_reduced_weight():
+    answers = {'Apple one': answer(0.6, 'BUY'), 'Apple two': api_error(503)}
+    analyzer, _ = streaming_analyzer(answers)
+    analyzer.llm = ResilientLLM(lambda: analyzer.client, max_retries=0)
+
+    result = analyzer.analyze_stock_sentiment('AAPL')
+    fallback, llm = sorted(result['detailed_analyses'], key=lambda a: a['title'] == 'Apple one')
+    assert result['fallback_analyses'] == [fallback] and fallback['fallback']
+    assert result['total_articles'] == 2
+
+    # Same quality and cluster size, so the stand-in weighs exactly FALLBACK_WEIGHT as much
+    assert fallback['quality_weight'] == pytest.approx(llm['quality_weight'] * FALLBACK_WEIGHT)
+    expected = (0.6 * llm['quality_weight'] + fallback['sentiment'] * fallback['quality_weight']) / \
+               (llm['quality_weight'] + fallback['quality_weight'])
+    assert result['avg_sentiment'] == pytest.approx(expected)
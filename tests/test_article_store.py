@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+from article_store import ArticleStore, one_analysis_per_article
+
+def article(url, title, published_at, description='', source='Reuters'):
+    return {'title': title, 'description': description, 'url': url, 'publishedAt': published_at,
+            'source': {'name': source}}
+
+def analysis(sentiment, signal='HOLD', **extra):
+    return {'sentiment': sentiment, 'confidence': 0.8, 'signal': signal, 'reason': 'Test.', 'relevance': 'HIGH',
+            **extra}
+
+@pytest.fixture
+def store(tmp_path):
+    return ArticleStore(path=str(tmp_path / 'articles.sqlite'))
+
+def test_search_matches_titles_and_descriptions(store):
+    if not store.has_fts:
+        pytest.skip("SQLite built without FTS5")
+    store.save_articles('AAPL', [
+        article('a', 'Apple earnings beat estimates', '2026-10-01T09:00:00Z'),
+        article('b', 'Apple opens a new store', '2026-10-01T10:00:00Z', description='Quarterly earnings are next week'),
+        article('c', 'Apple faces lawsuit', '2026-10-01T11:00:00Z'),
+    ])
+    store.save_articles('MSFT', [article('d', 'Microsoft earnings call', '2026-10-01T12:00:00Z')])
+
+    assert sorted(a['url'] for a in store.search('earnings', ticker='AAPL')) == ['a', 'b']
+    assert sorted(a['url'] for a in store.search('earnings')) == ['a', 'b', 'd']
+    assert [a['ticker'] for a in store.search('lawsuit')] == ['AAPL']
+    assert len(store.search('earnings', limit=1)) == 1
+
+def test_saving_again_does_not_duplicate_search_hits(store):
+    if not store.has_fts:
+        pytest.skip("SQLite built without FTS5")
+    raw = article('a', 'Apple earnings beat estimates', '2026-10-01T09:00:00Z')
+    store.save_articles('AAPL', [raw])
+    store.save_articles('AAPL', [{**raw, 'credibility_score': 1.0, 'relevance_score': 0.8}])
+
+    assert [a['url'] for a in store.search('earnings')] == ['a']
+
+def test_scored_window_rows_and_one_analysis_per_article(store, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr('article_store.time.time', lambda: next(clock))
+    articles = [article('a', 'Apple one', '2026-10-01T09:00:00Z'), article('b', 'Apple two', '2026-10-01T10:00:00Z')]
+    store.save_articles('AAPL', [{**a, 'credibility_score': 1.0, 'relevance_score': 0.5} for a in articles])
+    store.save_analyses('AAPL', [(articles[0], analysis(0.2))], model='model-a')
+    store.save_analyses('AAPL', [(articles[0], analysis(0.6, 'BUY')), (articles[1], analysis(-0.4, 'SELL'))],
+                        model='model-b')
+
+    scores = store.get_scored_window(['AAPL'], '2026-10-01T00:00:00Z', '2026-10-02T00:00:00Z')
+    assert len(scores) == 3
+
+    # The later analysis of article a wins, and each article is kept once
+    latest = one_analysis_per_article(scores)
+    assert list(latest['sentiment']) == [0.6, -0.4]
+    assert list(latest['model']) == ['model-b', 'model-b']
+
+    assert one_analysis_per_article(scores.iloc[0:0]).empty
+
+def test_llm_analysis_is_preferred_over_the_local_tier(store):
+    articles = [article('a', 'Apple one', '2026-10-01T09:00:00Z'), article('b', 'Apple two', '2026-10-01T10:00:00Z')]
+    store.save_articles('AAPL', [{**a, 'credibility_score': 1.0, 'relevance_score': 0.5} for a in articles])
+    store.save_analyses('AAPL', [(articles[0], analysis(0.6, 'BUY'))], model='gpt-4o-mini')
+    # Scored locally afterwards (say the LLM was down on a later run), and article b only locally
+    store.save_analyses('AAPL', [(a, analysis(0.1, scorer='lexicon')) for a in articles], model='gpt-4o-mini')
+
+    scores = one_analysis_per_article(store.get_scored_window(['AAPL'], '2026-10-01', '2026-10-02'))
+    assert list(scores['model']) == ['gpt-4o-mini', 'lexicon']
+    assert list(scores['sentiment']) == [0.6, 0.1]
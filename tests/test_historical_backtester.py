@@ -0,0 +1,81 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from historical_backtester import HistoricalBacktester
+
+def stored_scores(n=300, seed=9):
+    """One ticker's get_scored_window rows over two months, sorted by publish time"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2024-03-01', tz='UTC')
+    published = start + pd.to_timedelta(np.sort(rng.uniform(0, 60 * 24, size=n)), unit='h')
+    return pd.DataFrame({
+        'ticker': 'AAPL',
+        'published_at': published,
+        'credibility_score': rng.choice([0.3, 0.7, 1.0], size=n),
+        'relevance_score': rng.uniform(0, 1, size=n),
+        'cluster_size': rng.integers(1, 4, size=n),
+        'sentiment': rng.uniform(-1, 1, size=n)
+    })
+
+def loop_aggregate(scores, as_of, lookback):
+    """Weighted sentiment and article count per date, one window and one article at a time"""
+    sentiments, counts = [], []
+    for date in as_of:
+        window = scores[(scores['published_at'] >= date - lookback) & (scores['published_at'] < date)]
+        total_weight = weighted_sum = 0.0
+        count = 0
+        for row in window.itertuples():
+            hours_ago = (date - row.published_at) / pd.Timedelta(hours=1)
+            time_weight = max(0.1, 1.0 - hours_ago / 72)
+            quality = row.credibility_score * 0.4 + row.relevance_score * 0.4 + time_weight * 0.2
+            if quality > 0.4:
+                weight = quality * (1.0 + math.log(row.cluster_size))
+                total_weight += weight
+                weighted_sum += weight * row.sentiment
+                count += 1
+        sentiments.append(weighted_sum / total_weight if total_weight > 0 else np.nan)
+        counts.append(count)
+    return np.array(sentiments), np.array(counts)
+
+def loop_forward_returns(prices, as_of, horizon):
+    returns = []
+    for date in as_of.tz_localize(None).normalize():
+        window = prices[(prices.index >= date) & (prices.index < date + horizon)]
+        if len(window) < 2:
+            returns.append(np.nan)
+        else:
+            returns.append((window['Close'].iloc[-1] - window['Close'].iloc[0]) / window['Close'].iloc[0] * 100)
+    return np.array(returns)
+
+@pytest.fixture
+def backtester():
+    # Neither store is touched by the per-ticker computations
+    return HistoricalBacktester(store=object(), price_store=object())
+
+def test_bincount_aggregation_matches_the_loop(backtester):
+    scores = stored_scores()
+    as_of = pd.date_range('2024-02-25', '2024-05-05', freq='D', tz='UTC')
+
+    sentiment, counts = backtester.aggregate_sentiment(scores, as_of)
+    expected_sentiment, expected_counts = loop_aggregate(scores, as_of, backtester.lookback)
+
+    np.testing.assert_array_equal(counts, expected_counts)
+    np.testing.assert_allclose(sentiment, expected_sentiment, equal_nan=True)
+    # Dates before the first article and long after the last have no news
+    assert np.isnan(sentiment[0]) and counts[-1] == 0
+
+def test_aggregation_without_scores(backtester):
+    as_of = pd.date_range('2024-03-01', periods=3, freq='D', tz='UTC')
+    sentiment, counts = backtester.aggregate_sentiment(stored_scores().iloc[0:0], as_of)
+    assert np.isnan(sentiment).all() and (counts == 0).all()
+
+def test_searchsorted_forward_returns_match_the_loop(backtester):
+    rng = np.random.default_rng(4)
+    index = pd.bdate_range('2024-03-01', '2024-05-31')
+    prices = pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0, 0.02, size=len(index))))}, index=index)
+    as_of = pd.date_range('2024-02-20', '2024-06-10', freq='D', tz='UTC')
+
+    np.testing.assert_allclose(backtester.forward_returns(prices, as_of),
+                               loop_forward_returns(prices, as_of, backtester.horizon), equal_nan=True)
+    assert np.isnan(backtester.forward_returns(pd.DataFrame(), as_of)).all()
@@ -0,0 +1,38 @@
+from llm_cache import LLMCache
+
+def test_key_covers_every_input():
+    key = LLMCache.make_key("gpt-4o-mini", "News: {article_text}", 0.1, "Apple beats")
+    assert key == LLMCache.make_key("gpt-4o-mini", "News: {article_text}", 0.1, "Apple beats")
+    assert key != LLMCache.make_key("gpt-4o", "News: {article_text}", 0.1, "Apple beats")
+    assert key != LLMCache.make_key("gpt-4o-mini", "News: {article_text}", 0.2, "Apple beats")
+    assert key != LLMCache.make_key("gpt-4o-mini", "News: {article_text}", 0.1, "Apple misses")
+
+def test_expired_entries_miss(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('llm_cache.time.time', lambda: clock[0])
+    cache = LLMCache(path=str(tmp_path / 'cache.sqlite'), ttl_seconds=60)
+
+    cache.set('a', 'answer')
+    clock[0] += 59
+    assert cache.get('a') == 'answer'
+    clock[0] += 2
+    assert cache.get('a') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('llm_cache.time.time', lambda: clock[0])
+    cache = LLMCache(path=str(tmp_path / 'cache.sqlite'), ttl_seconds=None, max_entries=2)
+
+    cache.set('a', '1')
+    clock[0] += 1
+    cache.set('b', '2')
+    clock[0] += 1
+    assert cache.get('a') == '1'  # 'a' is now more recent than 'b'
+    clock[0] += 1
+    cache.set('c', '3')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == '1'
+    assert cache.get('c') == '3'
+    assert cache.stats()['entries'] == 2
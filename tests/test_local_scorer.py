@@ -0,0 +1,52 @@
+import pytest
+from local_scorer import LexiconScorer, load_local_scorer
+
+@pytest.fixture(scope='module')
+def scorer():
+    return LexiconScorer()
+
+def score(scorer, title, description=''):
+    return scorer.score({'title': title, 'description': description})
+
+def test_routine_filings_are_a_confident_hold(scorer):
+    analysis = score(scorer, "Vanguard Group Inc sells 145 shares of Apple Inc")
+    assert (analysis['signal'], analysis['sentiment'], analysis['confidence']) == ('HOLD', 0.0, 0.9)
+    assert analysis['scorer'] == 'lexicon'
+
+    # A stake change with money attached is news, not a filing
+    assert score(scorer, "Fund buys 1,000 shares of Apple in $2 million deal")['reason'].startswith('Lexicon')
+
+def test_clear_one_sided_news_is_confident(scorer):
+    bullish = score(scorer, "Apple beats estimates as revenue surges to a record on strong growth")
+    bearish = score(scorer, "Tesla misses delivery estimates and cuts prices amid weak demand")
+    assert bullish['signal'] == 'BUY' and bullish['confidence'] >= 0.6
+    assert bearish['signal'] == 'SELL' and bearish['confidence'] >= 0.6
+    assert bullish['relevance'] == 'HIGH'
+
+def test_negation_flips_and_hedging_lowers_confidence(scorer):
+    assert score(scorer, "Nvidia did not beat expectations")['sentiment'] < 0
+    assert score(scorer, "Nvidia didn't beat expectations")['sentiment'] < 0
+
+    plain = score(scorer, "Microsoft wins a record contract")
+    hedged = score(scorer, "Microsoft could possibly win a record contract, reportedly")
+    assert hedged['confidence'] < plain['confidence']
+
+def test_mixed_or_empty_text_has_low_confidence(scorer):
+    assert score(scorer, "Apple gains in services but losses in hardware")['confidence'] <= 0.1
+    analysis = score(scorer, "Apple holds its annual meeting")
+    assert (analysis['signal'], analysis['confidence'], analysis['relevance']) == ('HOLD', 0.1, 'LOW')
+
+def test_loads_word_lists_from_a_loughran_mcdonald_csv(tmp_path):
+    path = tmp_path / 'LM.csv'
+    path.write_text("Word,Positive,Negative,Uncertainty\nSTELLAR,2009,0,0\nDISMAL,0,2009,0\nMAYBE,0,0,2009\n")
+    scorer = load_local_scorer(str(path))
+
+    assert scorer.positive == {'stellar'} and scorer.negative == {'dismal'}
+    assert score(scorer, "A stellar quarter")['signal'] == 'BUY'
+    assert score(scorer, "Apple beats estimates")['sentiment'] == 0.0
+
+def test_load_local_scorer_specs():
+    assert load_local_scorer('') is None
+    assert isinstance(load_local_scorer('lexicon'), LexiconScorer)
+    with pytest.raises(ValueError):
+        load_local_scorer('vader')
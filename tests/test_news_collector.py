@@ -0,0 +1,92 @@
+import pytest
+from news_collector import NewsCollector
+
+class StubNewsApi:
+    """get_everything over a fixed article list: inclusive from/to, newest first, paged"""
+    def __init__(self, articles):
+        self.articles = articles
+        self.calls = []
+
+    def get_everything(self, q=None, from_param=None, to=None, language=None, sort_by=None, page_size=100, page=1):
+        self.calls.append({'from': from_param, 'to': to, 'page': page})
+        matching = [a for a in self.articles
+                    if (not from_param or a['publishedAt'] >= from_param + ('' if from_param.endswith('Z') else 'Z'))
+                    and (not to or a['publishedAt'] <= to + 'Z')]
+        matching.sort(key=lambda a: a['publishedAt'], reverse=True)
+        return {'status': 'ok', 'totalResults': len(matching),
+                'articles': matching[(page - 1) * page_size:page * page_size]}
+
+def article(url, published_at):
+    return {'title': url, 'url': url, 'publishedAt': published_at, 'source': {'name': 'Reuters'}}
+
+@pytest.fixture
+def collector(tmp_path):
+    collector = NewsCollector(state_path=str(tmp_path / 'news_state.json'), requests_per_second=1000, burst=1000)
+    collector.state['company_names']['AAPL'] = 'Apple Inc'
+    return collector
+
+def urls(articles):
+    return sorted(a['url'] for a in articles)
+
+def test_mark_only_moves_on_commit(collector):
+    collector.newsapi = StubNewsApi([article('a', '2026-10-01T09:00:00Z'), article('b', '2026-10-01T10:00:00Z')])
+
+    assert urls(collector.fetch_new_articles('AAPL', days=30)) == ['a', 'b']
+    # Not committed (say scoring failed): the same batch comes back
+    assert urls(collector.fetch_new_articles('AAPL', days=30)) == ['a', 'b']
+
+    collector.commit_high_water_mark('AAPL')
+    assert collector.state['high_water_marks']['AAPL'] == '2026-10-01T10:00:00Z'
+    assert collector.fetch_new_articles('AAPL', days=30) == []
+
+    # The mark survives a restart
+    assert NewsCollector(state_path=collector.state_path).state['high_water_marks']['AAPL'] == '2026-10-01T10:00:00Z'
+
+def test_same_second_articles_are_not_dropped(collector):
+    api = collector.newsapi = StubNewsApi([article('a', '2026-10-01T10:00:00Z')])
+    collector.fetch_new_articles('AAPL', days=30)
+    collector.commit_high_water_mark('AAPL')
+
+    # Published in the same second as the mark, but after the last poll
+    api.articles.append(article('b', '2026-10-01T10:00:00Z'))
+    assert urls(collector.fetch_new_articles('AAPL', days=30)) == ['b']
+    collector.commit_high_water_mark('AAPL')
+    assert collector.fetch_new_articles('AAPL', days=30) == []
+
+def test_truncated_polls_backfill_instead_of_skipping(collector):
+    collector.newsapi = StubNewsApi([article(f"u{hour:02d}", f"2026-10-01T{hour:02d}:00:00Z") for hour in range(10)])
+
+    seen = []
+    for _ in range(5):
+        batch = collector.fetch_new_articles('AAPL', days=30, page_size=2, max_articles=3)
+        collector.commit_high_water_mark('AAPL')
+        seen += [a['url'] for a in batch]
+
+    # Newest first, then backwards to the oldest, each article exactly once
+    assert seen == ['u09', 'u08', 'u07', 'u06', 'u05', 'u04', 'u03', 'u02', 'u01', 'u00']
+    assert collector.state['high_water_marks']['AAPL'] == '2026-10-01T09:00:00Z'
+    assert 'AAPL' not in collector.state['backfills']
+
+def test_only_network_errors_are_retried(collector, monkeypatch):
+    import requests
+    monkeypatch.setattr('news_collector.time.sleep', lambda seconds: None)
+
+    class Flaky:
+        def __init__(self, error):
+            self.error = error
+            self.calls = 0
+
+        def get_everything(self, **params):
+            self.calls += 1
+            if self.calls == 1:
+                raise self.error
+            return {'status': 'ok', 'totalResults': 0, 'articles': []}
+
+    collector.newsapi = Flaky(requests.ConnectionError("reset"))
+    assert collector._get_everything(q='AAPL')['articles'] == []
+    assert collector.newsapi.calls == 2
+
+    collector.newsapi = Flaky(KeyError('articles'))
+    with pytest.raises(KeyError):
+        collector._get_everything(q='AAPL')
+    assert collector.newsapi.calls == 1
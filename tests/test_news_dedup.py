@@ -0,0 +1,28 @@
+from news_dedup import NearDuplicateDetector
+
+def article(title, description=''):
+    return {'title': title, 'description': description}
+
+def test_syndicated_copies_cluster_under_the_first():
+    articles = [
+        article('Apple beats quarterly earnings expectations on strong iPhone sales',
+                'Apple Inc reported revenue above analyst estimates for the third quarter.'),
+        article('Tesla recalls 10,000 vehicles over seatbelt issue',
+                'The electric carmaker said no injuries had been reported.'),
+        article('Apple beats quarterly earnings expectations on strong iPhone sales - Reuters',
+                'Apple Inc reported revenue above analyst estimates for the third quarter.'),
+    ]
+    assert NearDuplicateDetector().cluster(articles) == [[0, 2], [1]]
+
+def test_distinct_stories_stay_apart():
+    articles = [article(f"Story number {i} about a completely different topic {i * 7919}") for i in range(20)]
+    assert NearDuplicateDetector().cluster(articles) == [[i] for i in range(20)]
+
+def test_empty_and_short_inputs():
+    detector = NearDuplicateDetector()
+    assert detector.cluster([]) == []
+    assert detector.cluster([article('Hi'), article('Hi')]) == [[0, 1]]
+
+def test_cluster_weight_grows_sublinearly():
+    assert NearDuplicateDetector.cluster_weight(1) == 1.0
+    assert 1.0 < NearDuplicateDetector.cluster_weight(2) < NearDuplicateDetector.cluster_weight(4) < 4.0
@@ -0,0 +1,56 @@
+import random
+import pandas as pd
+import pytest
+from news_filter import NewsFilter, BATCH_MIN_ARTICLES
+
+PHRASES = ['Apple Inc', 'AAPL', 'earnings call', 'price target', 'shares of', 'product launch', 'CEO', 'revenue',
+           'lawsuit', 'iPhone', 'guidance', 'stock split', 'rumor', 'could', 'buys', 'sells', 'opinion']
+SEPARATORS = [' ', ', ', '; ', ' - ', '-', '/', ': ', '  ', '\t', "'s ", '. ', '_', ' (', ') ', ' — ', ' é ']
+SOURCES = ['Reuters', 'Bloomberg', 'Yahoo Entertainment', 'Some Blog', 'MarketWatch']
+
+def synthetic_articles(n, seed=7):
+    """Headlines stitched from keywords and awkward punctuation, so word boundaries get exercised"""
+    rng = random.Random(seed)
+    articles = []
+    for i in range(n):
+        words = [rng.choice(PHRASES + ['w%d' % rng.randrange(100)]) for _ in range(rng.randrange(2, 10))]
+        text = ''.join(word + rng.choice(SEPARATORS) for word in words)
+        articles.append({
+            'title': text[:60],
+            'description': text[60:] if rng.random() < 0.8 else None,
+            'source': {'name': rng.choice(SOURCES)},
+            # Old enough that every time weight sits at its 0.1 floor, whenever the test runs
+            'publishedAt': '2020-01-%02dT12:00:00Z' % (1 + i % 28) if i % 50 else 'not a date',
+            'url': f"https://example.com/{i}"
+        })
+    return articles
+
+@pytest.fixture(scope='module')
+def news_filter():
+    return NewsFilter()
+
+def test_count_keywords_batch_matches_scalar(news_filter):
+    texts = [f"{a['title']} {a.get('description', '')}".lower() for a in synthetic_articles(3000)]
+    texts += ['', 'apple inc.', "iphone's ceo", 'shares-of', 'shares  of', 'ceoé', 'x\x00ceo', 'apple_inc ceo']
+
+    batch = news_filter.count_keywords_batch(texts)
+    scalar = pd.DataFrame([news_filter.count_keywords(text) for text in texts])
+    pd.testing.assert_frame_equal(batch, scalar)
+
+@pytest.mark.parametrize('n', [5, BATCH_MIN_ARTICLES + 200])
+def test_filter_batch_matches_scalar(news_filter, n):
+    articles = synthetic_articles(n)
+    scalar = news_filter.filter_and_rank_articles(articles, 'AAPL')
+    batch = news_filter.filter_and_rank_articles_batch(articles, 'AAPL')
+
+    assert [a['url'] for a in batch] == [a['url'] for a in scalar]
+    for b, s in zip(batch, scalar):
+        for field in ['credibility_score', 'relevance_score', 'time_weight', 'quality_score']:
+            assert b[field] == pytest.approx(s[field])
+
+def test_filter_batch_top_k(news_filter):
+    articles = synthetic_articles(BATCH_MIN_ARTICLES + 200)
+    scalar = news_filter.filter_and_rank_articles(articles, 'AAPL')
+    top = news_filter.filter_and_rank_articles_batch(articles, 'AAPL', top_k=25)
+    assert [a['url'] for a in top] == [a['url'] for a in scalar[:25]]
+    assert news_filter.filter_and_rank_articles_batch([], 'AAPL') == []
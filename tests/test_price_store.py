@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+from price_store import PriceStore
+
+def bars(start, end, splits=None):
+    """Business-day OHLCV rows for [start, end) in the yf.download(group_by='ticker') layout"""
+    index = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+    frame = pd.DataFrame({'Open': 100.0, 'High': 101.0, 'Low': 99.0, 'Close': 100.0, 'Volume': 1000,
+                          'Dividends': 0.0, 'Stock Splits': 0.0}, index=index)
+    for day, ratio in (splits or {}).items():
+        frame.loc[pd.Timestamp(day), 'Stock Splits'] = ratio
+    return frame
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # Replay mode, with the chart download itself stubbed and recorded
+    monkeypatch.setattr('price_store.mock_server_url', lambda: 'http://stub')
+    store = PriceStore(cache_dir=str(tmp_path))
+    store.downloads = []
+    store.splits = {}
+
+    def download_charts(tickers, start, end):
+        store.downloads.append((tuple(tickers), start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')))
+        frame = bars(start, end, {day: ratio for day, ratio in store.splits.items()
+                                  if start <= pd.Timestamp(day) < end})
+        return pd.concat({ticker: frame for ticker in tickers}, axis=1)
+
+    store._download_charts = download_charts
+    return store
+
+def test_only_missing_ranges_are_downloaded(store):
+    store.prefetch(['AAPL', 'MSFT'], '2024-03-01', '2024-04-01')
+    assert store.downloads == [(('AAPL', 'MSFT'), '2024-03-01', '2024-04-01')]
+
+    # Fully covered: nothing to download
+    assert len(store.get_history('AAPL', '2024-03-10', '2024-03-20')) == 7
+    assert len(store.downloads) == 1
+
+    # Wider on both sides: only the two edges are fetched, and coverage stays one range
+    store.get_history('AAPL', '2024-02-01', '2024-05-01')
+    assert store.downloads[1:] == [(('AAPL',), '2024-02-01', '2024-03-01'),
+                                   (('AAPL',), '2024-04-01', '2024-05-01')]
+    assert store._load_coverage('AAPL') == (pd.Timestamp('2024-02-01'), pd.Timestamp('2024-05-01'))
+    assert len(store.get_history('AAPL', '2024-02-01', '2024-05-01')) == len(bars('2024-02-01', '2024-05-01'))
+
+def test_short_empty_ranges_count_as_covered(store, monkeypatch):
+    store._download_charts = lambda tickers, start, end: pd.DataFrame()
+
+    # A weekend has no bars, and is not asked for again
+    store.prefetch(['AAPL'], '2024-03-02', '2024-03-04')
+    assert store._load_coverage('AAPL') == (pd.Timestamp('2024-03-02'), pd.Timestamp('2024-03-04'))
+
+    # A long empty answer is more likely a failure than a closed market
+    store.prefetch(['MSFT'], '2024-03-01', '2024-04-01')
+    assert store._load_coverage('MSFT') is None
+
+def test_new_split_discards_the_stale_cache(store):
+    store.prefetch(['AAPL'], '2024-03-01', '2024-04-01')
+    store.splits = {'2024-04-10': 4.0}
+    store.prefetch(['AAPL'], '2024-03-01', '2024-05-01')
+
+    # The April download brought a split the cached March rows were not adjusted for
+    assert store._load_coverage('AAPL') == (pd.Timestamp('2024-04-01'), pd.Timestamp('2024-05-01'))
+    assert store._load_data('AAPL').index.min() == pd.Timestamp('2024-04-01')
+
+    store.prefetch(['AAPL'], '2024-03-01', '2024-05-01')
+    assert store.downloads[-1] == (('AAPL',), '2024-03-01', '2024-04-01')
+    assert store._load_coverage('AAPL') == (pd.Timestamp('2024-03-01'), pd.Timestamp('2024-05-01'))
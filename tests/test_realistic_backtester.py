@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import datetime
+from realistic_backtester import RealisticBacktester, SIMULATION_MONTHS_BACK
+from price_store import PriceStore
+
+def history(days=130, seed=3):
+    """Business-day closes from a random walk, volatile enough to hit every sentiment regime"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp(datetime.now()).normalize() - pd.Timedelta(days=1), periods=days)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.03, size=days)))
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000}, index=index)
+
+class StubPriceStore:
+    def __init__(self, hist):
+        self.hist = hist
+
+    def get_history(self, ticker, start, end):
+        return self.hist
+
+    def prefetch(self, tickers, start, end):
+        pass
+
+def loop_periods(hist):
+    """The weekly periods as the original per-week loop built them"""
+    weekly_periods = []
+    for i in range(0, len(hist) - 7, 7):
+        start_price = hist['Close'].iloc[i]
+        end_price = hist['Close'].iloc[min(i + 7, len(hist) - 1)]
+        weekly_return = (end_price - start_price) / start_price * 100
+        weekly_periods.append({
+            'start_date': hist.index[i],
+            'end_date': hist.index[min(i + 7, len(hist) - 1)],
+            'start_price': start_price,
+            'end_price': end_price,
+            'return_pct': weekly_return,
+            'volatility': hist['Close'].iloc[i:i+7].pct_change().std() * 100,
+            'market_direction': 'up' if weekly_return > 0 else 'down'
+        })
+    return pd.DataFrame(weekly_periods)
+
+def loop_simulation(periods, rng):
+    """The original per-period simulation loop, drawing from `rng` instead of the global NumPy state"""
+    results = []
+    for i, period in enumerate(periods.to_dict('records')):
+        prev_return = periods['return_pct'].iloc[i - 1] if i > 0 else 0
+        volatility = period['volatility']
+        if prev_return > 3 and volatility < 2:
+            simulated_sentiment = rng.normal(-0.2, 0.2)
+        elif prev_return < -3 and volatility > 4:
+            simulated_sentiment = rng.normal(0.3, 0.2)
+        elif volatility > 5:
+            simulated_sentiment = rng.normal(-0.1, 0.3)
+        else:
+            simulated_sentiment = rng.normal(0.1, 0.2)
+        simulated_sentiment = max(-1, min(1, simulated_sentiment))
+
+        ai_bullish = simulated_sentiment > 0.2
+        ai_bearish = simulated_sentiment < -0.2
+        actual_up = period['return_pct'] > 0
+        results.append({
+            'simulated_sentiment': simulated_sentiment,
+            'ai_prediction': 'BUY' if ai_bullish else 'SELL' if ai_bearish else 'HOLD',
+            'correct': (ai_bullish and actual_up) or (ai_bearish and not actual_up) or abs(simulated_sentiment) <= 0.2
+        })
+    return results
+
+@pytest.mark.parametrize('days', [30, 64, 130])
+def test_vectorized_periods_match_the_loop(days):
+    hist = history(days)
+    periods = RealisticBacktester(StubPriceStore(hist)).get_stock_performance_periods('AAPL')
+    pd.testing.assert_frame_equal(periods, loop_periods(hist))
+
+def test_short_history_has_no_periods():
+    assert RealisticBacktester(StubPriceStore(history(29))).get_stock_performance_periods('AAPL') is None
+
+def test_seeded_simulation_matches_the_loop():
+    backtester = RealisticBacktester(StubPriceStore(history()))
+    periods = backtester.get_stock_performance_periods('AAPL', months_back=SIMULATION_MONTHS_BACK)
+    summary = backtester.simulate_algorithm_performance('AAPL', seed=11)
+
+    expected = loop_simulation(periods, np.random.default_rng(11))
+    detailed = summary['detailed_results']
+    assert [r['simulated_sentiment'] for r in detailed] == pytest.approx([r['simulated_sentiment'] for r in expected])
+    assert [r['ai_prediction'] for r in detailed] == [r['ai_prediction'] for r in expected]
+    assert [bool(r['correct']) for r in detailed] == [r['correct'] for r in expected]
+    assert summary['accuracy'] == pytest.approx(100 * np.mean([r['correct'] for r in expected]))
+
+    # Same seed, same run
+    assert backtester.simulate_algorithm_performance('AAPL', seed=11)['detailed_results'] == detailed
+
+def test_monte_carlo_replications_match_repeated_loops():
+    backtester = RealisticBacktester(StubPriceStore(history()))
+    periods = backtester.get_stock_performance_periods('AAPL', months_back=SIMULATION_MONTHS_BACK)
+    summary = backtester.simulate_algorithm_performance('AAPL', seed=5, n_simulations=200)
+
+    # Replications are consecutive draws from one generator, each laid out like a single loop run
+    rng = np.random.default_rng(5)
+    accuracies = [100 * np.mean([r['correct'] for r in loop_simulation(periods, rng)]) for _ in range(200)]
+
+    distribution = summary['accuracy_distribution']
+    assert distribution['simulations'] == 200
+    assert distribution['mean'] == pytest.approx(np.mean(accuracies))
+    assert distribution['std'] == pytest.approx(np.std(accuracies))
+    assert distribution['p5'] == pytest.approx(np.percentile(accuracies, 5))
+    assert distribution['p95'] == pytest.approx(np.percentile(accuracies, 95))
+
+    # The summary itself comes from the first replication
+    assert summary['accuracy'] == pytest.approx(accuracies[0])
+
+def test_per_ticker_seeds_are_reproducible_across_process_pools(tmp_path):
+    # A cache that already covers the simulation window, so neither the parent nor the workers download
+    store = PriceStore(cache_dir=str(tmp_path))
+    today = pd.Timestamp(datetime.now()).normalize()
+    tickers = ['AAPL', 'MSFT', 'NVDA']
+    for seed, ticker in enumerate(tickers):
+        hist = history(seed=seed)
+        store._save(ticker, hist, hist.index[0], today)
+
+    backtester = RealisticBacktester(store)
+    serial = backtester.test_multiple_stocks(tickers, max_workers=1, seed=42)
+    pooled = backtester.test_multiple_stocks(tickers[::-1], max_workers=2, seed=42)
+
+    assert set(serial) == set(pooled) == set(tickers)
+    for ticker in tickers:
+        assert pooled[ticker]['detailed_results'] == serial[ticker]['detailed_results']
+
+    # Another root seed gives other draws
+    other = backtester.test_multiple_stocks(tickers, max_workers=1, seed=43)
+    assert other['AAPL']['detailed_results'] != serial['AAPL']['detailed_results']
@@ -0,0 +1,113 @@
+import time
+import pytest
+from types import SimpleNamespace
+from rate_limiter import AIMDLimiter
+from resilient_llm import CircuitBreaker, CircuitOpenError, ResilientLLM
+
+def api_error(status):
+    error = Exception(f"HTTP {status}")
+    error.status_code = status
+    return error
+
+class ScriptedCompletions:
+    """Raises or answers according to a script, one entry per call"""
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+
+    def create(self, **params):
+        self.calls += 1
+        outcome = self.script.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=outcome))])
+
+def resilient(script, **kwargs):
+    completions = ScriptedCompletions(script)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return ResilientLLM(lambda: client, base_delay=0, max_delay=0, **kwargs), completions
+
+def test_aimd_halves_once_per_round_and_grows_back():
+    limiter = AIMDLimiter(max_limit=8)
+    started = [limiter.acquire() for _ in range(4)]
+
+    # Four calls of the same round overloaded: one decrease, not four
+    assert [limiter.on_overload(t) for t in started] == [True, False, False, False]
+    assert limiter.limit == 4
+    for _ in started:
+        limiter.release()
+
+    # A call sent after the decrease can shrink it again
+    assert limiter.on_overload(limiter.acquire())
+    assert limiter.limit == 2
+
+    for _ in range(50):
+        limiter.on_success()
+    assert limiter.limit == 8
+
+def test_aimd_never_drops_below_min_limit():
+    limiter = AIMDLimiter(max_limit=4, min_limit=1)
+    for _ in range(10):
+        limiter.on_overload()
+    assert limiter.limit == 1
+
+def test_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=0.05)
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+
+    # A failed probe re-opens at once, a successful one closes
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.failures == 0
+
+def test_neutral_outcome_frees_the_probe_without_closing():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_neutral()
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+
+def test_retries_transient_errors_until_an_answer(monkeypatch):
+    monkeypatch.setattr('resilient_llm.time.sleep', lambda seconds: None)
+    llm, completions = resilient([api_error(429), api_error(503), "SENTIMENT: 0.5"])
+
+    response = llm.create(model="gpt-4o-mini", messages=[])
+    assert response.choices[0].message.content == "SENTIMENT: 0.5"
+    assert completions.calls == 3
+    assert llm.limiter.in_flight == 0
+    assert llm.breaker.state == 'closed'
+
+def test_client_errors_are_not_retried():
+    llm, completions = resilient([api_error(400)])
+    with pytest.raises(Exception, match="HTTP 400"):
+        llm.create(model="gpt-4o-mini", messages=[])
+    assert completions.calls == 1
+    assert llm.breaker.failures == 0
+
+def test_rate_limits_do_not_trip_the_breaker(monkeypatch):
+    monkeypatch.setattr('resilient_llm.time.sleep', lambda seconds: None)
+    llm, _ = resilient([api_error(503), api_error(429), api_error(429), "ok"], failure_threshold=2)
+
+    assert llm.create(model="gpt-4o-mini", messages=[]).choices[0].message.content == "ok"
+    assert llm.breaker.state == 'closed'
+
+def test_open_circuit_fails_fast(monkeypatch):
+    monkeypatch.setattr('resilient_llm.time.sleep', lambda seconds: None)
+    llm, completions = resilient([api_error(503)] * 3, failure_threshold=2, max_retries=5, cooldown_seconds=60)
+
+    with pytest.raises(CircuitOpenError):
+        llm.create(model="gpt-4o-mini", messages=[])
+    assert completions.calls == 2
@@ -0,0 +1,71 @@
+import math
+import random
+import pytest
+from sentiment_aggregator import SentimentAggregator
+
+HOUR = 3600.0
+
+def analysis(sentiment, weight=1.0, confidence=0.8):
+    return {'sentiment': sentiment, 'confidence': confidence, 'quality_weight': weight,
+            'signal': 'BUY' if sentiment > 0.2 else 'SELL' if sentiment < -0.2 else 'HOLD', 'relevance': 'HIGH'}
+
+def brute_force(entries, half_life_hours, now):
+    """Decayed, quality-weighted sentiment recomputed from scratch"""
+    decay = [0.5 ** ((now - t) / (half_life_hours * HOUR)) for t, _ in entries]
+    total = sum(d * a['quality_weight'] for d, (_, a) in zip(decay, entries))
+    return sum(d * a['quality_weight'] * a['sentiment'] for d, (_, a) in zip(decay, entries)) / total
+
+def test_weight_halves_every_half_life():
+    aggregator = SentimentAggregator(window_hours=None, half_life_hours=24)
+    aggregator.add(analysis(-1.0), 0.0)
+    aggregator.add(analysis(1.0), 24 * HOUR)
+
+    # The older article counts half as much: (1 - 0.5) / 1.5
+    assert aggregator.sentiment == pytest.approx(1 / 3)
+
+def test_running_sums_match_a_full_recompute():
+    rng = random.Random(1)
+    entries = [(rng.uniform(0, 200 * HOUR), analysis(rng.uniform(-1, 1), rng.uniform(0.1, 1.5))) for _ in range(300)]
+
+    aggregator = SentimentAggregator(window_hours=None, half_life_hours=12)
+    for published_at, item in entries:  # arrival order, not publish order
+        aggregator.add(item, published_at)
+
+    now = max(t for t, _ in entries)
+    assert aggregator.sentiment == pytest.approx(brute_force(entries, 12, now))
+    assert [e[0] for e in aggregator.entries] == sorted(t for t, _ in entries)
+
+def test_expiry_drops_old_articles_from_the_sums():
+    aggregator = SentimentAggregator(window_hours=48, half_life_hours=24)
+    entries = [(i * 6 * HOUR, analysis(-0.6 + 0.1 * i)) for i in range(13)]
+    for published_at, item in entries:
+        aggregator.add(item, published_at)
+
+    now = 72 * HOUR
+    snapshot = aggregator.snapshot(now)
+    kept = [(t, a) for t, a in entries if t >= now - 48 * HOUR]
+    assert snapshot['total_articles'] == len(kept) == 9
+    assert snapshot['avg_sentiment'] == pytest.approx(brute_force(kept, 24, now))
+    assert snapshot['buy_signals'] == sum(a['signal'] == 'BUY' for _, a in kept)
+
+    # Once everything has aged out the window is empty, not left with float residue
+    assert aggregator.snapshot(now + 100 * HOUR)['avg_sentiment'] is None
+    assert aggregator.weight_sum == 0.0
+
+def test_reference_is_rebased_long_before_overflow():
+    aggregator = SentimentAggregator(window_hours=None, half_life_hours=1)
+    entries = [(day * 24 * HOUR, analysis(0.5 if day % 2 else -0.5)) for day in range(0, 400, 20)]
+    for published_at, item in entries:
+        aggregator.add(item, published_at)
+
+    assert aggregator.reference > 0
+    assert math.isfinite(aggregator.weight_sum)
+    # Twenty days apart with a one-hour half-life, only the newest article still carries weight
+    assert aggregator.sentiment == pytest.approx(entries[-1][1]['sentiment'])
+
+def test_without_decay_it_is_the_plain_weighted_mean():
+    aggregator = SentimentAggregator(window_hours=None, half_life_hours=None)
+    aggregator.add(analysis(0.5, weight=3.0), 0.0)
+    aggregator.add(analysis(-0.5, weight=1.0), 1000 * HOUR)
+    assert aggregator.sentiment == pytest.approx(0.25)
+    assert aggregator.confidence == pytest.approx(0.8)
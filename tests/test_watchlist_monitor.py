@@ -0,0 +1,126 @@
+import heapq
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from advanced_analyzer import AdvancedAnalyzer, MODEL
+from article_store import ArticleStore
+from watchlist_monitor import WatchlistMonitor
+
+def answer(sentiment, signal):
+    return (f"SENTIMENT: {sentiment}\nCONFIDENCE: 0.8\nSIGNAL: {signal}\n"
+            f"REASON: Test answer.\nRELEVANCE: HIGH")
+
+class BullishCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, messages, **params):
+        self.calls += 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=answer(0.7, 'BUY')))],
+                               usage=None)
+
+class StubCollector:
+    """fetch_new_articles hands out queued batches; commits are recorded"""
+    def __init__(self, batches=()):
+        self.batches = list(batches)
+        self.commits = []
+
+    def fetch_new_articles(self, ticker, days=1):
+        return self.batches.pop(0) if self.batches else []
+
+    def commit_high_water_mark(self, ticker):
+        self.commits.append(ticker)
+
+class ListSink:
+    def __init__(self):
+        self.events = []
+
+    def write(self, event):
+        self.events.append(event)
+
+def hours_ago(hours):
+    return (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def article(i, hours=2):
+    return {'title': f"Apple story {i}", 'description': 'Details inside.', 'source': {'name': 'Reuters'},
+            'publishedAt': hours_ago(hours), 'url': f"https://example.com/{i}"}
+
+def monitor_with(batches=(), store=None, tickers=('AAPL',), **kwargs):
+    analyzer = AdvancedAnalyzer(use_cache=False, deduplicate=False, collector=StubCollector(batches),
+                                price_store=object(), store=store)
+    completions = BullishCompletions()
+    analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    sink = ListSink()
+    return WatchlistMonitor(list(tickers), analyzer=analyzer, sink=sink, **kwargs), sink, completions
+
+def test_first_poll_seeds_the_rate_then_intervals_follow_volume():
+    monitor, _, _ = monitor_with(window_hours=120, min_interval=60, max_interval=1800, target_articles_per_poll=5)
+
+    # 600 articles over the 5-day window: 5 articles take an hour, clamped to the slowest interval
+    assert monitor.next_interval('AAPL', 600, now=1000.0) == 1800
+    assert monitor.article_rate['AAPL'] == pytest.approx(600 / (120 * 3600))
+
+    # A burst of 50 articles in 100 seconds pulls the EWMA rate up and the interval down
+    interval = monitor.next_interval('AAPL', 50, now=1100.0)
+    rate = 0.7 * 600 / (120 * 3600) + 0.3 * 50 / 100
+    assert monitor.article_rate['AAPL'] == pytest.approx(rate)
+    assert interval == pytest.approx(max(60, 5 / rate))
+
+    # No news at all: back off to the slowest interval
+    monitor.article_rate['AAPL'] = 0.0
+    assert monitor.next_interval('AAPL', 0, now=3000.0) == 1800
+
+def test_run_polls_tickers_in_due_order(monkeypatch):
+    monitor, _, _ = monitor_with(tickers=('AAPL', 'MSFT', 'NVDA'))
+    monitor.schedule = [(2.0, 'NVDA'), (0.0, 'MSFT'), (1.0, 'AAPL')]
+    heapq.heapify(monitor.schedule)
+    polled = []
+    monkeypatch.setattr(monitor, 'poll', lambda ticker: polled.append(ticker) or 0)
+
+    monitor.run(max_polls=3)
+    assert polled == ['MSFT', 'AAPL', 'NVDA']
+
+    # Each ticker went back on the schedule, no sooner than min_interval from now
+    assert sorted(ticker for _, ticker in monitor.schedule) == ['AAPL', 'MSFT', 'NVDA']
+    assert all(due > 60 for due, _ in monitor.schedule)
+
+def test_poll_emits_only_signal_changes_and_skips_seen_articles():
+    batch = [article(i) for i in range(3)]
+    monitor, sink, completions = monitor_with([batch, [dict(a) for a in batch]])
+
+    assert monitor.poll('AAPL') == 3
+    assert [(e['previous_signal'], e['signal']) for e in sink.events] == [(None, 'BUY')]
+    assert completions.calls == 3
+
+    # NewsAPI returns the same articles again: nothing new is scored and the signal has not changed
+    assert monitor.poll('AAPL') == 0
+    assert completions.calls == 3
+    assert len(sink.events) == 1
+    assert monitor.collector.commits == ['AAPL', 'AAPL']
+
+def test_warm_start_restores_the_rolling_window(tmp_path):
+    store = ArticleStore(path=str(tmp_path / 'articles.sqlite'))
+    recent, stale = [article(i, hours=3) for i in range(4)], [article(9, hours=200)]
+    store.save_articles('AAPL', [{**a, 'credibility_score': 1.0, 'relevance_score': 0.5} for a in recent + stale])
+    store.save_analyses('AAPL', [(a, {'sentiment': -0.6, 'confidence': 0.8, 'signal': 'SELL'}) for a in recent + stale],
+                        model=MODEL)
+
+    monitor, _, _ = monitor_with(store=store, window_hours=120)
+
+    # Only articles inside the window come back, and the restored signal is not re-announced
+    assert len(monitor.aggregators['AAPL']) == 4
+    assert monitor.aggregators['AAPL'].sentiment == pytest.approx(-0.6)
+    assert monitor.signals['AAPL'] == 'SELL'
+
+def test_warm_start_keeps_the_llm_analysis_when_both_tiers_scored(tmp_path):
+    store = ArticleStore(path=str(tmp_path / 'articles.sqlite'))
+    scored_twice, local_only = article(1, hours=3), article(2, hours=3)
+    store.save_articles('AAPL', [{**a, 'credibility_score': 1.0, 'relevance_score': 0.5} for a in (scored_twice, local_only)])
+    store.save_analyses('AAPL', [(scored_twice, {'sentiment': -0.6, 'confidence': 0.8, 'signal': 'SELL'})], model=MODEL)
+    store.save_analyses('AAPL', [(a, {'sentiment': 0.4, 'confidence': 0.9, 'signal': 'BUY', 'scorer': 'lexicon'})
+                                 for a in (scored_twice, local_only)], model=MODEL)
+
+    monitor, _, _ = monitor_with(store=store)
+
+    assert len(monitor.aggregators['AAPL']) == 2
+    assert sorted(entry[2]['sentiment'] for entry in monitor.aggregators['AAPL'].entries) == [-0.6, 0.4]
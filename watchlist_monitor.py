@@ -0,0 +1,280 @@
+import os
+import json
+import time
+import heapq
+import sqlite3
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+from advanced_analyzer import AdvancedAnalyzer, MODEL
+from article_store import ArticleStore, one_analysis_per_article
+from news_collector import NewsCollector
+from news_dedup import NearDuplicateDetector
+from sentiment_aggregator import SentimentAggregator
+from pipeline_metrics import metrics
+
+load_dotenv()
+
+DEFAULT_WATCHLIST = os.getenv('WATCHLIST', 'AAPL,MSFT,NVDA,TSLA,GOOGL')
+DEFAULT_EVENTS_PATH = os.getenv('MONITOR_EVENTS_PATH', os.path.join('.cache', 'signal_events.jsonl'))
+
+# URLs remembered per ticker across polls, so an article NewsAPI returns again is not scored twice
+SEEN_URLS_PER_TICKER = 5000
+
+class JsonlSink:
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+
+    def write(self, event):
+        with self.lock, open(self.path, 'a') as f:
+            f.write(json.dumps(event) + '\n')
+
+class SqliteSink:
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS signal_events (
+                ticker TEXT NOT NULL,
+                emitted_at TEXT NOT NULL,
+                previous_signal TEXT,
+                signal TEXT NOT NULL,
+                sentiment REAL,
+                confidence REAL,
+                conviction TEXT,
+                articles INTEGER,
+                new_articles INTEGER
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_signal_events_ticker ON signal_events (ticker, emitted_at)")
+        self.conn.commit()
+
+    def write(self, event):
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO signal_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (event['ticker'], event['emitted_at'], event['previous_signal'], event['signal'], event['sentiment'],
+                 event['confidence'], event['conviction'], event['articles'], event['new_articles'])
+            )
+            self.conn.commit()
+
+def make_sink(path):
+    """SQLite sink for .sqlite/.db paths, JSON lines otherwise"""
+    if path.endswith(('.sqlite', '.db')):
+        return SqliteSink(path)
+    return JsonlSink(path)
+
+class WatchlistMonitor:
+    def __init__(self, tickers, analyzer=None, sink=None, window_hours=120, half_life_hours=24, threshold=0.2,
+                 min_interval=60, max_interval=1800, target_articles_per_poll=5):
+        # One analyzer (LLM client, cache, filter, dedup, store) and one collector serve the whole watchlist
+        self.analyzer = analyzer or AdvancedAnalyzer(store=ArticleStore())
+        if self.analyzer.collector is None:
+            self.analyzer.collector = NewsCollector()
+        self.collector = self.analyzer.collector
+        self.sink = sink or make_sink(DEFAULT_EVENTS_PATH)
+
+        # Rolling, time-decayed sentiment per ticker and the last signal emitted for it
+        self.window_hours = window_hours
+        self.threshold = threshold
+        self.aggregators = {t: SentimentAggregator(window_hours, half_life_hours) for t in tickers}
+        self.signals = {t: None for t in tickers}
+        self.seen_urls = {t: OrderedDict() for t in tickers}
+
+        # Adaptive polling: aim for about target_articles_per_poll new articles per poll,
+        # from an EWMA of each ticker's article rate, within [min_interval, max_interval] seconds
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_articles = target_articles_per_poll
+        self.article_rate = {t: 0.0 for t in tickers}  # new articles per second
+        self.last_polled = {}
+
+        # Min-heap of (due time, ticker); everything is due immediately on start
+        now = time.time()
+        self.schedule = [(now, t) for t in tickers]
+        heapq.heapify(self.schedule)
+        self.stop_event = threading.Event()
+
+        self.warm_start()
+        print(f"✅ Watchlist Monitor ready ({len(tickers)} tickers)")
+
+    def warm_start(self):
+        """Refill the rolling windows from stored analyses, so a restart does not lose them"""
+        store = self.analyzer.store
+        if store is None:
+            return
+
+        now = datetime.now(timezone.utc)
+        scores = store.get_scored_window(list(self.aggregators), now - timedelta(hours=self.window_hours), now)
+
+        # One analysis per article, the LLM's when both tiers scored it
+        scores = one_analysis_per_article(scores).dropna(subset=['quality_score'])
+        for row in scores.itertuples(index=False):
+            self.aggregators[row.ticker].add({
+                'sentiment': row.sentiment,
+                'confidence': row.confidence,
+                'signal': row.signal,
+                'relevance': row.relevance,
+                'quality_weight': row.quality_score * NearDuplicateDetector.cluster_weight(row.cluster_size)
+            }, row.published_at.timestamp())
+
+        for ticker, aggregator in self.aggregators.items():
+            if len(aggregator):
+                self.signals[ticker] = self.signal_for(aggregator.snapshot())
+        if len(scores):
+            print(f"Restored {len(scores)} stored analyses into the rolling windows")
+
+    def signal_for(self, snapshot):
+        """BUY/SELL/HOLD from rolling sentiment, on the same threshold as the backtests"""
+        sentiment = snapshot['avg_sentiment']
+        if sentiment is None:
+            return 'HOLD'
+        if sentiment > self.threshold:
+            return 'BUY'
+        if sentiment < -self.threshold:
+            return 'SELL'
+        return 'HOLD'
+
+    def score_new_articles(self, ticker):
+        """Fetch articles newer than the ticker's high-water mark and score only those"""
+        new_articles = self.collector.fetch_new_articles(ticker, days=max(1, self.window_hours // 24))
+        seen = self.seen_urls[ticker]
+        new_articles = [article for article in new_articles if article.get('url') not in seen]
+        if not new_articles:
+            self.collector.commit_high_water_mark(ticker)
+            return 0
+
+        filtered = self.analyzer.news_filter.filter_and_rank_articles(new_articles, ticker)
+        if self.analyzer.deduplicator:
+            clusters = self.analyzer.deduplicator.cluster(filtered)
+        else:
+            clusters = [[i] for i in range(len(filtered))]
+        representatives = [filtered[cluster[0]] for cluster in clusters]
+
+        scored = []
+        for article, cluster, analysis in zip(representatives, clusters, self.analyzer.score_articles(representatives, ticker)):
+            # Lexicon stand-ins for failed LLM calls count at FALLBACK_WEIGHT (see annotate_analysis)
+            if analysis:
+                self.analyzer.annotate_analysis(analysis, article, [filtered[i] for i in cluster[1:]])
+                self.aggregators[ticker].add(analysis)
+                scored.append((article, analysis))
+
+        if self.analyzer.store:
+            self.analyzer.store.save_articles(ticker, new_articles)
+            self.analyzer.store.save_articles(ticker, filtered)
+            self.analyzer.store.save_analyses(ticker, scored, model=MODEL)
+        # Only now is the batch safe to skip on the next poll
+        self.collector.commit_high_water_mark(ticker)
+        for article in new_articles:
+            seen[article.get('url')] = True
+        while len(seen) > SEEN_URLS_PER_TICKER:
+            seen.popitem(last=False)
+
+        print(f"  {ticker}: {len(new_articles)} new, {len(filtered)} passed filter, {len(scored)} stories scored")
+        return len(new_articles)
+
+    def next_interval(self, ticker, new_count, now):
+        """Seconds until the next poll, shorter for tickers with more news"""
+        elapsed = now - self.last_polled[ticker] if ticker in self.last_polled else None
+        self.last_polled[ticker] = now
+
+        if elapsed:
+            self.article_rate[ticker] = 0.7 * self.article_rate[ticker] + 0.3 * (new_count / elapsed)
+        else:
+            # The first poll covers the whole window, so its count over the window seeds the rate
+            self.article_rate[ticker] = new_count / (self.window_hours * 3600)
+
+        rate = self.article_rate[ticker]
+        interval = self.target_articles / rate if rate > 0 else self.max_interval
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def poll(self, ticker):
+        """Score new articles for one ticker and emit an event if its signal changed"""
+        new_count = self.score_new_articles(ticker)
+        snapshot = self.aggregators[ticker].snapshot()
+        signal = self.signal_for(snapshot)
+
+        previous = self.signals[ticker]
+        if previous is None and signal == 'HOLD':
+            # Nothing to report yet: a ticker starting out neutral is not a signal change
+            self.signals[ticker] = signal
+        elif signal != previous:
+            event = {
+                'ticker': ticker,
+                'emitted_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'previous_signal': previous,
+                'signal': signal,
+                'sentiment': snapshot['avg_sentiment'],
+                'confidence': snapshot['avg_confidence'],
+                'conviction': snapshot['conviction_level'],
+                'articles': snapshot['total_articles'],
+                'new_articles': new_count
+            }
+            self.sink.write(event)
+            self.signals[ticker] = signal
+            print(f"🔔 {ticker}: {previous or '—'} → {signal} (sentiment {snapshot['avg_sentiment'] or 0:+.2f}, "
+                  f"{snapshot['conviction_level']} conviction)")
+        return new_count
+
+    def run(self, max_polls=None):
+        """Poll tickers as they come due until stop() is called (or max_polls polls have run)"""
+        polls = 0
+        while self.schedule and not self.stop_event.is_set():
+            due, ticker = self.schedule[0]
+            wait = due - time.time()
+            if wait > 0:
+                # Wakes early if stop() is called
+                if self.stop_event.wait(wait):
+                    break
+
+            heapq.heappop(self.schedule)
+            try:
+                new_count = self.poll(ticker)
+            except Exception as e:
+                print(f"❌ Error polling {ticker}: {e}")
+                new_count = 0
+
+            now = time.time()
+            interval = self.next_interval(ticker, new_count, now)
+            heapq.heappush(self.schedule, (now + interval, ticker))
+            print(f"  next {ticker} poll in {interval / 60:.1f} min")
+
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                break
+
+    def stop(self):
+        self.stop_event.set()
+
+# Run it
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Continuously monitor a watchlist for sentiment signal changes")
+    parser.add_argument('tickers', nargs='*', help="Tickers to watch (default: $WATCHLIST)")
+    parser.add_argument('--events', default=DEFAULT_EVENTS_PATH, help="Event sink: .jsonl file or .sqlite database")
+    parser.add_argument('--min-interval', type=float, default=60, help="Fastest poll interval in seconds")
+    parser.add_argument('--max-interval', type=float, default=1800, help="Slowest poll interval in seconds")
+    parser.add_argument('--metrics-port', type=int, help="Serve Prometheus metrics on this port")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        metrics.start_prometheus_server(args.metrics_port)
+
+    tickers = [t.upper() for t in args.tickers] or [t.strip().upper() for t in DEFAULT_WATCHLIST.split(',') if t.strip()]
+    monitor = WatchlistMonitor(tickers, sink=make_sink(args.events),
+                               min_interval=args.min_interval, max_interval=args.max_interval)
+
+    print(f"👀 Watching {', '.join(tickers)} — signal changes go to {args.events} (Ctrl+C to stop)")
+    try:
+        monitor.run()
+    except KeyboardInterrupt:
+        monitor.stop()
+        print("\n👋 Monitor stopped")